@@ -0,0 +1,39 @@
+"""contacts birthday day of year
+
+Revision ID: 5b1f0c2d7e41
+Revises: 23e3c7df2dbc
+Create Date: 2026-10-17 09:12:40.114502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c2d7e41'
+down_revision: Union[str, Sequence[str], None] = '23e3c7df2dbc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('birthday_doy', sa.SmallInteger(), nullable=True))
+    # День року рахуємо як у високосному 2000 році, щоб 29 лютого завжди було 60-м днем
+    op.execute(
+        """
+        UPDATE contacts
+        SET birthday_doy = EXTRACT(DOY FROM make_date(2000, EXTRACT(MONTH FROM birthday)::int,
+                                                      EXTRACT(DAY FROM birthday)::int))
+        WHERE birthday IS NOT NULL
+        """
+    )
+    op.create_index('ix_contacts_owner_id_birthday_doy', 'contacts', ['owner_id', 'birthday_doy'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_owner_id_birthday_doy', table_name='contacts')
+    op.drop_column('contacts', 'birthday_doy')
@@ -0,0 +1,28 @@
+"""contacts owner_id, id index
+
+Revision ID: e72a4f1c0d93
+Revises: c3d8e1a94b62
+Create Date: 2026-10-17 10:41:52.330815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e72a4f1c0d93'
+down_revision: Union[str, Sequence[str], None] = 'c3d8e1a94b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_contacts_owner_id_id', 'contacts', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contacts_owner_id_id', table_name='contacts')
@@ -0,0 +1,33 @@
+"""contacts prefix indexes for suggestions
+
+Revision ID: f41b7d2e8c05
+Revises: e72a4f1c0d93
+Create Date: 2026-10-17 14:05:12.482931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f41b7d2e8c05'
+down_revision: Union[str, Sequence[str], None] = 'e72a4f1c0d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COLUMNS:
+        op.create_index(f'ix_contacts_owner_id_lower_{column}', 'contacts',
+                        ['owner_id', sa.text(f'lower({column}) text_pattern_ops')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in COLUMNS:
+        op.drop_index(f'ix_contacts_owner_id_lower_{column}', table_name='contacts')
@@ -0,0 +1,356 @@
+"""
+Load test of the API with synthetic tenants, run offline and in-process.
+
+The app is driven through httpx's ASGI transport against a throwaway
+database (SQLite in a temporary directory unless BENCH_DATABASE_URL is set,
+e.g. to a local Postgres; its tables are dropped and recreated), an
+in-memory Redis (fakeredis) and an SMTP transport that only counts messages.
+For every tenant size the list, search, birthdays, create, login and refresh
+requests are timed and throughput and p50/p95/p99 latencies are written to
+JSON, so runs on different commits can be compared.
+
+Run from the project root::
+
+    python -m benchmarks.load run --output before.json
+    python -m benchmarks.load run --sizes 1000 --requests 100 --baseline before.json --threshold 10
+    python -m benchmarks.load compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+# Налаштування читаються під час імпорту src, тому оточення готуємо до нього.
+# База завжди тимчасова: бенчмарк не повинен торкатися бази з .env
+os.environ["SQLALCHEMY_DATABASE_URL"] = os.environ.get(
+    "BENCH_DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench-')}/bench.db"
+)
+for _name, _value in {
+    "SECRET_KEY": "benchmark", "ALGORITHM": "HS256",
+    "MAIL_USERNAME": "bench", "MAIL_PASSWORD": "bench", "MAIL_FROM": "bench@example.com",
+    "MAIL_PORT": "25", "MAIL_SERVER": "localhost",
+    "CLOUDINARY_NAME": "bench", "CLOUDINARY_API_KEY": "bench", "CLOUDINARY_API_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_name, _value)
+os.environ.update(
+    EMAIL_QUEUE_BACKEND="local", RATE_LIMIT_ENABLED="false", AVATAR_STORAGE="local", DB_PROFILING="false"
+)
+
+import asyncio  # noqa: E402
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from main import app  # noqa: E402
+from src.database import redis as redis_db  # noqa: E402
+from src.database.db import engine  # noqa: E402
+from src.database.models import Base, Contact, User, birthday_day_of_year  # noqa: E402
+from src.services.auth import auth_service  # noqa: E402
+from src.services.email_queue import get_email_queue  # noqa: E402
+from src.services.email_worker import EmailWorker  # noqa: E402
+from src.services.template_registry import template_registry  # noqa: E402
+
+SCENARIOS = ("list", "search", "birthdays", "create", "login", "refresh")
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+PASSWORD = "benchmark-password"
+INSERT_BATCH_SIZE = 5000
+FIRST_NAMES = [f"Name{i:03d}" for i in range(200)]
+LAST_NAMES = [f"Surname{i:03d}" for i in range(500)]
+
+
+class FakeSMTP:
+    """
+    Mail transport of the email worker that only counts messages.
+    """
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, message) -> None:
+        self.sent += 1
+
+    async def close(self) -> None:
+        pass
+
+
+def use_fake_redis() -> None:
+    try:
+        import fakeredis
+        from fakeredis.aioredis import FakeConnection
+        from redis.asyncio import ConnectionPool
+    except ImportError:
+        sys.exit("fakeredis is not installed: poetry install --with test, or use --redis server")
+    # Пул для поточного циклу подій: get_redis() у всьому застосунку бере його
+    redis_db._pools[asyncio.get_running_loop()] = ConnectionPool(
+        connection_class=FakeConnection, server=fakeredis.FakeServer()
+    )
+
+
+def contact_rows(owner_id: int, size: int, start: int):
+    today = date.today()
+    for i in range(start, min(start + INSERT_BATCH_SIZE, size)):
+        # Дні народження рівномірно по року, щоб /birthdays/ щось знаходив
+        birthday = date(1970 + i % 40, 1, 1) + timedelta(days=(today.timetuple().tm_yday + i) % 365)
+        yield {
+            "first_name": FIRST_NAMES[i % len(FIRST_NAMES)],
+            "last_name": LAST_NAMES[i % len(LAST_NAMES)],
+            "email": f"c{i}@t{owner_id}.bench",
+            "phone": f"+380{i:09d}",
+            "birthday": birthday,
+            "birthday_doy": birthday_day_of_year(birthday),
+            "additional_data": "note" if i % 3 else None,
+            "owner_id": owner_id,
+        }
+
+
+async def create_user(db, email: str, password_hash: str) -> int:
+    result = await db.execute(
+        insert(User).values(email=email, username=email.split("@")[0], password=password_hash, confirmed=True)
+        .returning(User.id)
+    )
+    return result.scalar_one()
+
+
+async def seed(sizes: list[int], concurrency: int) -> dict[int, dict]:
+    """
+    Recreates the schema and creates one tenant per size, plus users whose
+    refresh tokens are rotated by the refresh scenario (one per concurrent worker).
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    password_hash = auth_service.get_password_hash(PASSWORD)
+    tenants = {}
+    async with engine.begin() as conn:
+        for size in sizes:
+            owner_id = await create_user(conn, f"tenant{size}@bench.local", password_hash)
+            for start in range(0, size, INSERT_BATCH_SIZE):
+                await conn.execute(insert(Contact), list(contact_rows(owner_id, size, start)))
+            refresh_users = [f"refresh{size}-{k}@bench.local" for k in range(concurrency)]
+            for email in refresh_users:
+                await create_user(conn, email, password_hash)
+            tenants[size] = {"size": size, "email": f"tenant{size}@bench.local", "refresh_users": refresh_users}
+    return tenants
+
+
+async def login(client: AsyncClient, email: str) -> dict:
+    response = await client.post("/api/auth/login", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()
+
+
+async def make_request(client: AsyncClient, scenario: str, tenant: dict, state: dict, i: int):
+    auth = {"Authorization": f"Bearer {tenant['access_token']}"}
+    if scenario == "list":
+        return await client.get("/api/contacts/", params={"limit": 100}, headers=auth)
+    if scenario == "search":
+        query = LAST_NAMES[i % len(LAST_NAMES)] if i % 2 else FIRST_NAMES[i % len(FIRST_NAMES)]
+        return await client.get("/api/contacts/search/", params={"query": query}, headers=auth)
+    if scenario == "birthdays":
+        return await client.get("/api/contacts/birthdays/", params={"days": 7}, headers=auth)
+    if scenario == "create":
+        contact = {
+            "first_name": "Bench", "last_name": f"Created{i}",
+            "email": f"new{tenant['size']}-{state['worker']}-{i}@example.com",
+            "phone": "+380000000000", "birthday": "1990-01-01",
+        }
+        return await client.post("/api/contacts/", json=contact, headers=auth)
+    if scenario == "login":
+        return await client.post("/api/auth/login", data={"username": tenant["email"], "password": PASSWORD})
+    # refresh: у кожного воркера свій користувач, бо токен змінюється після кожного оновлення
+    response = await client.get(
+        "/api/auth/refresh_token", headers={"Authorization": f"Bearer {state['refresh_token']}"}
+    )
+    if response.status_code == 200:
+        state["refresh_token"] = response.json()["refresh_token"]
+    return response
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    else:
+        percentiles = latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+async def run_scenario(
+    client: AsyncClient, scenario: str, tenant: dict, requests: int, concurrency: int, warmup: int
+) -> dict:
+    states = [{"worker": k} for k in range(concurrency)]
+    if scenario == "refresh":
+        for state, email in zip(states, tenant["refresh_users"]):
+            state["refresh_token"] = (await login(client, email))["refresh_token"]
+    for i in range(warmup):
+        await make_request(client, scenario, tenant, states[0], -1 - i)
+
+    counter = iter(range(requests))
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(state: dict):
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await make_request(client, scenario, tenant, state, i)
+            elapsed = time.perf_counter() - start
+            if response.status_code < 400:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(state) for state in states))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    if args.redis == "fake":
+        use_fake_redis()
+    template_registry.load()
+    smtp = FakeSMTP()
+    email_worker = asyncio.create_task(EmailWorker(get_email_queue(), smtp).run())
+    print(f"Seeding {', '.join(map(str, args.sizes))} contacts into {engine.url.get_backend_name()}...", file=sys.stderr)
+    tenants = await seed(args.sizes, args.concurrency)
+    results = {}
+    try:
+        async with AsyncClient(
+            # Помилка застосунку — це відповідь 500 у статистиці, а не зупинка прогону
+            transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://bench"
+        ) as client:
+            for size, tenant in tenants.items():
+                tenant["access_token"] = (await login(client, tenant["email"]))["access_token"]
+                for scenario in args.scenarios:
+                    result = await run_scenario(
+                        client, scenario, tenant, args.requests, args.concurrency, args.warmup
+                    )
+                    results[f"{scenario}/{size}"] = result
+                    print(f"{scenario + '/' + str(size):<20} {format_result(result)}", file=sys.stderr)
+    finally:
+        email_worker.cancel()
+        await engine.dispose()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": engine.url.get_backend_name(),
+            "redis": args.redis,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "emails_sent": smtp.sent,
+        },
+        "results": results,
+    }
+
+
+def format_result(result: dict) -> str:
+    if not result.get("requests"):
+        return f"no successful requests, {result.get('errors', 0)} errors"
+    return (
+        f"{result['throughput_rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+        f"p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}"
+    )
+
+
+def compare(baseline: dict, current: dict, metric: str, threshold: float) -> list[str]:
+    """
+    Prints the change of a metric for every result present in both runs.
+
+    :param baseline: The results of the reference run.
+    :type baseline: dict
+    :param current: The results of the run to check.
+    :type current: dict
+    :param metric: One of METRICS.
+    :type metric: str
+    :param threshold: The allowed worsening in percent.
+    :type threshold: float
+    :return: The names of the results that got worse by more than threshold.
+    :rtype: list[str]
+    """
+    regressions = []
+    print(f"{'result':<20} {'baseline':>10} {'current':>10} {'change':>8}  ({metric})")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name, {}).get(metric)
+        after = result.get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before * 100
+        # Для пропускної здатності гірше — менше, для затримок — більше
+        worse = -change if metric == "throughput_rps" else change
+        regressed = worse > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<20} {before:>10.2f} {after:>10.2f} {change:>+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the load test")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    run_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run_parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario and size")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--warmup", type=int, default=10)
+    run_parser.add_argument("--redis", choices=("fake", "server"), default="fake",
+                            help="fakeredis in memory, or the server from REDIS_HOST/REDIS_PORT")
+    run_parser.add_argument("--output", help="write the results to this JSON file")
+    run_parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    run_parser.add_argument("--metric", choices=METRICS, default="p95_ms")
+    run_parser.add_argument("--threshold", type=float, default=10, help="allowed worsening in percent")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--metric", choices=METRICS, default="p95_ms")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="allowed worsening in percent")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        current = asyncio.run(run(args))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+    return 1 if compare(baseline, current, args.metric, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Compares the default response path of the contact list routes with the fast one.
+
+The default path is what FastAPI does for ``response_model=List[Contact]`` on
+pydantic v1: validate every ORM row into the schema, convert it back to a dict,
+run jsonable_encoder and encode with json. The fast path projects the rows to
+dicts and encodes them with fast_json.dumps (orjson).
+
+Run from the project root::
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 100 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.database.models import Contact
+from src.schemas import Contact as ContactSchema
+from src.services.fast_json import FastJSONResponse, project_contacts
+
+RESPONSE_FIELD = create_model_field(name="Response_read_all_contacts", type_=List[ContactSchema], mode="serialization")
+
+
+def make_contacts(size: int) -> list[Contact]:
+    return [
+        Contact(
+            id=i,
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            email=f"contact{i}@example.com",
+            phone=f"+380{i:09d}",
+            birthday=date(1980, 1, 1) + timedelta(days=i % 10000),
+            additional_data="note" if i % 3 else None,
+            owner_id=1,
+        )
+        for i in range(size)
+    ]
+
+
+async def default_path(contacts: list[Contact]) -> bytes:
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=contacts)
+    return JSONResponse(content).body
+
+
+async def fast_path(contacts: list[Contact]) -> bytes:
+    return FastJSONResponse(project_contacts(contacts)).body
+
+
+async def measure(func, contacts: list[Contact], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func(contacts)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    print(f"{'rows':>7} {'default, ms':>12} {'fast, ms':>10} {'speedup':>8}")
+    for size in sizes:
+        contacts = make_contacts(size)
+        # Обидва шляхи мають віддавати той самий JSON
+        assert json.loads(await default_path(contacts)) == json.loads(await fast_path(contacts))
+        default = statistics.median(await measure(default_path, contacts, repeat)) * 1000
+        fast = statistics.median(await measure(fast_path, contacts, repeat)) * 1000
+        print(f"{size:>7} {default:>12.2f} {fast:>10.2f} {default / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
@@ -1,10 +1,20 @@
-import redis.asyncio as redis
+import asyncio
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
+from fastapi.staticfiles import StaticFiles
 
-from src.routes import auth, contacts, users
+from src.routes import auth, contacts, users, metrics, debug
 from src.conf.config import settings
+from src.database.db import engine
+from src.database.profiling import ProfilingMiddleware, enable_profiling
+from src.database.redis import close_redis
+from src.services.auth import auth_service
+from src.services.avatar import AvatarUploadLimitMiddleware, shutdown_avatar_executor
+from src.services.cache import listen_user_invalidations
+from src.services.email_worker import create_worker
+from src.services.metrics import MetricsMiddleware, instrument_engine
+from src.services.template_registry import template_registry
 
 app = FastAPI()
 
@@ -18,9 +28,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(AvatarUploadLimitMiddleware, path="/api/users/avatar")
+
+if settings.db_profiling:
+    app.add_middleware(ProfilingMiddleware)
+    enable_profiling(engine)
+
+if settings.metrics_enabled:
+    # Додано останнім, тож зовнішній: час запиту включає решту middleware
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+
 app.include_router(auth.router, prefix='/api')
 app.include_router(contacts.router, prefix='/api')
 app.include_router(users.router, prefix='/api')
+app.include_router(metrics.router, prefix='/api')
+app.include_router(metrics.exposition_router)
+if settings.db_profiling:
+    app.include_router(debug.router, prefix='/api')
+
+if settings.avatar_storage == "local":
+    # Локальне сховище аватарів роздається самим застосунком
+    app.mount(settings.avatar_local_url, StaticFiles(directory=settings.avatar_local_dir, check_dir=False), name="avatars")
 
 
 @app.on_event("startup")
@@ -28,11 +57,31 @@ async def startup() -> None:
     """
     Initialize the FastAPI application on startup.
 
-    This function sets up the Redis connection for rate limiting.
+    This function compiles the email templates, starts listening for user cache
+    invalidations from other workers and, if configured, starts the email sender
+    in this process.
+    """
+    template_registry.load()
+    app.state.user_cache_listener = asyncio.create_task(listen_user_invalidations())
+    app.state.email_worker = None
+    if settings.email_worker_in_process or settings.email_queue_backend == "local":
+        app.state.email_worker = create_worker()
+        app.state.email_worker_task = asyncio.create_task(app.state.email_worker.run())
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    """
+    Stop the user cache listener, the email sender, the password hashing and avatar workers and
+    close the shared Redis connection pool on shutdown.
     """
-    r = await redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0, encoding="utf-8",
-                          decode_responses=True)
-    await FastAPILimiter.init(r)
+    app.state.user_cache_listener.cancel()
+    if app.state.email_worker is not None:
+        app.state.email_worker_task.cancel()
+        await app.state.email_worker.transport.close()
+    auth_service.shutdown_password_executor()
+    shutdown_avatar_executor()
+    await close_redis()
 
 
 @app.get("/")
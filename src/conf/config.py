@@ -3,6 +3,17 @@ from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     sqlalchemy_database_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout: int = 0
+    db_unit_of_work: bool = False
+    db_profiling: bool = False
+    db_slow_query_ms: float = 100
+    db_max_statements_per_request: int = 20
+    db_profiling_traces: int = 100
     secret_key: str
     algorithm: str
     mail_username: str
@@ -10,11 +21,58 @@ class Settings(BaseSettings):
     mail_from: str
     mail_port: int
     mail_server: str
+    mail_from_name: str = 'Rest API Application'
+    mail_ssl_tls: bool = True
+    mail_starttls: bool = False
+    mail_validate_certs: bool = False
+    email_queue_backend: str = 'redis'
+    email_worker_in_process: bool = False
+    email_worker_concurrency: int = 10
+    email_batch_size: int = 50
+    email_max_attempts: int = 5
+    email_retry_base_delay: float = 5
+    email_retry_max_delay: float = 300
+    email_claim_idle: float = 300
+    email_claim_interval: float = 60
     redis_host: str = 'localhost'
     redis_port: int = 6379
+    redis_max_connections: int = 50
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = 'redis'
+    rate_limit_fail_open: bool = True
+    rate_limit_local_size: int = 10000
+    rate_limit_trusted_proxies: int = 0
+    rate_limit_login: str = '10/minute'
+    rate_limit_login_account: str = '30/minute'
+    rate_limit_signup: str = '5/minute'
+    rate_limit_request_email: str = '3/minute'
+    rate_limit_contacts_write: str = '120/minute'
+    rate_limit_user_overrides: dict[str, str] = {}
+    principal_cache_size: int = 10000
+    principal_cache_ttl: float = 5
+    token_cache_size: int = 10000
+    bcrypt_rounds: int = 12
+    password_hash_executor: str = 'thread'
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 64
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    avatar_storage: str = 'cloudinary'
+    avatar_local_dir: str = 'media/avatars'
+    avatar_local_url: str = '/media/avatars'
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_size: int = 250
+    avatar_workers: int = 2
+    search_backend: str = 'auto'
+    import_batch_size: int = 500
+    fast_json_responses: bool = False
+    metrics_enabled: bool = True
+    metrics_token: str = ''
+    suggest_cache_size: int = 1000
+    suggest_cache_ttl: float = 600
+    suggest_cache_max_contacts: int = 50000
+    suggest_cache_max_total_contacts: int = 500000
 
     class Config:
         env_file = ".env"
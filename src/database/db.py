@@ -18,16 +18,97 @@
 #         db.close()
 
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.conf.config import settings
 
 # URL должен содержать async драйвер (postgresql+asyncpg, mysql+aiomysql и т. д.)
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
 
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts take, including waiting for a free connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_time_total = 0.0
+        self.checkout_time_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.checkouts += 1
+            self.checkout_time_total += elapsed
+            self.checkout_time_max = max(self.checkout_time_max, elapsed)
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Creates the async engine with the pool and timeout settings.
+
+    Pool sizing applies to server databases only; SQLite keeps the pool chosen
+    by its dialect.
+
+    :param url: The database URL.
+    :type url: str
+    :return: The engine.
+    :rtype: AsyncEngine
+    """
+    url = make_url(url)
+    kwargs = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if url.get_backend_name() != "sqlite":
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    if settings.db_statement_timeout and url.get_backend_name() == "postgresql":
+        # Таймаут на стороні сервера, у мілісекундах
+        if url.get_driver_name() == "asyncpg":
+            kwargs["connect_args"] = {"server_settings": {"statement_timeout": str(settings.db_statement_timeout)}}
+        else:
+            kwargs["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout}"}
+    return create_async_engine(url, **kwargs)
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    """
+    Returns the connection pool statistics of an engine.
+
+    :param engine: The engine.
+    :type engine: AsyncEngine
+    :return: Pool size, checked in/out and overflow connections, and checkout timings when available.
+    :rtype: dict
+    """
+    pool = engine.sync_engine.pool
+    stats = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    if isinstance(pool, InstrumentedQueuePool):
+        stats["checkouts"] = pool.checkouts
+        stats["checkout_time_total"] = pool.checkout_time_total
+        stats["checkout_time_max"] = pool.checkout_time_max
+    return stats
+
+
 # Асинхронный движок
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
 # Асинхронная сессия
 AsyncSessionLocal = sessionmaker(
@@ -38,10 +119,70 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Позначка сесії, транзакцією якої керує get_db (режим unit of work)
+UNIT_OF_WORK = "unit_of_work"
+AFTER_COMMIT = "after_commit"
+
+
+async def commit_or_flush(db: AsyncSession) -> None:
+    """
+    Commits the session, or only flushes it when the request owns the transaction.
+
+    Repositories call it instead of commit(): in unit of work mode get_db commits
+    all changes of the request at once.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    """
+    if UNIT_OF_WORK in db.info:
+        await db.flush()
+    else:
+        await db.commit()
+
+
+async def after_commit(db: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    Runs a callback once the changes of the session are committed.
+
+    Outside of unit of work mode they already are, so the callback runs at once.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param callback: Coroutine function without arguments.
+    :type callback: Callable[[], Awaitable[None]]
+    """
+    if UNIT_OF_WORK in db.info:
+        db.info.setdefault(AFTER_COMMIT, []).append(callback)
+    else:
+        await callback()
+
+
+async def _commit_unit_of_work(db: AsyncSession) -> None:
+    await db.commit()
+    for callback in db.info.pop(AFTER_COMMIT, []):
+        await callback()
+
+
 # Асинхронная зависимость для FastAPI
 async def get_db():
     db = AsyncSessionLocal()
     try:
-        yield db
+        if not settings.db_unit_of_work:
+            yield db
+            return
+
+        # Одна транзакція на запит: репозиторії лише виконують flush, фіксуємо тут
+        db.info[UNIT_OF_WORK] = True
+        try:
+            yield db
+        except HTTPException:
+            # Відповідь з помилкою — очікуваний результат запиту, зроблені зміни зберігаємо
+            await _commit_unit_of_work(db)
+            raise
+        except Exception:
+            await db.rollback()
+            raise
+        else:
+            await _commit_unit_of_work(db)
     finally:
         await db.close()  # Важно: закрытие сессии тоже асинхронное!
\ No newline at end of file
@@ -1,12 +1,46 @@
-from sqlalchemy import Column, Integer, String, Boolean, func, Table, UniqueConstraint, Date, Text
-from sqlalchemy.orm import relationship, declarative_base
+from datetime import date
+
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, func, Table, UniqueConstraint, Date, Text, Index, DDL, event
+from sqlalchemy.orm import relationship, declarative_base, validates
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import DateTime
 
 Base = declarative_base()
 
+
+def birthday_day_of_year(birthday: date | None) -> int | None:
+    """
+    Returns the day of year of a birthday, counted as if it were in a leap year.
+
+    Feb 29 is always day 60 and Mar 1 always day 61, so the value does not depend
+    on the year the contact was born in.
+
+    :param birthday: The birthday date.
+    :type birthday: date | None
+    :return: Day of year in range 1..366, or None if there is no birthday.
+    :rtype: int | None
+    """
+    if birthday is None:
+        return None
+    return date(2000, birthday.month, birthday.day).timetuple().tm_yday
+
+
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_owner_id_id", "owner_id", "id"),
+        Index("ix_contacts_owner_id_birthday_doy", "owner_id", "birthday_doy"),
+        # Триграмні індекси для пошуку ILIKE '%q%' (потрібне розширення pg_trgm)
+        *(
+            Index(
+                f"ix_contacts_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            ).ddl_if(dialect="postgresql")
+            for column in ("first_name", "last_name", "email")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(50), nullable=False)
@@ -15,12 +49,56 @@ class Contact(Base):
     phone = Column(String(20))
     birthday = Column(Date)
     additional_data = Column(Text, nullable=True)
+    birthday_doy = Column(SmallInteger, nullable=True)  # день року дня народження, для пошуку по індексу
     owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)  # Додали поле для власника контакту
 
     owner = relationship("User", backref="contacts")
 
+    @validates("birthday")
+    def _sync_birthday_doy(self, key, value):
+        self.birthday_doy = birthday_day_of_year(value)
+        return value
+
+# Префіксні індекси для підказок: owner_id = :o AND lower(column) LIKE 'abc%'
+for _column in (Contact.first_name, Contact.last_name, Contact.email):
+    Index(
+        f"ix_contacts_owner_id_lower_{_column.key}",
+        Contact.owner_id,
+        func.lower(_column).label(f"lower_{_column.key}"),
+        postgresql_ops={f"lower_{_column.key}": "text_pattern_ops"},
+    ).ddl_if(dialect="postgresql")
+
+# Повнотекстовий індекс контактів для SQLite, синхронізується тригерами
+CONTACTS_FTS_TABLE = "contacts_fts"
+
+for statement in (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {CONTACTS_FTS_TABLE} USING fts5("
+    "first_name, last_name, email, content='contacts', content_rowid='id')",
+    f"CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+    f"INSERT INTO {CONTACTS_FTS_TABLE}(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    f"CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+    f"INSERT INTO {CONTACTS_FTS_TABLE}({CONTACTS_FTS_TABLE}, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END",
+    f"CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN "
+    f"INSERT INTO {CONTACTS_FTS_TABLE}({CONTACTS_FTS_TABLE}, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    f"INSERT INTO {CONTACTS_FTS_TABLE}(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+):
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Contact.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {CONTACTS_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
 class User(Base):
     __tablename__ = "users"
+    # created_at повертається з INSERT ... RETURNING, без окремого refresh
+    __mapper_args__ = {"eager_defaults": True}
     id = Column(Integer, primary_key=True)
     username = Column(String(50))
     email = Column(String(250), nullable=False, unique=True)
@@ -0,0 +1,182 @@
+import itertools
+import logging
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Query-Trace-Id"
+
+
+class QueryTrace:
+    """
+    The SQL statements executed while handling one request.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.route: str | None = None
+        # Користувач, від імені якого виконано запит; лише він бачить трасування
+        self.user_id: int | None = None
+        self.statements: list[dict] = []
+        # Скільки запитів було до початку відповіді, тобто скільки їх у заголовках
+        self.before_response: int | None = None
+
+    @property
+    def total_ms(self) -> float:
+        return sum(entry["duration_ms"] for entry in self.statements)
+
+    def repeated(self) -> list[tuple[str, int]]:
+        """
+        Returns the statements executed more than once, most frequent first;
+        many runs of one SELECT usually mean lazy loads in a loop (N+1).
+        """
+        counts = Counter(entry["statement"] for entry in self.statements)
+        return [(statement, count) for statement, count in counts.most_common() if count > 1]
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "count": len(self.statements),
+            "before_response": self.before_response,
+            "total_ms": round(self.total_ms, 3),
+            "statements": self.statements,
+            "repeated": [{"statement": s, "count": c} for s, c in self.repeated()],
+        }
+
+
+current_trace: ContextVar[QueryTrace | None] = ContextVar("current_trace", default=None)
+# Останні трасування запитів цього воркера, для GET /api/debug/queries
+recent_traces: deque[QueryTrace] = deque(maxlen=settings.db_profiling_traces)
+
+
+def parameters_shape(parameters, executemany: bool = False):
+    """
+    Describes bound parameters by their types only, so values never reach the log.
+
+    :param parameters: The parameters passed to the DBAPI cursor.
+    :param executemany: Whether parameters is a sequence of parameter sets.
+    :type executemany: bool
+    :return: The types of the parameters, e.g. {"email": "str"} or ["int", "str"].
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters_shape(parameters[0]) if parameters else None
+        return {"rows": len(parameters), "row": first}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def enable_profiling(engine: AsyncEngine) -> None:
+    """
+    Records every statement of the engine in the trace of the current request
+    and logs statements slower than settings.db_slow_query_ms.
+
+    :param engine: The engine.
+    :type engine: AsyncEngine
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiling_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["profiling_query_start"].pop()) * 1000
+    trace = current_trace.get()
+    slow = duration_ms >= settings.db_slow_query_ms
+    if trace is None and not slow:
+        return
+    shape = parameters_shape(parameters, executemany)
+    if slow:
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s parameters=%s",
+            duration_ms, f"{trace.method} {trace.route or trace.path}" if trace else "background task",
+            statement, shape,
+        )
+    if trace is not None:
+        trace.statements.append({"statement": statement, "parameters": shape, "duration_ms": round(duration_ms, 3)})
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that traces the SQL statements of each HTTP request.
+
+    The response carries the number of statements, their total time and the
+    ID under which the trace is kept. Headers are sent before the body, so
+    they cover only the work done before the response starts; statements run
+    while a streaming body is produced, or after the response has started, are
+    counted in the trace, which is kept once the response is complete.
+    Requests issuing more than settings.db_max_statements_per_request
+    statements in total are logged together with the statements they repeat.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace = QueryTrace(scope["method"], scope["path"])
+        token = current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.route = getattr(scope.get("route"), "path", None)
+                trace.before_response = len(trace.statements)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_HEADER.lower().encode(), str(trace.id).encode()),
+                    (b"x-query-count", str(len(trace.statements)).encode()),
+                    (b"x-query-time-ms", f"{trace.total_ms:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Тіло відповіді вже надіслано: підсумки й попередження враховують і запити під час стримінгу
+            current_trace.reset(token)
+            recent_traces.append(trace)
+            if len(trace.statements) > settings.db_max_statements_per_request:
+                repeated = trace.repeated()
+                logger.warning(
+                    "%s %s issued %d SQL statements%s",
+                    trace.method, trace.route or trace.path, len(trace.statements),
+                    f"; repeated {repeated[0][1]} times: {repeated[0][0]}" if repeated else "",
+                )
+
+
+def attribute_trace(user_id: int) -> None:
+    """
+    Marks the trace of the current request, if any, as made by a user.
+
+    :param user_id: The ID of the authenticated user.
+    :type user_id: int
+    """
+    trace = current_trace.get()
+    if trace is not None:
+        trace.user_id = user_id
+
+
+def find_trace(trace_id: int) -> QueryTrace | None:
+    return next((trace for trace in recent_traces if trace.id == trace_id), None)
@@ -0,0 +1,51 @@
+import asyncio
+import weakref
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+
+# Один пул з'єднань на цикл подій (тобто на воркер): його використовують і кеш користувачів,
+# і обмежувач частоти запитів. З'єднання asyncio не можна переносити між циклами подій.
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.ConnectionPool]" = weakref.WeakKeyDictionary()
+
+
+def get_pool() -> redis.ConnectionPool:
+    """
+    Returns the Redis connection pool of the running event loop, creating it on first use.
+
+    :return: Connection pool.
+    :rtype: redis.ConnectionPool
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = redis.ConnectionPool(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=0,
+            max_connections=settings.redis_max_connections,
+        )
+    return pool
+
+
+def get_redis() -> redis.Redis:
+    """
+    Returns an asyncio Redis client backed by the shared connection pool.
+
+    Clients are cheap: they only borrow connections from the pool for the
+    duration of a command.
+
+    :return: Redis client.
+    :rtype: redis.Redis
+    """
+    return redis.Redis(connection_pool=get_pool())
+
+
+async def close_redis() -> None:
+    """
+    Closes all connections of the shared pool of the running event loop.
+    """
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.disconnect()
@@ -1,11 +1,40 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, or_
+from sqlalchemy import select, insert, update, delete, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.engine import Result
 from datetime import date, timedelta
-from typing import List
+from typing import List, Sequence
+
+from src.conf.config import settings
+from src.database.db import commit_or_flush, after_commit
+from src.database.models import Contact, birthday_day_of_year
+from src.schemas import ContactCreate, ContactUpdate, ContactFilter
+from src.repository.pagination import encode_cursor, decode_cursor
+from src.repository.search import get_search_backend, after_keyset
+from src.services.cache import bump_contacts_version, get_contacts_version
+from src.services.suggest import Suggestion, SuggestIndex, suggest_cache
+
+SUGGEST_FIELDS = {"first_name", "last_name", "email"}
+
+
+async def _contacts_changed(
+    owner_id: int, changed: Sequence[Contact] = (), removed: Sequence[int] = (), reset: bool = False
+) -> None:
+    # Нова версія робить застарілими ETag-и; індекс підказок цього воркера оновлюємо на місці
+    version = await bump_contacts_version(owner_id)
+    suggest_cache.apply(owner_id, version, [Suggestion.from_contact(c) for c in changed], removed, reset)
+
+
+def _projection(fields: Sequence[str] | None) -> tuple:
+    # Без fields вантажимо ORM-сутності; інакше лише потрібні колонки (id потрібен завжди — для курсора)
+    if fields is None:
+        return (Contact,)
+    return (Contact.id, *(getattr(Contact, name) for name in fields if name != "id"))
+
+
+def _rows(result: Result, fields: Sequence[str] | None) -> list:
+    return result.scalars().all() if fields is None else result.all()
 
-from src.database.models import Contact
-from src.schemas import ContactCreate, ContactUpdate
 
 async def get_contact(db: AsyncSession, contact_id: int, owner_id: int) -> Contact | None:
     """
@@ -32,7 +61,9 @@ async def get_contact(db: AsyncSession, contact_id: int, owner_id: int) -> Conta
     #     Contact.owner_id == owner_id
     # ).first()
 
-async def get_contacts(db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100) -> List[Contact]:
+async def get_contacts(
+    db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100, fields: Sequence[str] | None = None
+) -> List[Contact]:
     """
     Retrieves a list of contacts for a specific owner_id with specified pagination parameters.
 
@@ -44,20 +75,58 @@ async def get_contacts(db: AsyncSession, owner_id: int, skip: int = 0, limit: in
     :type skip: int
     :param limit: The maximum number of contacts to return.
     :type limit: int
-    :return: A list of contacts.
+    :param fields: Names of the columns to select; the id is always included. All by default.
+    :type fields: Sequence[str] | None
+    :return: A list of contacts, or rows with the selected columns if fields are given.
     :rtype: List[ContactModel]
     """
-    req = select(Contact).where(
+    req = select(*_projection(fields)).where(
         Contact.owner_id == owner_id
-    ).offset(skip).limit(limit)
+    ).order_by(Contact.id).offset(skip).limit(limit)
     result: Result = await db.execute(req)
-    return result.scalars().all()
+    return _rows(result, fields)
 
     # return db.query(Contact).filter(
     #     Contact.owner_id == owner_id
     # ).offset(skip).limit(limit).all()
 
 
+async def get_contacts_page(
+    db: AsyncSession, owner_id: int, limit: int = 100, cursor: str | None = None,
+    fields: Sequence[str] | None = None
+) -> tuple[list[Contact], str | None]:
+    """
+    Retrieves a page of contacts for a specific owner_id ordered by id, starting after the cursor.
+
+    Unlike offset paging, the cost of a page does not grow with its depth: the
+    (owner_id, id) index is used to seek directly to the first row of the page.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :param cursor: The cursor returned with the previous page, or None for the first page.
+    :type cursor: str | None
+    :param fields: Names of the columns to select; the id is always included. All by default.
+    :type fields: Sequence[str] | None
+    :raises ValueError: If the cursor is malformed.
+    :return: A list of contacts (or rows with the selected columns) and the cursor of the next page, or None on the last page.
+    :rtype: tuple[List[Contact], str | None]
+    """
+    req = select(*_projection(fields)).where(Contact.owner_id == owner_id)
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, 1)
+        req = req.where(Contact.id > last_id)
+    req = req.order_by(Contact.id).limit(limit + 1)
+
+    result: Result = await db.execute(req)
+    contacts = _rows(result, fields)
+    next_cursor = encode_cursor(contacts[limit - 1].id) if len(contacts) > limit else None
+    return contacts[:limit], next_cursor
+
+
 async def create_contact(db: AsyncSession, contact: ContactCreate, owner_id: int) -> Contact:
     """
     Creates a new contact for a specific owner_id.
@@ -73,15 +142,52 @@ async def create_contact(db: AsyncSession, contact: ContactCreate, owner_id: int
     """
     db_contact = Contact(**contact.dict(), owner_id=owner_id)
     db.add(db_contact)
-    await db.commit()
-    await db.refresh(db_contact)
+    await commit_or_flush(db)
+    await after_commit(db, lambda: _contacts_changed(owner_id, changed=[db_contact]))
     return db_contact
 
 
 
+async def bulk_create_contacts(db: AsyncSession, contacts: List[ContactCreate], owner_id: int) -> set[str]:
+    """
+    Creates many contacts for a specific owner_id with one multi-row INSERT.
+
+    Contacts whose email already exists are skipped (ON CONFLICT DO NOTHING on
+    PostgreSQL and SQLite).
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param contacts: The data for the contacts to create.
+    :type contacts: List[ContactCreate]
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :return: Emails of the created contacts.
+    :rtype: set[str]
+    """
+    if not contacts:
+        return set()
+    rows = [
+        {**contact.dict(), "birthday_doy": birthday_day_of_year(contact.birthday), "owner_id": owner_id}
+        for contact in contacts
+    ]
+    bind = getattr(db, "bind", None)
+    dialect = bind.dialect.name if bind is not None else None
+    if dialect == "postgresql":
+        req = postgresql.insert(Contact).on_conflict_do_nothing(index_elements=[Contact.email])
+    elif dialect == "sqlite":
+        req = sqlite.insert(Contact).on_conflict_do_nothing(index_elements=[Contact.email])
+    else:
+        req = insert(Contact)
+    result: Result = await db.execute(req.values(rows).returning(Contact.email))
+    created = set(result.scalars().all())
+    await commit_or_flush(db)
+    await after_commit(db, lambda: _contacts_changed(owner_id, reset=True))
+    return created
+
+
 async def update_contact(db: AsyncSession, contact_id: int, contact: ContactUpdate, owner_id: int) -> Contact | None:
     """
-    Updates a contact for a specific owner_id.
+    Updates a contact for a specific owner_id with a single UPDATE ... RETURNING.
 
     :param db: The database session.
     :type db: AsyncSession
@@ -94,21 +200,29 @@ async def update_contact(db: AsyncSession, contact_id: int, contact: ContactUpda
     :return: Updated contact or  or None if it does not exist.
     :rtype: Contact|None
     """
-    db_contact = await get_contact(db, contact_id=contact_id, owner_id=owner_id)
+    values = contact.dict(exclude_unset=True)
+    if not values:
+        return await get_contact(db, contact_id=contact_id, owner_id=owner_id)
+    if "birthday" in values:
+        values["birthday_doy"] = birthday_day_of_year(values["birthday"])
+
+    req = update(Contact).where(
+        Contact.id == contact_id,
+        Contact.owner_id == owner_id
+    ).values(**values).returning(Contact)
+    result: Result = await db.execute(req)
+    db_contact = result.scalar_one_or_none()
     if not db_contact:
         return None
-    
-    for key, value in contact.dict(exclude_unset=True).items():
-        setattr(db_contact, key, value)
-    
-    await db.commit()
-    await db.refresh(db_contact)
+
+    await commit_or_flush(db)
+    await after_commit(db, lambda: _contacts_changed(owner_id, changed=[db_contact]))
     return db_contact
 
 
 async def delete_contact(db: AsyncSession, contact_id: int, owner_id: int) -> Contact | None:
     """
-    Removes a single contact for a specific owner_id.
+    Removes a single contact for a specific owner_id with a single DELETE ... RETURNING.
 
     :param db: The database session.
     :type db: AsyncSession
@@ -119,18 +233,130 @@ async def delete_contact(db: AsyncSession, contact_id: int, owner_id: int) -> Co
     :return: Deleted contact or  or None if it does not exist.
     :rtype: Contact|None
     """    
-    db_contact = await get_contact(db, contact_id=contact_id, owner_id=owner_id)
+    req = delete(Contact).where(
+        Contact.id == contact_id,
+        Contact.owner_id == owner_id
+    ).returning(Contact)
+    result: Result = await db.execute(req)
+    db_contact = result.scalar_one_or_none()
     if not db_contact:
         return None
-    
-    await db.delete(db_contact)
-    await db.commit()
+
+    await commit_or_flush(db)
+    await after_commit(db, lambda: _contacts_changed(owner_id, removed=[contact_id]))
     return db_contact
 
 
-async def search_contacts(db: AsyncSession, query: str, owner_id: int) -> list[Contact]:
+def _selection(owner_id: int, ids: List[int] | None = None, filter: ContactFilter | None = None) -> list:
+    conditions = [Contact.owner_id == owner_id]
+    if ids is not None:
+        conditions.append(Contact.id.in_(ids))
+    if filter is not None:
+        if filter.query:
+            conditions.append(or_(
+                Contact.first_name.ilike(f"%{filter.query}%"),
+                Contact.last_name.ilike(f"%{filter.query}%"),
+                Contact.email.ilike(f"%{filter.query}%"),
+            ))
+        for name in ("first_name", "last_name", "email"):
+            value = getattr(filter, name)
+            if value is not None:
+                conditions.append(getattr(Contact, name) == value)
+        if filter.birthday_from is not None:
+            conditions.append(Contact.birthday >= filter.birthday_from)
+        if filter.birthday_to is not None:
+            conditions.append(Contact.birthday <= filter.birthday_to)
+    return conditions
+
+
+async def update_contacts(
+    db: AsyncSession, owner_id: int, contact: ContactUpdate,
+    ids: List[int] | None = None, filter: ContactFilter | None = None
+) -> List[int]:
     """
-    Search a contact by query for a specific owner_id.
+    Updates the selected contacts of an owner with a single UPDATE ... RETURNING.
+
+    Contacts are selected either by ids or by a filter; ids of other owners are ignored.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :param contact: The values to set.
+    :type contact: ContactUpdate
+    :param ids: The IDs of the contacts to update.
+    :type ids: List[int] | None
+    :param filter: The conditions the contacts to update must match.
+    :type filter: ContactFilter | None
+    :return: IDs of the updated contacts.
+    :rtype: List[int]
+    """
+    values = contact.dict(exclude_unset=True)
+    if not values or ids == []:
+        return []
+    if "birthday" in values:
+        values["birthday_doy"] = birthday_day_of_year(values["birthday"])
+
+    req = (
+        update(Contact)
+        .where(*_selection(owner_id, ids, filter))
+        .values(**values)
+        .returning(Contact.id)
+        .execution_options(synchronize_session=False)
+    )
+    result: Result = await db.execute(req)
+    updated = sorted(result.scalars().all())
+    if updated:
+        await commit_or_flush(db)
+        await after_commit(db, lambda: _contacts_changed(owner_id, reset=bool(SUGGEST_FIELDS & values.keys())))
+    return updated
+
+
+async def delete_contacts(
+    db: AsyncSession, owner_id: int, ids: List[int] | None = None, filter: ContactFilter | None = None
+) -> List[int]:
+    """
+    Removes the selected contacts of an owner with a single DELETE ... RETURNING.
+
+    Contacts are selected either by ids or by a filter; ids of other owners are ignored.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :param ids: The IDs of the contacts to delete.
+    :type ids: List[int] | None
+    :param filter: The conditions the contacts to delete must match.
+    :type filter: ContactFilter | None
+    :return: IDs of the deleted contacts.
+    :rtype: List[int]
+    """
+    if ids == []:
+        return []
+    req = (
+        delete(Contact)
+        .where(*_selection(owner_id, ids, filter))
+        .returning(Contact.id)
+        .execution_options(synchronize_session=False)
+    )
+    result: Result = await db.execute(req)
+    deleted = sorted(result.scalars().all())
+    if deleted:
+        await commit_or_flush(db)
+        await after_commit(db, lambda: _contacts_changed(owner_id, removed=deleted))
+    return deleted
+
+
+async def search_contacts(
+    db: AsyncSession, query: str, owner_id: int, limit: int = 20, cursor: str | None = None,
+    fields: Sequence[str] | None = None
+) -> tuple[list[Contact], str | None]:
+    """
+    Search contacts by query for a specific owner_id, most relevant first.
+
+    Matching and ranking are done by the search backend of the database (see
+    src.repository.search). Pages are keyed by (score, id), or by offset for
+    backends whose scores change with other rows (FTS5 bm25).
 
     :param db: The database session.
     :type db: AsyncSession
@@ -138,48 +364,153 @@ async def search_contacts(db: AsyncSession, query: str, owner_id: int) -> list[C
     :type query: str
     :param owner_id: The owner_id to retrieve the contact for.
     :type owner_id: int
-    :return: A list of contacts that match the search query.
-    :rtype: List[Contact]
-    """    
-    req = select(Contact).where(
-        Contact.owner_id == owner_id, or_ (
-            Contact.first_name.ilike(f"%{query}%"),
-            Contact.last_name.ilike(f"%{query}%"),
-            Contact.email.ilike(f"%{query}%")
-        )
-    )
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :param cursor: The cursor returned with the previous page.
+    :type cursor: str | None
+    :param fields: Names of the columns to select; the id is always included. All by default.
+    :type fields: Sequence[str] | None
+    :raises ValueError: If the cursor is malformed.
+    :return: A page of contacts (or rows with the selected columns) that match the search query and the cursor of the next page.
+    :rtype: tuple[List[Contact], str | None]
+    """
+    backend = get_search_backend(db)
+    score = backend.score(query)
+    columns = _projection(fields)
+    req = backend.apply(select(*columns, score.label("score")).where(Contact.owner_id == owner_id), query)
+    offset = 0
+    if cursor is not None and backend.stable_score:
+        last_score, last_id = decode_cursor(cursor, 2)
+        req = req.where(after_keyset(score, last_score, last_id))
+    elif cursor is not None:
+        (offset,) = decode_cursor(cursor, 1)
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("Invalid cursor")
+        req = req.offset(offset)
+    req = req.order_by(score.desc(), Contact.id).limit(limit + 1)
+
     result: Result = await db.execute(req)
-    return result.scalars().all()
+    rows = result.all()
+    # З fields повертаються самі рядки: зайву колонку score серіалізація пропускає
+    contacts = [row[0] for row in rows] if fields is None else rows
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = (
+            encode_cursor(rows[limit - 1][-1], contacts[limit - 1].id) if backend.stable_score
+            else encode_cursor(offset + limit)
+        )
+    return contacts[:limit], next_cursor
 
 
-async def get_upcoming_birthdays(db: AsyncSession, owner_id: int) -> list[Contact]:
+async def get_upcoming_birthdays(db: AsyncSession, owner_id: int, days: int = 7) -> list[Contact]:
     """
-    Retrieves a list of contacts with upcoming birthdays within the next week for a specific owner_id.
+    Retrieves a list of contacts with birthdays within the next days for a specific owner_id.
+
+    The filtering is done in the database as a range over the stored day of year,
+    which is served by the (owner_id, birthday_doy) index. A window that crosses
+    the end of the year is split into two ranges.
 
     :param db: The database session.
     :type db: AsyncSession
     :param owner_id: The ID of the owner of the contacts.
     :type owner_id: int
+    :param days: The size of the window in days, starting today.
+    :type days: int
     :return: A list of contacts with upcoming birthdays.
     :rtype: List[Contact]
     """
     today = date.today()
-    next_week = today + timedelta(days=7)
-    
-    req = select(Contact).where(Contact.owner_id == owner_id)
+    req = select(Contact).where(Contact.owner_id == owner_id, Contact.birthday_doy.is_not(None))
+
+    if days < 365:
+        start = birthday_day_of_year(today)
+        end = birthday_day_of_year(today + timedelta(days=days))
+        if start <= end:
+            req = req.where(Contact.birthday_doy.between(start, end))
+        else:
+            req = req.where(or_(Contact.birthday_doy >= start, Contact.birthday_doy <= end))
+
     result: Result = await db.execute(req)
-    contacts = result.scalars().all()
-
-    upcoming_contacts = []
-    
-    for contact in contacts:
-        if contact.birthday:
-            bday_this_year = contact.birthday.replace(year=today.year)
-            
-            if bday_this_year < today:
-                bday_this_year = bday_this_year.replace(year=today.year + 1)
-            
-            if today <= bday_this_year <= next_week:
-                upcoming_contacts.append(contact)
-    
-    return upcoming_contacts
+    return result.scalars().all()
+
+
+def _prefix_pattern(prefix: str) -> str:
+    escaped = prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+async def find_contacts_by_prefix(db: AsyncSession, owner_id: int, prefix: str, limit: int = 10) -> list[Suggestion]:
+    """
+    Finds contacts whose first name, last name or email starts with the prefix.
+
+    On PostgreSQL each condition is served by an (owner_id, lower(column)
+    text_pattern_ops) index.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :param prefix: The prefix, case-insensitive.
+    :type prefix: str
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :return: Matching contacts ordered by first name, last name and id.
+    :rtype: list[Suggestion]
+    """
+    pattern = _prefix_pattern(prefix)
+    req = select(Contact.id, Contact.first_name, Contact.last_name, Contact.email).where(
+        Contact.owner_id == owner_id,
+        or_(*(func.lower(getattr(Contact, name)).like(pattern, escape="\\")
+              for name in ("first_name", "last_name", "email"))),
+    ).order_by(func.lower(Contact.first_name), func.lower(Contact.last_name), Contact.id).limit(limit)
+    result: Result = await db.execute(req)
+    return [Suggestion(*row) for row in result.all()]
+
+
+async def suggest_contacts(db: AsyncSession, owner_id: int, prefix: str, limit: int = 10) -> list[Suggestion]:
+    """
+    Suggests contacts for a typed prefix, from the worker's suggest index when possible.
+
+    The index of an owner is built on the first request and used while the
+    version of the owner's contacts does not change (writes of this worker are
+    applied to it in place). Without Redis, or for owners with more than
+    settings.suggest_cache_max_contacts contacts, the database is queried; the
+    latter is found with an id-only count and remembered until the next write.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :param prefix: The prefix, case-insensitive.
+    :type prefix: str
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :return: Matching contacts ordered by first name, last name and id.
+    :rtype: list[Suggestion]
+    """
+    version = await get_contacts_version(owner_id) if settings.suggest_cache_size else None
+    if version is None:
+        return await find_contacts_by_prefix(db, owner_id, prefix, limit)
+
+    index = suggest_cache.get(owner_id, version)
+    if index is None:
+        if suggest_cache.is_too_large(owner_id, version):
+            return await find_contacts_by_prefix(db, owner_id, prefix, limit)
+        # Спершу лише рахуємо id (за індексом owner_id), щоб не вантажити рядки великих власників
+        probe = select(Contact.id).where(Contact.owner_id == owner_id).limit(settings.suggest_cache_max_contacts + 1)
+        count = (await db.execute(select(func.count()).select_from(probe.subquery()))).scalar_one()
+        if count > settings.suggest_cache_max_contacts:
+            suggest_cache.mark_too_large(owner_id, version)
+            return await find_contacts_by_prefix(db, owner_id, prefix, limit)
+        req = select(Contact.id, Contact.first_name, Contact.last_name, Contact.email).where(
+            Contact.owner_id == owner_id
+        ).limit(settings.suggest_cache_max_contacts + 1)
+        result: Result = await db.execute(req)
+        rows = result.all()
+        if len(rows) > settings.suggest_cache_max_contacts:
+            # Контакти додали між підрахунком і читанням
+            suggest_cache.mark_too_large(owner_id, version)
+            return await find_contacts_by_prefix(db, owner_id, prefix, limit)
+        index = SuggestIndex(version, (Suggestion(*row) for row in rows))
+        suggest_cache.put(owner_id, index)
+    return index.lookup(prefix, limit)
@@ -0,0 +1,36 @@
+import base64
+import json
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the keyset values of the last returned row into an opaque cursor.
+
+    :param values: JSON serializable values the next page starts after.
+    :return: URL safe cursor string.
+    :rtype: str
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    :param cursor: The cursor received from the client.
+    :type cursor: str
+    :param size: The expected number of keyset values.
+    :type size: int
+    :raises ValueError: If the cursor is malformed.
+    :return: The keyset values.
+    :rtype: list
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
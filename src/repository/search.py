@@ -0,0 +1,154 @@
+import re
+
+from sqlalchemy import Float, Select, and_, column, false, func, literal, literal_column, or_, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from src.conf.config import settings
+from src.database.models import Contact, CONTACTS_FTS_TABLE
+
+
+class SearchBackend:
+    """
+    Builds the contact search query for one kind of database.
+
+    A backend adds its match predicate to a select over contacts and provides a
+    relevance score; higher scores are better. Results are paged by keyset on
+    (score, id) when the score of a row depends on that row only
+    (stable_score), otherwise by offset.
+    """
+
+    name = "like"
+    stable_score = True
+
+    def score(self, query: str) -> ColumnElement:
+        """
+        Returns the relevance expression for the query.
+
+        :param query: The search query.
+        :type query: str
+        :return: SQL expression of the relevance score.
+        :rtype: ColumnElement
+        """
+        return literal(0.0, Float)
+
+    def apply(self, req: Select, query: str) -> Select:
+        """
+        Adds the match predicate for the query to the statement.
+
+        :param req: Select statement over contacts.
+        :type req: Select
+        :param query: The search query.
+        :type query: str
+        :return: The filtered statement.
+        :rtype: Select
+        """
+        return req.where(
+            or_(
+                Contact.first_name.ilike(f"%{query}%"),
+                Contact.last_name.ilike(f"%{query}%"),
+                Contact.email.ilike(f"%{query}%"),
+            )
+        )
+
+
+class TrigramSearch(SearchBackend):
+    """
+    PostgreSQL search with pg_trgm: ILIKE predicates are served by the GIN trigram
+    indexes and rows are ranked by trigram similarity.
+    """
+
+    name = "trigram"
+
+    def score(self, query: str) -> ColumnElement:
+        return func.greatest(
+            func.similarity(Contact.first_name, query),
+            func.similarity(Contact.last_name, query),
+            func.similarity(Contact.email, query),
+        )
+
+
+class Fts5Search(SearchBackend):
+    """
+    SQLite search over the contacts_fts FTS5 table, ranked by bm25.
+
+    Every word of the query is matched as a prefix of a token. bm25 depends on
+    statistics of the whole table, which change with every write, so the score
+    of a row is no keyset: results are paged by offset instead. A write between
+    two requests may still reorder the results, and then a row can be repeated
+    or skipped across pages.
+    """
+
+    name = "fts5"
+    stable_score = False
+    fts_table = table(CONTACTS_FTS_TABLE, column("rowid"))
+    fts = literal_column(CONTACTS_FTS_TABLE)
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        """
+        Converts free text into an FTS5 query of quoted prefix terms.
+
+        :param query: The search query.
+        :type query: str
+        :return: FTS5 match expression, empty if the query has no words.
+        :rtype: str
+        """
+        return " ".join(f'"{word}"*' for word in re.findall(r"\w+", query.lower()))
+
+    def score(self, query: str) -> ColumnElement:
+        return -func.bm25(self.fts)
+
+    def apply(self, req: Select, query: str) -> Select:
+        expression = self.match_expression(query)
+        if not expression:
+            return req.where(false())
+        return req.join(self.fts_table, self.fts_table.c.rowid == Contact.id).where(
+            self.fts.op("MATCH")(expression)
+        )
+
+
+SEARCH_BACKENDS = {
+    "like": SearchBackend,
+    "trigram": TrigramSearch,
+    "fts5": Fts5Search,
+}
+
+DIALECT_BACKENDS = {
+    "postgresql": "trigram",
+    "sqlite": "fts5",
+}
+
+
+def get_search_backend(db: AsyncSession) -> SearchBackend:
+    """
+    Selects the search backend from settings, or from the session's database dialect
+    when settings.search_backend is "auto".
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The search backend.
+    :rtype: SearchBackend
+    """
+    name = settings.search_backend
+    if name == "auto":
+        bind = getattr(db, "bind", None)
+        dialect = bind.dialect.name if bind is not None else None
+        name = DIALECT_BACKENDS.get(dialect, "like")
+    return SEARCH_BACKENDS[name]()
+
+
+def after_keyset(score: ColumnElement, last_score: float, last_id: int) -> ColumnElement:
+    """
+    Returns the keyset predicate for rows ordered by (score desc, id asc).
+
+    :param score: The relevance expression.
+    :type score: ColumnElement
+    :param last_score: Score of the last row of the previous page.
+    :type last_score: float
+    :param last_id: ID of the last row of the previous page.
+    :type last_id: int
+    :return: SQL predicate selecting rows after the previous page.
+    :rtype: ColumnElement
+    """
+    return or_(score < last_score, and_(score == last_score, Contact.id > last_id))
@@ -3,8 +3,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from sqlalchemy.engine import Result
 
+from src.database.db import commit_or_flush, after_commit
 from src.database.models import User
 from src.schemas import UserModel
+from src.services.cache import invalidate_user
 
 
 async def get_user_by_email(email: str, db: AsyncSession) -> User | None:
@@ -44,8 +46,7 @@ async def create_user(body: UserModel, db: AsyncSession) -> User:
     
     new_user = User(**body.dict(), avatar=avatar)
     db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    await commit_or_flush(db)
     return new_user
 
 
@@ -61,7 +62,23 @@ async def update_token(user: User, token: str | None, db: AsyncSession) -> None:
     :type db: AsyncSession
     """
     user.refresh_token = token
-    await db.commit()
+    await commit_or_flush(db)
+    await after_commit(db, lambda: invalidate_user(user.email))
+
+
+async def update_password(user: User, password: str, db: AsyncSession) -> None:
+    """
+    Replaces the user's password hash in the database.
+
+    :param user: The user to update.
+    :type user: User
+    :param password: The new password hash.
+    :type password: str
+    :param db: The database session.
+    :type db: AsyncSession
+    """
+    user.password = password
+    await commit_or_flush(db)
 
 
 async def confirmed_email(email: str, db: AsyncSession) -> None:
@@ -75,7 +92,8 @@ async def confirmed_email(email: str, db: AsyncSession) -> None:
     """
     stmt = update(User).where(User.email == email).values(confirmed=True)
     await db.execute(stmt)
-    await db.commit()
+    await commit_or_flush(db)
+    await after_commit(db, lambda: invalidate_user(email))
 
 
 async def update_avatar(email: str, url: str, db: AsyncSession) -> User:
@@ -91,11 +109,10 @@ async def update_avatar(email: str, url: str, db: AsyncSession) -> User:
     :return: The user with the updated avatar.
     :rtype: User
     """
-    stmt = select(User).where(User.email == email)
+    stmt = update(User).where(User.email == email).values(avatar=url).returning(User)
     result: Result = await db.execute(stmt)
     user = result.scalar_one()
-    
-    user.avatar = url
-    await db.commit()
-    await db.refresh(user)
+
+    await commit_or_flush(db)
+    await after_commit(db, lambda: invalidate_user(email))
     return user
\ No newline at end of file
@@ -19,13 +19,15 @@ from src.schemas import UserModel, UserResponse, TokenModel, RequestEmail
 from src.repository import users as repository_users
 from src.services.auth import auth_service
 from src.services.email import send_email
+from src.services.rate_limit import login_rate_limit, request_email_rate_limit, signup_rate_limit
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 security = HTTPBearer()
 
 
 @router.post(
-    "/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED
+    "/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(signup_rate_limit)],
 )
 async def signup(
     body: UserModel,
@@ -53,7 +55,7 @@ async def signup(
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Account already exists"
         )
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.hash_password(body.password)
     new_user = await repository_users.create_user(body, db)
     background_tasks.add_task(
         send_email, new_user.email, new_user.username, request.base_url
@@ -64,7 +66,7 @@ async def signup(
     }
 
 
-@router.post("/login", response_model=TokenModel)
+@router.post("/login", response_model=TokenModel, dependencies=[Depends(login_rate_limit)])
 async def login(
     body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ) -> TokenModel:
@@ -88,10 +90,14 @@ async def login(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed"
         )
-    if not auth_service.verify_password(body.password, user.password):
+    valid, new_hash = await auth_service.verify_and_update_password(body.password, user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password"
         )
+    if new_hash:
+        # Хеш зроблено зі старою вартістю bcrypt: замінюємо, поки маємо пароль
+        await repository_users.update_password(user, new_hash, db)
     # Generate JWT
     access_token = await auth_service.create_access_token(data={"sub": user.email})
     refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
@@ -163,7 +169,7 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)) -> dict:
     return {"message": "Email confirmed"}
 
 
-@router.post("/request_email")
+@router.post("/request_email", dependencies=[Depends(request_email_rate_limit)])
 async def request_email(
     body: RequestEmail,
     background_tasks: BackgroundTasks,
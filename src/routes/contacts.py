@@ -1,28 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
+from src.conf.config import settings
 from src.database.db import get_db
-from src.schemas import Contact, ContactCreate, ContactUpdate
-from src.database.models import User
+from src.schemas import (
+    Contact, ContactCreate, ContactUpdate, ContactSelection, ContactBatchUpdate, ContactBatchResult, ContactSuggestion,
+    Principal
+)
 from src.services.auth import auth_service
+from src.services.fast_json import contacts_response, CONTACT_FIELDS, FastJSONResponse
+from src.services.etag import contacts_etag, birthdays_etag
+from src.services.rate_limit import contacts_write_rate_limit
+from src.services.contacts_export import accepts_gzip, export_contacts, EXPORT_MEDIA_TYPES
+from src.services.contacts_import import stream_import_report, ImportReportResponse, IMPORT_FORMATS
 from src.repository.contacts import (
     get_contact,
     get_contacts,
+    get_contacts_page,
     create_contact,
     update_contact,
     delete_contact,
+    update_contacts,
+    delete_contacts,
     search_contacts,
+    suggest_contacts,
     get_upcoming_birthdays
 )
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
-@router.post("/", response_model=Contact, status_code=status.HTTP_201_CREATED)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def contact_fields(
+    fields: Optional[str] = Query(None, description="Comma separated contact fields to return; id is always included")
+) -> Optional[List[str]]:
+    """
+    Parses the sparse fieldset of a contact list request.
+
+    :param fields: Comma separated field names.
+    :type fields: str | None
+    :raises HTTPException: If a field name is unknown.
+    :return: The id and the requested fields in schema order, or None for all fields.
+    :rtype: List[str] | None
+    """
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - set(CONTACT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return ["id", *(name for name in CONTACT_FIELDS if name in names and name != "id")]
+
+
+def _contacts_result(contacts: List, response: Response, fields: Optional[List[str]] = None):
+    # Швидкий шлях: довірені ORM-об'єкти не проходять повторну валідацію response_model.
+    # Вибрані колонки під схему Contact не підходять, тож для них він обов'язковий
+    if fields is not None:
+        return contacts_response(contacts, response, fields)
+    if settings.fast_json_responses:
+        return contacts_response(contacts, response)
+    return contacts
+
+
+@router.post(
+    "/", response_model=Contact, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(contacts_write_rate_limit)],
+)
 async def create_new_contact(
     contact: ContactCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: Principal = Depends(auth_service.get_current_user)
 ) -> Contact:
     """
     Create a new contact for the current user.
@@ -32,50 +83,171 @@ async def create_new_contact(
     :param db: The database session.
     :type db: Session
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
     :return: The newly created contact.
     :rtype: Contact
     """
     return await create_contact(db=db, contact=contact, owner_id=current_user.id)
 
-@router.get("/", response_model=List[Contact])
+@router.post("/import", dependencies=[Depends(contacts_write_rate_limit)])
+async def import_contacts_file(
+    request: Request,
+    format: str = Query("csv", pattern=f"^({'|'.join(IMPORT_FORMATS)})$"),
+    current_user: Principal = Depends(auth_service.get_current_user)
+) -> ImportReportResponse:
+    """
+    Import contacts for the current user from a CSV or JSON Lines request body.
+
+    The body is parsed while it is received and inserted in batches. CSV files
+    need a header row with the contact field names. The response is a JSON Lines
+    report streamed while the import runs: one line per rejected row (invalid,
+    duplicate email, or failed with its batch in the database), a progress line
+    per batch and a summary line.
+
+    :param request: The HTTP request with the file as the body.
+    :type request: Request
+    :param format: The file format, csv or jsonl.
+    :type format: str
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: The import report.
+    :rtype: ImportReportResponse
+    """
+    return ImportReportResponse(stream_import_report(request.stream(), format, owner_id=current_user.id))
+
+@router.get("/export")
+async def export_contacts_file(
+    request: Request,
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_MEDIA_TYPES)})$"),
+    current_user: Principal = Depends(auth_service.get_current_user)
+) -> StreamingResponse:
+    """
+    Export all contacts of the current user as CSV, JSON Lines or vCard.
+
+    The file is streamed while the contacts are read from the database. If the
+    client accepts gzip, the file is compressed on the fly.
+
+    :param request: The HTTP request.
+    :type request: Request
+    :param format: The file format, csv, jsonl or vcard.
+    :type format: str
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: The exported file.
+    :rtype: StreamingResponse
+    """
+    compress = accepts_gzip(request.headers.get("accept-encoding", ""))
+    extension = "vcf" if format == "vcard" else format
+    headers = {"Content-Disposition": f'attachment; filename="contacts.{extension}"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_contacts(current_user.id, format, compress=compress),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers,
+    )
+
+@router.get("/suggest", response_model=List[ContactSuggestion])
+async def suggest_contacts_by_prefix(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(auth_service.get_current_user)
+) -> List[ContactSuggestion]:
+    """
+    Suggest contacts of the current user as the user types.
+
+    Returns contacts whose first name, last name or email starts with the prefix
+    (case-insensitive), ordered by name. Meant to be called on every keystroke:
+    the lookup is served from an in-memory index of the user's contacts when
+    possible and by prefix indexes otherwise.
+
+    :param prefix: The typed prefix.
+    :type prefix: str
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :param db: The database session.
+    :type db: Session
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: The suggested contacts.
+    :rtype: List[ContactSuggestion]
+    """
+    suggestions = await suggest_contacts(db, owner_id=current_user.id, prefix=prefix, limit=limit)
+    return FastJSONResponse([suggestion._asdict() for suggestion in suggestions])
+
+@router.get("/", response_model=List[Contact], dependencies=[Depends(contacts_etag)])
 async def read_all_contacts(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(contact_fields),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: Principal = Depends(auth_service.get_current_user)
 ) -> List[Contact]:
     """
-    Retrieve a list of contacts for the current user.
+    Retrieve a list of contacts for the current user, ordered by id.
 
+    The response carries an ETag; a request with a matching If-None-Match gets
+    304 Not Modified without a database query.
+
+    Without skip the contacts are paged by cursor: if there are more contacts, the
+    cursor of the next page is returned in the X-Next-Cursor response header.
+    A non-zero skip selects the legacy offset paging.
+
+    With fields only the id and the given fields of every contact are selected
+    and returned.
+
+    :param response: The response object, used to set the next page cursor.
+    :type response: Response
     :param skip: The number of contacts to skip.
     :type skip: int
     :param limit: The maximum number of contacts to return.
     :type limit: int
+    :param cursor: The cursor of the page to return.
+    :type cursor: str | None
+    :param fields: The fields to return, all by default.
+    :type fields: List[str] | None
     :param db: The database session.
     :type db: Session
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
+    :raises HTTPException: If the cursor is invalid.
     :return: A list of contacts for the current user.
     :rtype: List[Contact]
     """
-    return await get_contacts(db, owner_id=current_user.id, skip=skip, limit=limit)
+    if skip and cursor is None:
+        contacts = await get_contacts(db, owner_id=current_user.id, skip=skip, limit=limit, fields=fields)
+        return _contacts_result(contacts, response, fields)
+    try:
+        contacts, next_cursor = await get_contacts_page(
+            db, owner_id=current_user.id, limit=limit, cursor=cursor, fields=fields
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return _contacts_result(contacts, response, fields)
 
-@router.get("/{contact_id}", response_model=Contact)
+@router.get("/{contact_id}", response_model=Contact, dependencies=[Depends(contacts_etag)])
 async def read_single_contact(
     contact_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: Principal = Depends(auth_service.get_current_user)
 ) -> Contact:
     """
     Retrieve a single contact by its ID for the current user.
 
+    The response carries an ETag; a request with a matching If-None-Match gets
+    304 Not Modified without a database query.
+
     :param contact_id: The ID of the contact to retrieve.
     :type contact_id: int
     :param db: The database session.
     :type db: Session
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
     :return: The contact with the specified ID.
     :rtype: Contact
     """
@@ -84,12 +256,12 @@ async def read_single_contact(
         raise HTTPException(status_code=404, detail="Contact not found")
     return db_contact
 
-@router.put("/{contact_id}", response_model=Contact)
+@router.put("/{contact_id}", response_model=Contact, dependencies=[Depends(contacts_write_rate_limit)])
 async def update_existing_contact(
     contact_id: int,
     contact: ContactUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: Principal = Depends(auth_service.get_current_user)
 ) -> Contact:
     """
     Update an existing contact for the current user.
@@ -101,7 +273,7 @@ async def update_existing_contact(
     :param db: The database session.
     :type db: Session
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
     :return: The updated contact.
     :rtype: Contact
     """
@@ -110,11 +282,11 @@ async def update_existing_contact(
         raise HTTPException(status_code=404, detail="Contact not found")
     return db_contact
 
-@router.delete("/{contact_id}", response_model=Contact)
+@router.delete("/{contact_id}", response_model=Contact, dependencies=[Depends(contacts_write_rate_limit)])
 async def delete_existing_contact(
     contact_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: Principal = Depends(auth_service.get_current_user)
 ) -> Contact:
     """
     Delete a contact by its ID for the current user.
@@ -124,7 +296,7 @@ async def delete_existing_contact(
     :param db: The database session.
     :type db: Session
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
     :return: The deleted contact.
     :rtype: Contact
     """
@@ -133,39 +305,122 @@ async def delete_existing_contact(
         raise HTTPException(status_code=404, detail="Contact not found")
     return db_contact
 
+@router.patch("/batch", response_model=ContactBatchResult, dependencies=[Depends(contacts_write_rate_limit)])
+async def update_contacts_batch(
+    body: ContactBatchUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(auth_service.get_current_user)
+) -> ContactBatchResult:
+    """
+    Update many contacts of the current user at once.
+
+    The contacts are selected by a list of ids or by a filter and updated with a
+    single statement. Ids that do not exist or belong to another user are skipped.
+
+    :param body: The selection and the values to set.
+    :type body: ContactBatchUpdate
+    :param db: The database session.
+    :type db: Session
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: The ids of the updated contacts.
+    :rtype: ContactBatchResult
+    """
+    ids = await update_contacts(db, owner_id=current_user.id, contact=body.values, ids=body.ids, filter=body.filter)
+    return ContactBatchResult(ids=ids, count=len(ids))
+
+@router.post("/batch/delete", response_model=ContactBatchResult, dependencies=[Depends(contacts_write_rate_limit)])
+async def delete_contacts_batch(
+    body: ContactSelection,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(auth_service.get_current_user)
+) -> ContactBatchResult:
+    """
+    Delete many contacts of the current user at once.
+
+    The contacts are selected by a list of ids or by a filter and deleted with a
+    single statement. Ids that do not exist or belong to another user are skipped.
+
+    :param body: The selection of contacts to delete.
+    :type body: ContactSelection
+    :param db: The database session.
+    :type db: Session
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: The ids of the deleted contacts.
+    :rtype: ContactBatchResult
+    """
+    ids = await delete_contacts(db, owner_id=current_user.id, ids=body.ids, filter=body.filter)
+    return ContactBatchResult(ids=ids, count=len(ids))
+
 @router.get("/search/", response_model=List[Contact])
 async def search_contacts_by_query(
+    response: Response,
     query: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(contact_fields),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: Principal = Depends(auth_service.get_current_user)
 ) -> List[Contact]:
     """ 
-    Search for contacts by a query string for the current user.
+    Search for contacts by a query string for the current user, most relevant first.
+
+    If there are more results, the cursor of the next page is returned in the
+    X-Next-Cursor response header. With fields only the id and the given fields
+    of every contact are returned.
 
+    :param response: The response object, used to set the next page cursor.
+    :type response: Response
     :param query: The search query string.
     :type query: str
+    :param limit: The maximum number of contacts to return.
+    :type limit: int
+    :param cursor: The cursor of the page to return.
+    :type cursor: str | None
+    :param fields: The fields to return, all by default.
+    :type fields: List[str] | None
     :param db: The database session.
     :type db: Session
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
+    :raises HTTPException: If the cursor is invalid.
     :return: A list of contacts matching the search query.
     :rtype: List[Contact]
     """
-    return await search_contacts(db, query=query, owner_id=current_user.id)
+    try:
+        contacts, next_cursor = await search_contacts(
+            db, query=query, owner_id=current_user.id, limit=limit, cursor=cursor, fields=fields
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return _contacts_result(contacts, response, fields)
 
-@router.get("/birthdays/", response_model=List[Contact])
+@router.get("/birthdays/", response_model=List[Contact], dependencies=[Depends(birthdays_etag)])
 async def get_contacts_with_upcoming_birthdays(
+    response: Response,
+    days: int = Query(7, ge=1, le=365),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: Principal = Depends(auth_service.get_current_user)
 ) -> List[Contact]:
     """
     Retrieve contacts with upcoming birthdays for the current user.
 
+    The response carries an ETag that changes with the contacts and the date;
+    a request with a matching If-None-Match gets 304 Not Modified.
+
+    :param response: The response object, carries the ETag.
+    :type response: Response
+    :param days: The number of days ahead to look for birthdays.
+    :type days: int
     :param db: The database session.
     :type db: Session
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
     :return: A list of contacts with upcoming birthdays.
     :rtype: List[Contact]
     """
-    return await get_upcoming_birthdays(db, owner_id=current_user.id)
\ No newline at end of file
+    contacts = await get_upcoming_birthdays(db, owner_id=current_user.id, days=days)
+    return _contacts_result(contacts, response)
\ No newline at end of file
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from src.database.profiling import find_trace, recent_traces
+from src.schemas import Principal
+from src.services.auth import auth_service
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/queries")
+async def read_recent_query_traces(current_user: Principal = Depends(auth_service.get_current_user)) -> list:
+    """
+    Retrieve a summary of the SQL traces of the latest requests the current user
+    made to this worker.
+
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: Trace ID, route, number and total time of statements per request, newest first.
+    :rtype: list
+    """
+    return [
+        {key: value for key, value in trace.to_dict().items() if key != "statements"}
+        for trace in reversed(recent_traces)
+        if trace.user_id == current_user.id
+    ]
+
+
+@router.get("/queries/{trace_id}")
+async def read_query_trace(trace_id: int, current_user: Principal = Depends(auth_service.get_current_user)) -> dict:
+    """
+    Retrieve the SQL statements of one request of the current user, as named by
+    its X-Query-Trace-Id header.
+
+    Parameters are reported by type only, never by value.
+
+    :param trace_id: The ID of the trace.
+    :type trace_id: int
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: The statements with their parameter types and durations.
+    :rtype: dict
+    :raises HTTPException: 404 if the trace is unknown, no longer kept or of another user's request.
+    """
+    trace = find_trace(trace_id)
+    if trace is None or trace.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found")
+    return trace.to_dict()
@@ -0,0 +1,149 @@
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Security, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.db import engine, pool_stats
+from src.services.auth import auth_service
+from src.services.cache import principal_cache
+from src.services.email_queue import get_email_queue
+from src.services.metrics import registry
+from src.services.rate_limit import rate_limiter
+from src.services.suggest import suggest_cache
+
+metrics_security = HTTPBearer(auto_error=False)
+
+
+async def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Security(metrics_security),
+) -> None:
+    """
+    Lets through only requests bearing settings.metrics_token. Without a
+    configured token the metrics are not served at all.
+
+    :param credentials: The bearer token of the request, if any.
+    :type credentials: HTTPAuthorizationCredentials | None
+    :raises HTTPException: 404 if no token is configured, 401 if the token is missing or wrong.
+    """
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.metrics_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+# Prometheus очікує /metrics у корені, без префікса /api
+exposition_router = APIRouter(tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/db")
+async def read_db_pool_stats() -> dict:
+    """
+    Retrieve the database connection pool statistics of this worker.
+
+    :return: Pool size, checked in/out and overflow connections and checkout timings.
+    :rtype: dict
+    """
+    return pool_stats(engine)
+
+
+@router.get("/email")
+async def read_email_queue_stats(request: Request) -> dict:
+    """
+    Retrieve the depth of the outbound mail queue and the counters of the sender
+    running in this worker, if any.
+
+    :param request: The HTTP request.
+    :type request: Request
+    :return: Ready, pending, delayed and dead jobs, and sent/retried/failed counters.
+    :rtype: dict
+    """
+    worker = getattr(request.app.state, "email_worker", None)
+    return {"queue": await get_email_queue().depth(), "worker": worker.stats if worker is not None else None}
+
+
+@exposition_router.get("/metrics", include_in_schema=False)
+async def read_metrics() -> Response:
+    """
+    Expose the metrics of this worker in the Prometheus text format.
+
+    :return: The metrics.
+    :rtype: Response
+    """
+    return Response(await registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@registry.collector
+async def collect_caches() -> list:
+    caches = {
+        "principal": principal_cache.stats(),
+        "token": auth_service.token_cache.stats(),
+        "suggest": suggest_cache.stats(),
+    }
+    ratios = []
+    for name, stats in caches.items():
+        lookups = stats["hits"] + stats["misses"]
+        if lookups:
+            ratios.append(("cache_hit_ratio", {"cache": name}, stats["hits"] / lookups))
+    return [
+        ("cache_hits_total", "counter", "Cache hits.",
+         [("cache_hits_total", {"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("cache_misses_total", "counter", "Cache misses.",
+         [("cache_misses_total", {"cache": name}, stats["misses"]) for name, stats in caches.items()]),
+        ("cache_entries", "gauge", "Entries held in the cache.",
+         [("cache_entries", {"cache": name}, stats["size"]) for name, stats in caches.items()]),
+        ("cache_hit_ratio", "gauge", "Share of lookups answered from the cache.", ratios),
+    ]
+
+
+@registry.collector
+async def collect_email_queue() -> list:
+    try:
+        depth = await get_email_queue().depth()
+    except RedisError:
+        # Без Redis глибина невідома: ряд просто відсутній
+        depth = {}
+    return [
+        ("email_queue_jobs", "gauge", "Jobs in the outbound mail queue by state.",
+         [("email_queue_jobs", {"state": state}, count) for state, count in depth.items()]),
+    ]
+
+
+@registry.collector
+async def collect_db_pool() -> list:
+    stats = pool_stats(engine)
+    families = [
+        (f"db_pool_{name}", "gauge", f"Connection pool {name}.", [(f"db_pool_{name}", {}, stats[name])])
+        for name in ("size", "checkedin", "checkedout", "overflow")
+        if name in stats
+    ]
+    if "checkouts" in stats:
+        families += [
+            ("db_pool_checkouts_total", "counter", "Connection checkouts.",
+             [("db_pool_checkouts_total", {}, stats["checkouts"])]),
+            ("db_pool_checkout_seconds_total", "counter", "Time spent checking out connections.",
+             [("db_pool_checkout_seconds_total", {}, stats["checkout_time_total"])]),
+            ("db_pool_checkout_seconds_max", "gauge", "Longest connection checkout.",
+             [("db_pool_checkout_seconds_max", {}, stats["checkout_time_max"])]),
+        ]
+    return families
+
+
+@registry.collector
+async def collect_limits() -> list:
+    return [
+        ("rate_limit_decisions_total", "counter", "Rate limiter decisions.",
+         [("rate_limit_decisions_total", {"decision": name}, count) for name, count in rate_limiter.stats.items()]),
+        ("password_hash_tasks", "gauge", "Password hashing operations running or queued.",
+         [("password_hash_tasks", {}, auth_service._password_tasks)]),
+    ]
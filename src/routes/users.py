@@ -1,61 +1,71 @@
-from fastapi import APIRouter, Depends, status, UploadFile, File
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
-
-from src.database.db import get_db
-from src.database.models import User
-from src.repository import users as repository_users
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File
+
 from src.services.auth import auth_service
+from src.services.avatar import get_avatar_status, process_avatar, save_upload, set_avatar_status
 from src.conf.config import settings
-from src.schemas import UserDb
+from src.schemas import AvatarStatus, UserDb, Principal
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me/", response_model=UserDb)
-async def read_users_me(current_user: User = Depends(auth_service.get_current_user)) -> UserDb:
+async def read_users_me(current_user: Principal = Depends(auth_service.get_current_user)) -> UserDb:
     """
     Retrieve the current user's information.
 
     :param current_user: The currently authenticated user.
-    :type current_user: User
+    :type current_user: Principal
     :return: The current user's information.
     :rtype: UserDb
     """
     return current_user
 
 
-@router.patch("/avatar", response_model=UserDb)
+@router.patch("/avatar", response_model=AvatarStatus, status_code=status.HTTP_202_ACCEPTED)
 async def update_avatar_user(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(),
-    current_user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db),
-) -> UserDb:
+    current_user: Principal = Depends(auth_service.get_current_user),
+) -> AvatarStatus:
     """
-    Update the current user's avatar.
+    Accept a new avatar for the current user.
+
+    The file is streamed to a temporary file and the request returns at once;
+    resizing, storing and saving the URL run in the background. The result is
+    available from GET /users/avatar/status and, when done, in the user's data.
 
+    :param background_tasks: Background tasks for processing the avatar.
+    :type background_tasks: BackgroundTasks
     :param file: The new avatar file to upload.
     :type file: UploadFile
     :param current_user: The currently authenticated user.
-    :type current_user: User
-    :param db: The database session.
-    :type db: Session
-    :return: The updated user information with the new avatar URL.
-    :rtype: UserDb
+    :type current_user: Principal
+    :return: The pending status of the upload.
+    :rtype: AvatarStatus
+    :raises HTTPException: 415 if the file is not an image, 413 if it is too large.
     """
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True,
+    if not (file.content_type or "").startswith("image/"):
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Avatar must be an image")
+    path = await save_upload(file, settings.avatar_max_bytes)
+    await set_avatar_status(current_user.id, "pending")
+    background_tasks.add_task(
+        process_avatar, current_user.id, current_user.email, current_user.username or current_user.email, path
     )
+    return AvatarStatus(status="pending")
 
-    cloudinary.uploader.upload(
-        file.file, public_id=f"NotesApp/{current_user.username}", overwrite=True
-    )
-    src_url = cloudinary.CloudinaryImage(f"NotesApp/{current_user.username}").build_url(
-        width=250, height=250, crop="fill"
-    )
-    user = await repository_users.update_avatar(current_user.email, src_url, db)
-    return user
+
+@router.get("/avatar/status", response_model=AvatarStatus)
+async def read_avatar_status(current_user: Principal = Depends(auth_service.get_current_user)) -> AvatarStatus:
+    """
+    Retrieve the state of the current user's latest avatar upload.
+
+    :param current_user: The currently authenticated user.
+    :type current_user: Principal
+    :return: The status, with the avatar URL when done.
+    :rtype: AvatarStatus
+    :raises HTTPException: 404 if there is no recent upload.
+    """
+    avatar_status = await get_avatar_status(current_user.id)
+    if avatar_status is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No avatar upload in progress")
+    return AvatarStatus(**avatar_status)
@@ -1,24 +1,32 @@
 from datetime import datetime, date
 from typing import List, Optional
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, root_validator, validator
 
 # Contacts
 class ContactBase(BaseModel):
-    first_name: str
-    last_name: str
+    # Довжини відповідають стовпцям таблиці contacts
+    first_name: str = Field(max_length=50)
+    last_name: str = Field(max_length=50)
     email: EmailStr
-    phone: str
+    phone: str = Field(max_length=20)
     birthday: Optional[date] = None
     additional_data: Optional[str] = None
 
+    @validator("email")
+    def check_email_length(cls, v):
+        # EmailStr не підтримує max_length
+        if v is not None and len(v) > 100:
+            raise ValueError("ensure this value has at most 100 characters")
+        return v
+
 class ContactCreate(ContactBase):
     pass
 
 class ContactUpdate(ContactBase):
-    first_name: Optional[str] = None
-    last_name: Optional[str] = None
+    first_name: Optional[str] = Field(None, max_length=50)
+    last_name: Optional[str] = Field(None, max_length=50)
     email: Optional[str] = None
-    phone: Optional[str] = None
+    phone: Optional[str] = Field(None, max_length=20)
 
 class Contact(ContactBase):
     id: int
@@ -27,6 +35,63 @@ class Contact(ContactBase):
     class Config:
         orm_mode = True
 
+class ContactSuggestion(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ContactFilter(BaseModel):
+    """
+    Selects contacts by field values; all given conditions must match.
+    """
+    query: Optional[str] = Field(None, min_length=1, description="Substring of the first name, last name or email")
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    birthday_from: Optional[date] = None
+    birthday_to: Optional[date] = None
+
+
+class ContactSelection(BaseModel):
+    """
+    Selects contacts either by ids or by a filter.
+    """
+    ids: Optional[List[int]] = Field(None, max_items=10000)
+    filter: Optional[ContactFilter] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_selection(cls, values):
+        if (values.get("ids") is None) == (values.get("filter") is None):
+            raise ValueError("Exactly one of ids or filter must be given")
+        if values.get("filter") is not None and not values["filter"].dict(exclude_none=True):
+            raise ValueError("The filter must have at least one condition")
+        return values
+
+
+class ContactBatchUpdate(ContactSelection):
+    values: ContactUpdate
+
+    @validator("values")
+    def check_values(cls, v):
+        values = v.dict(exclude_unset=True)
+        if not values:
+            raise ValueError("No values to update")
+        # email унікальний, тому однаковим для кількох контактів бути не може
+        if "email" in values:
+            raise ValueError("email cannot be changed in a batch update")
+        return v
+
+
+class ContactBatchResult(BaseModel):
+    ids: List[int]
+    count: int
+
+
 class ContactResponse(BaseModel):
     id: int
     owner_id: int
@@ -59,6 +124,27 @@ class UserDb(BaseModel):
         orm_mode = True
 
 
+class AvatarStatus(BaseModel):
+    status: str
+    avatar: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class Principal(BaseModel):
+    """
+    The authenticated user as it is cached and passed to routes.
+    """
+    id: int
+    email: str
+    username: Optional[str] = None
+    confirmed: bool = False
+    avatar: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
 class UserResponse(BaseModel):
     user: UserDb
     detail: str = "User successfully created"
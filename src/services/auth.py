@@ -1,8 +1,12 @@
-import pickle
+import asyncio
+import hashlib
+import json
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Optional
 from datetime import datetime, timedelta
 
-import redis
+from redis.exceptions import RedisError
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
@@ -10,16 +14,80 @@ from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from src.database.db import get_db
+from src.database.profiling import attribute_trace
+from src.database.redis import get_redis
 from src.repository import users as repository_users
 from src.conf.config import settings
+from src.schemas import Principal
+from src.services.cache import TTLCache, principal_cache, user_cache_key
+from src.services.metrics import observe_redis
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# Версія формату закешованого користувача; записи іншої версії вважаються промахом кешу
+PRINCIPAL_CACHE_VERSION = 2
+
+
+def dump_principal(principal: Principal) -> bytes:
+    """
+    Serializes a principal for the cache as a compact JSON array prefixed with the format version.
+
+    :param principal: The principal to serialize.
+    :type principal: Principal
+    :return: Serialized principal.
+    :rtype: bytes
+    """
+    return json.dumps(
+        [PRINCIPAL_CACHE_VERSION, principal.id, principal.email, principal.username,
+         principal.confirmed, principal.avatar,
+         principal.created_at.isoformat() if principal.created_at else None],
+        separators=(",", ":"),
+    ).encode()
+
+
+def load_principal(raw: bytes) -> Principal | None:
+    """
+    Deserializes a principal written by dump_principal.
+
+    :param raw: Cached value.
+    :type raw: bytes
+    :return: The principal, or None if the value is malformed or of another format version.
+    :rtype: Principal | None
+    """
+    try:
+        version, *fields = json.loads(raw)
+        if version != PRINCIPAL_CACHE_VERSION:
+            return None
+        id, email, username, confirmed, avatar, created_at = fields
+        created_at = datetime.fromisoformat(created_at) if created_at else None
+    except (ValueError, TypeError):
+        return None
+    return Principal.construct(
+        id=id, email=email, username=username, confirmed=confirmed, avatar=avatar, created_at=created_at
+    )
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = pwd_context
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    r = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+    USER_CACHE_TTL = 900
+    # Перевірені токени: повторний запит з тим самим токеном не перевіряє підпис знову
+    token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=0)
+
+    @property
+    def r(self):
+        return get_redis()
 
     def verify_password(self, plain_password, hashed_password):
         return self.pwd_context.verify(plain_password, hashed_password)
@@ -27,6 +95,50 @@ class Auth:
     def get_password_hash(self, password: str):
         return self.pwd_context.hash(password)
 
+    _password_executor: Executor | None = None
+    _password_tasks = 0
+
+    @property
+    def password_executor(self) -> Executor:
+        if self._password_executor is None:
+            executor_class = ProcessPoolExecutor if settings.password_hash_executor == "process" else ThreadPoolExecutor
+            self._password_executor = executor_class(max_workers=settings.password_hash_workers)
+        return self._password_executor
+
+    def shutdown_password_executor(self) -> None:
+        if self._password_executor is not None:
+            self._password_executor.shutdown(wait=False, cancel_futures=True)
+            self._password_executor = None
+
+    async def _run_password_task(self, func, *args):
+        """
+        Runs a bcrypt function in the password executor without blocking the event loop.
+
+        :raises HTTPException: If too many password operations are already pending.
+        """
+        if self._password_tasks >= settings.password_hash_queue_size:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Too many authentication requests, try again later")
+        self._password_tasks += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.password_executor, func, *args)
+        finally:
+            self._password_tasks -= 1
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run_password_task(_hash_password, password)
+
+    async def verify_and_update_password(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verifies a password in the password executor.
+
+        If the hash was made with other settings than the current ones (for example
+        a different bcrypt cost), a new hash of the password is returned as well.
+
+        :return: Whether the password is valid and the new hash, if it must be replaced.
+        """
+        return await self._run_password_task(_verify_and_update_password, plain_password, hashed_password)
+
     # define a function to generate a new access token
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
         to_encode = data.copy()
@@ -59,7 +171,27 @@ class Auth:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    def decode_access_token(self, token: str) -> dict:
+        """
+        Decodes and verifies a token, reusing the payload of an already verified identical token.
+
+        Payloads are cached by the SHA-256 digest of the token until the token expires.
+
+        :param token: The encoded token.
+        :type token: str
+        :raises JWTError: If the token is invalid or expired.
+        :return: The token payload.
+        :rtype: dict
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        payload = self.token_cache.get(digest)
+        if payload is None:
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            if "exp" in payload:
+                self.token_cache.set(digest, payload, ttl=payload["exp"] - time.time())
+        return payload
+
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -68,7 +200,7 @@ class Auth:
 
         try:
             # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_access_token(token)
             if payload['scope'] == 'access_token':
                 email = payload["sub"]
                 if email is None:
@@ -78,16 +210,31 @@ class Auth:
         except JWTError as e:
             raise credentials_exception
 
-        user = self.r.get(f"user:{email}")
-        if user is None:
+        principal = principal_cache.get(email)
+        if principal is not None:
+            attribute_trace(principal.id)
+            return principal
+
+        # Недоступний Redis не повинен валити запит: тоді просто йдемо в базу
+        try:
+            with observe_redis("get"):
+                cached = await self.r.get(user_cache_key(email))
+        except RedisError:
+            cached = None
+        principal = load_principal(cached) if cached is not None else None
+        if principal is None:
             user = await repository_users.get_user_by_email(email, db)
             if user is None:
                 raise credentials_exception
-            self.r.set(f"user:{email}", pickle.dumps(user))
-            self.r.expire(f"user:{email}", 900)
-        else:
-            user = pickle.loads(user)
-        return user
+            principal = Principal.from_orm(user)
+            try:
+                with observe_redis("set"):
+                    await self.r.set(user_cache_key(email), dump_principal(principal), ex=self.USER_CACHE_TTL)
+            except RedisError:
+                pass
+        principal_cache.set(email, principal)
+        attribute_trace(principal.id)
+        return principal
 
     def create_email_token(self, data: dict):
         to_encode = data.copy()
@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import cloudinary
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.db import AsyncSessionLocal
+from src.database.redis import get_redis
+from src.repository import users as repository_users
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 256 * 1024
+# Запас на заголовки частин і межі multipart понад розмір самого файлу
+MULTIPART_OVERHEAD = 64 * 1024
+STATUS_TTL = 24 * 60 * 60
+CLOUDINARY_FOLDER = "NotesApp"
+
+
+class AvatarImage(NamedTuple):
+    data: bytes
+    content_type: str
+
+
+class AvatarStorage(ABC):
+    """
+    Where processed avatars are kept. A backend stores the image under a name
+    and returns the public URL of it.
+    """
+
+    @abstractmethod
+    async def save(self, name: str, image: AvatarImage) -> str:
+        """
+        Stores an image, replacing the one kept under the same name.
+
+        :return: The public URL of the image.
+        :rtype: str
+        """
+
+
+class CloudinaryStorage(AvatarStorage):
+    """
+    Uploads avatars to Cloudinary. The SDK is synchronous, so the upload runs
+    in a thread instead of blocking the event loop.
+    """
+
+    def __init__(self):
+        cloudinary.config(
+            cloud_name=settings.cloudinary_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            secure=True,
+        )
+
+    async def save(self, name: str, image: AvatarImage) -> str:
+        public_id = f"{CLOUDINARY_FOLDER}/{name}"
+        result = await asyncio.to_thread(
+            cloudinary.uploader.upload, io.BytesIO(image.data), public_id=public_id, overwrite=True
+        )
+        # Версія в URL оновлює закешовану CDN копію після перезапису
+        return cloudinary.CloudinaryImage(public_id).build_url(
+            width=settings.avatar_size, height=settings.avatar_size, crop="fill",
+            version=(result or {}).get("version"),
+        )
+
+
+class LocalStorage(AvatarStorage):
+    """
+    Writes avatars to a local directory served under settings.avatar_local_url.
+    Used in development and tests instead of Cloudinary.
+    """
+
+    def __init__(self, root: str | Path | None = None, base_url: str | None = None):
+        self.root = Path(root or settings.avatar_local_dir)
+        self.base_url = (base_url or settings.avatar_local_url).rstrip("/")
+
+    def _write(self, path: Path, data: bytes) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    async def save(self, name: str, image: AvatarImage) -> str:
+        # Ім'я користувача не годиться як ім'я файлу, тож беремо хеш
+        stem = hashlib.sha256(name.encode()).hexdigest()[:32]
+        filename = stem + (mimetypes.guess_extension(image.content_type) or "")
+        await asyncio.to_thread(self._write, self.root / filename, image.data)
+        return f"{self.base_url}/{filename}?v={time.time_ns()}"
+
+
+STORAGE_BACKENDS = {
+    "cloudinary": CloudinaryStorage,
+    "local": LocalStorage,
+}
+_storages: dict[str, AvatarStorage] = {}
+_executor: Executor | None = None
+
+
+def get_avatar_storage() -> AvatarStorage:
+    """
+    Returns the storage backend selected by settings.avatar_storage.
+
+    :return: The storage backend.
+    :rtype: AvatarStorage
+    """
+    backend = settings.avatar_storage
+    storage = _storages.get(backend)
+    if storage is None:
+        storage = _storages[backend] = STORAGE_BACKENDS[backend]()
+    return storage
+
+
+def avatar_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.avatar_workers, thread_name_prefix="avatar")
+    return _executor
+
+
+def shutdown_avatar_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class AvatarUploadLimitMiddleware:
+    """
+    ASGI middleware that limits the request body of avatar uploads to
+    settings.avatar_max_bytes plus the multipart overhead.
+
+    Starlette spools the whole multipart body before the route runs, so the
+    check in save_upload alone would not stop a huge upload from being
+    received. Bodies announced as too large by Content-Length are rejected
+    before they are read, longer streamed bodies as soon as they pass the limit.
+    """
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            return await self.app(scope, receive, send)
+        limit = settings.avatar_max_bytes + MULTIPART_OVERHEAD
+        detail = f"Avatar must not be larger than {settings.avatar_max_bytes} bytes"
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            response = JSONResponse({"detail": detail}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            return await response(scope, receive, send)
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Виняток під час розбору форми FastAPI перетворює на відповідь 413
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def save_upload(file: UploadFile, max_bytes: int) -> str:
+    """
+    Streams an uploaded file to a temporary file chunk by chunk.
+
+    By then Starlette has already spooled the whole request body, so the size
+    check here does not limit what the server receives; that is the job of
+    AvatarUploadLimitMiddleware.
+
+    :param file: The uploaded file.
+    :type file: UploadFile
+    :param max_bytes: The largest accepted size in bytes.
+    :type max_bytes: int
+    :return: The path of the temporary file; the caller removes it.
+    :rtype: str
+    :raises HTTPException: 413 if the file is larger than max_bytes, 400 if it is empty.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Avatar must not be larger than {max_bytes} bytes",
+    )
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+    fd, path = tempfile.mkstemp(prefix="avatar-")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise too_large
+                await asyncio.to_thread(out.write, chunk)
+        if not size:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def resize_avatar(path: str, size: int) -> AvatarImage:
+    """
+    Crops an image to a size x size square and encodes it as WebP, or as JPEG
+    if Pillow has no WebP support.
+
+    Blocking; runs in the avatar executor.
+
+    :param path: The path of the uploaded file.
+    :type path: str
+    :param size: The side of the square in pixels.
+    :type size: int
+    :return: The encoded image.
+    :rtype: AvatarImage
+    :raises UnidentifiedImageError: If the file is not an image Pillow can read.
+    """
+    with Image.open(path) as source:
+        image = ImageOps.fit(ImageOps.exif_transpose(source), (size, size), Image.LANCZOS)
+    out = io.BytesIO()
+    if features.check("webp"):
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.save(out, "WEBP", quality=85, method=4)
+        return AvatarImage(out.getvalue(), "image/webp")
+    image.convert("RGB").save(out, "JPEG", quality=85, optimize=True, progressive=True)
+    return AvatarImage(out.getvalue(), "image/jpeg")
+
+
+def _status_key(user_id: int) -> str:
+    return f"avatar:status:{user_id}"
+
+
+async def set_avatar_status(user_id: int, state: str, **fields) -> None:
+    try:
+        await get_redis().set(_status_key(user_id), json.dumps({"status": state, **fields}), ex=STATUS_TTL)
+    except RedisError:
+        logger.warning("Could not store the avatar status of user %s", user_id)
+
+
+async def get_avatar_status(user_id: int) -> dict | None:
+    """
+    Returns the state of the user's latest avatar upload.
+
+    :param user_id: The ID of the user.
+    :type user_id: int
+    :return: status ("pending", "done" or "failed") with avatar or detail, or None if unknown.
+    :rtype: dict | None
+    """
+    try:
+        value = await get_redis().get(_status_key(user_id))
+    except RedisError:
+        return None
+    return json.loads(value) if value else None
+
+
+async def process_avatar(user_id: int, email: str, username: str, path: str) -> None:
+    """
+    Resizes an uploaded avatar, stores it and saves the new URL on the user.
+
+    Runs after the response has been sent, with its own database session.
+    Updating the user invalidates the cached user, so the next request sees
+    the new avatar. The temporary file is removed in any case.
+
+    :param user_id: The ID of the user.
+    :type user_id: int
+    :param email: The email of the user.
+    :type email: str
+    :param username: The user's name, used to name the stored image.
+    :type username: str
+    :param path: The temporary file written by save_upload.
+    :type path: str
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(avatar_executor(), resize_avatar, path, settings.avatar_size)
+        url = await get_avatar_storage().save(username, image)
+        async with AsyncSessionLocal() as db:
+            await repository_users.update_avatar(email, url, db)
+    except Exception as e:
+        logger.exception("Avatar processing for user %s failed", user_id)
+        unsupported = isinstance(e, (UnidentifiedImageError, Image.DecompressionBombError))
+        detail = "Unsupported image" if unsupported else "Avatar processing failed"
+        await set_avatar_status(user_id, "failed", detail=detail)
+    else:
+        await set_avatar_status(user_id, "done", avatar=url)
+    finally:
+        os.unlink(path)
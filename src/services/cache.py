@@ -0,0 +1,272 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple
+
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.redis import get_redis
+
+USER_CACHE_CHANNEL = "user-cache:invalidate"
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a TTL.
+
+    It is not shared between workers; use it only for data that may be slightly
+    stale or that is invalidated explicitly.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns a cached value and marks it as recently used.
+
+        :param key: The cache key.
+        :type key: Hashable
+        :param default: The value to return on a miss.
+        :type default: Any
+        :return: The cached value, or default if it is missing or expired.
+        :rtype: Any
+        """
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns a cached value without marking it as used or counting a hit or miss.
+
+        :param key: The cache key.
+        :type key: Hashable
+        :param default: The value to return if the key is missing or expired.
+        :type default: Any
+        :return: The cached value, or default.
+        :rtype: Any
+        """
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Stores a value, evicting the least recently used entries above maxsize.
+
+        :param key: The cache key.
+        :type key: Hashable
+        :param value: The value to cache.
+        :type value: Any
+        :param ttl: Lifetime of the entry in seconds, the cache TTL by default.
+        :type ttl: float | None
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """
+        Returns the live entries, least recently used first.
+
+        :return: Key and value pairs.
+        :rtype: list[tuple[Hashable, Any]]
+        """
+        now = time.monotonic()
+        return [(key, value) for key, (expires, value) in self._data.items() if expires > now]
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Removes an entry if it is cached.
+
+        :param key: The cache key.
+        :type key: Hashable
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes all entries.
+        """
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the size and hit/miss counters of the cache.
+
+        :return: Cache statistics.
+        :rtype: dict
+        """
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+# Кеш автентифікованих користувачів воркера, стоїть перед Redis
+principal_cache = TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl)
+
+
+def user_cache_key(email: str) -> str:
+    """
+    Returns the Redis key of the cached user.
+
+    :param email: The user's email.
+    :type email: str
+    :return: Redis key.
+    :rtype: str
+    """
+    return f"user:{email}"
+
+
+async def invalidate_user(email: str) -> None:
+    """
+    Drops the cached user from this worker, from Redis, and notifies the other workers.
+
+    Redis errors are ignored: the local entry is dropped anyway and the other
+    copies expire by TTL.
+
+    :param email: The user's email.
+    :type email: str
+    """
+    principal_cache.pop(email)
+    r = get_redis()
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.delete(user_cache_key(email))
+            pipe.publish(USER_CACHE_CHANNEL, email)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+class ContactsVersion(NamedTuple):
+    """
+    Version of an owner's contacts: a write counter and the random epoch of
+    the Redis key that holds it.
+
+    If the key is lost (Redis restarted, the key was evicted) the counter
+    starts again under a new epoch, so old numbers never describe new content.
+    """
+    epoch: str
+    number: int
+
+    def __str__(self) -> str:
+        return f"{self.epoch}.{self.number}"
+
+    def follows(self, other: "ContactsVersion") -> bool:
+        """
+        Tells whether this version is the one right after other.
+        """
+        return self.epoch == other.epoch and self.number == other.number + 1
+
+
+def contacts_version_key(owner_id: int) -> str:
+    """
+    Returns the Redis key of the version hash (epoch and counter) of an owner's contacts.
+
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :return: Redis key.
+    :rtype: str
+    """
+    # Нова назва: за старою лежать рядкові лічильники попереднього формату
+    return f"contacts-version:v2:{owner_id}"
+
+
+# Власники, чию версію не вдалося збільшити після запису: поки це не вдасться,
+# їхня версія вважається невідомою, інакше старі ETag-и далі збігалися б
+_unbumped_owners: set[int] = set()
+
+
+def _version(epoch, number) -> ContactsVersion:
+    return ContactsVersion(epoch.decode() if isinstance(epoch, bytes) else epoch, int(number or 0))
+
+
+async def get_contacts_version(owner_id: int) -> ContactsVersion | None:
+    """
+    Returns the version of an owner's contacts; it changes with every write.
+
+    A missing key gets a new epoch. If an earlier bump of this owner failed,
+    it is retried first.
+
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :return: The version, or None if Redis is unavailable or a bump is still pending.
+    :rtype: ContactsVersion | None
+    """
+    if owner_id in _unbumped_owners:
+        return await bump_contacts_version(owner_id)
+    key = contacts_version_key(owner_id)
+    try:
+        r = get_redis()
+        epoch, number = await r.hmget(key, "epoch", "number")
+        if epoch is None:
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.hsetnx(key, "epoch", uuid.uuid4().hex)
+                pipe.hmget(key, "epoch", "number")
+                _, (epoch, number) = await pipe.execute()
+    except RedisError:
+        return None
+    return _version(epoch, number)
+
+
+async def bump_contacts_version(owner_id: int) -> ContactsVersion | None:
+    """
+    Increments the version of an owner's contacts after they were changed.
+
+    On failure the owner's version is reported as unknown by this worker (so
+    no ETags are issued or accepted) until a retry succeeds.
+
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :return: The new version, or None if Redis is unavailable.
+    :rtype: ContactsVersion | None
+    """
+    key = contacts_version_key(owner_id)
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.hsetnx(key, "epoch", uuid.uuid4().hex)
+            pipe.hincrby(key, "number", 1)
+            pipe.hget(key, "epoch")
+            _, number, epoch = await pipe.execute()
+    except RedisError:
+        _unbumped_owners.add(owner_id)
+        return None
+    _unbumped_owners.discard(owner_id)
+    return _version(epoch, number)
+
+
+async def listen_user_invalidations() -> None:
+    """
+    Drops users invalidated by other workers from the local cache.
+
+    Runs until cancelled and reconnects when the Redis connection is lost.
+    """
+    while True:
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            async with pubsub:
+                await pubsub.subscribe(USER_CACHE_CHANNEL)
+                async for message in pubsub.listen():
+                    email = message["data"]
+                    principal_cache.pop(email.decode() if isinstance(email, bytes) else email)
+        except RedisError:
+            # Поки ми не підписані, могли пропустити інвалідації
+            principal_cache.clear()
+            await asyncio.sleep(1)
@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+
+from src.database.db import AsyncSessionLocal
+from src.database.models import Contact
+
+EXPORT_FIELDS = ("id", "first_name", "last_name", "email", "phone", "birthday", "additional_data")
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "vcard": "text/vcard",
+}
+# Рядки читаються з курсора і кодуються пачками такого розміру
+STREAM_BATCH_SIZE = 1000
+
+
+def _csv_line(values: Iterable) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def _csv_lines(rows: Iterable[Row]) -> Iterable[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+    yield buffer.getvalue()
+
+
+def _jsonl_lines(rows: Iterable[Row]) -> Iterable[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str) + "\n"
+
+
+def _vcard_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _vcard_fold(line: str) -> str:
+    # RFC 6350: рядки довші за 75 октетів переносяться, продовження починається з пробілу
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        start, limit = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _vcard_lines(rows: Iterable[Row]) -> Iterable[str]:
+    for id, first_name, last_name, email, phone, birthday, additional_data in rows:
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:4.0",
+            f"UID:urn:contact:{id}",
+            f"FN:{_vcard_escape(f'{first_name} {last_name}')}",
+            f"N:{_vcard_escape(last_name)};{_vcard_escape(first_name)};;;",
+        ]
+        if email:
+            lines.append(f"EMAIL:{_vcard_escape(email)}")
+        if phone:
+            lines.append(f"TEL:{_vcard_escape(phone)}")
+        if birthday:
+            lines.append(f"BDAY:{birthday:%Y%m%d}")
+        if additional_data:
+            lines.append(f"NOTE:{_vcard_escape(additional_data)}")
+        lines.append("END:VCARD")
+        yield "".join(_vcard_fold(line) for line in lines)
+
+
+FORMATTERS = {
+    "csv": _csv_lines,
+    "jsonl": _jsonl_lines,
+    "vcard": _vcard_lines,
+}
+HEADERS = {
+    "csv": _csv_line(EXPORT_FIELDS),
+}
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Tells whether an Accept-Encoding header allows a gzip response.
+
+    A coding with q=0 is refused; without an entry for gzip the q-value of *
+    applies.
+
+    :param accept_encoding: The value of the Accept-Encoding header.
+    :type accept_encoding: str
+    :return: True if gzip is acceptable.
+    :rtype: bool
+    """
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.lower()] = q
+    q = qvalues.get("gzip", qvalues.get("x-gzip", qvalues.get("*", 0.0)))
+    return q > 0
+
+
+async def export_contacts(owner_id: int, fmt: str, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Streams all contacts of an owner in the given format.
+
+    Rows are read with a server-side cursor in batches and encoded as they
+    arrive, so memory use does not depend on the number of contacts. The
+    stream opens its own session: the session of the request is closed
+    before the response body is sent.
+
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :param fmt: The format: "csv", "jsonl" or "vcard".
+    :type fmt: str
+    :param compress: Whether to gzip the output.
+    :type compress: bool
+    :return: Chunks of the encoded file.
+    :rtype: AsyncIterator[bytes]
+    """
+    columns = [getattr(Contact, name) for name in EXPORT_FIELDS]
+    req = (
+        select(*columns)
+        .where(Contact.owner_id == owner_id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    if fmt in HEADERS:
+        yield encode(HEADERS[fmt])
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(req)
+        async for rows in result.partitions():
+            chunk = encode("".join(FORMATTERS[fmt](rows)))
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,216 @@
+import codecs
+import csv
+import json
+import logging
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from src.conf.config import settings
+from src.database.db import AsyncSessionLocal
+from src.repository.contacts import bulk_create_contacts
+from src.schemas import ContactCreate
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Splits a stream of UTF-8 encoded chunks into lines without reading it whole.
+
+    :param chunks: The body chunks.
+    :type chunks: AsyncIterator[bytes]
+    :return: Lines without line endings.
+    :rtype: AsyncIterator[str]
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).splitlines(keepends=True)
+        # Останній рядок може бути неповним (або "\r", за яким ще прийде "\n")
+        tail = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+        for line in lines:
+            yield line.rstrip("\r\n")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Parses CSV lines into records keyed by the header row.
+
+    Quoted values may span several lines. Empty values become None.
+
+    :param lines: The lines of the file.
+    :type lines: AsyncIterator[str]
+    :return: Row number (the header is row 0), the record or None, and a parse error or None.
+    :rtype: AsyncIterator[tuple[int, dict | None, str | None]]
+    """
+    header = None
+    row = 0
+    pending = ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        # Незакрита лапка: запис продовжується на наступному рядку
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} values, got {len(values)}"
+            continue
+        yield row, {name: value or None for name, value in zip(header, values)}, None
+    if pending:
+        yield row + 1, None, "Unterminated quoted value"
+
+
+async def iter_jsonl_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Parses JSON Lines into records, one JSON object per non-empty line.
+
+    :param lines: The lines of the file.
+    :type lines: AsyncIterator[str]
+    :return: Row number, the record or None, and a parse error or None.
+    :rtype: AsyncIterator[tuple[int, dict | None, str | None]]
+    """
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "Expected a JSON object"
+            continue
+        yield row, record, None
+
+
+async def import_contacts(
+    db: AsyncSession, chunks: AsyncIterator[bytes], fmt: str, owner_id: int
+) -> AsyncIterator[dict]:
+    """
+    Imports contacts from a CSV or JSON Lines stream in batches.
+
+    Rows are validated with ContactCreate and inserted batch by batch; rows whose
+    email already exists are skipped. A batch the database rejects is rolled
+    back, its rows are reported as failed and the import goes on. Report entries
+    are yielded as soon as they are known: an invalid row when it is parsed,
+    duplicates or failed rows and a progress entry when its batch is committed,
+    and the summary last. Only one batch is held in memory.
+
+    :param db: The database session.
+    :type db: AsyncSession
+    :param chunks: The body chunks of the uploaded file.
+    :type chunks: AsyncIterator[bytes]
+    :param fmt: The file format, "csv" or "jsonl".
+    :type fmt: str
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :return: Report entries; the last one holds the numbers of created, duplicate, invalid and failed rows.
+    :rtype: AsyncIterator[dict]
+    """
+    parse = iter_csv_records if fmt == "csv" else iter_jsonl_records
+    summary = {"created": 0, "duplicate": 0, "invalid": 0, "failed": 0}
+    batch: list[tuple[int, ContactCreate]] = []
+
+    async def flush_batch():
+        entries = []
+        try:
+            created = await bulk_create_contacts(db, [contact for _, contact in batch], owner_id=owner_id)
+        except SQLAlchemyError:
+            # Помилка бази в одній пачці не повинна обривати звіт: відкочуємо її й імпортуємо далі
+            logger.exception("Import of rows %d-%d failed", batch[0][0], batch[-1][0])
+            await db.rollback()
+            summary["failed"] += len(batch)
+            entries = [{"row": row, "status": "failed", "email": contact.email} for row, contact in batch]
+        else:
+            for row, contact in batch:
+                if contact.email in created:
+                    summary["created"] += 1
+                    # Дублікат email усередині одного файлу: перший рядок створено, наступні — ні
+                    created.discard(contact.email)
+                else:
+                    summary["duplicate"] += 1
+                    entries.append({"row": row, "status": "duplicate", "email": contact.email})
+        # Рядок прогресу після кожної пачки: довгий імпорт без помилок теж щось надсилає
+        entries.append({"progress": {"row": batch[-1][0], **summary}})
+        batch.clear()
+        return entries
+
+    async for row, record, error in parse(iter_lines(chunks)):
+        if error is None:
+            try:
+                batch.append((row, ContactCreate(**record)))
+            except ValidationError as e:
+                error = e.errors()
+        if error is not None:
+            summary["invalid"] += 1
+            yield {"row": row, "status": "invalid", "errors": error}
+        if len(batch) >= settings.import_batch_size:
+            for entry in await flush_batch():
+                yield entry
+    if batch:
+        for entry in await flush_batch():
+            yield entry
+
+    yield {"summary": summary}
+
+
+async def stream_import_report(chunks: AsyncIterator[bytes], fmt: str, owner_id: int) -> AsyncIterator[bytes]:
+    """
+    Runs an import in its own session and encodes the report as JSON Lines.
+
+    The report is sent while the body is still being received, so the session
+    of the request, which is closed before the response body is streamed,
+    cannot be used.
+
+    :param chunks: The body chunks of the uploaded file.
+    :type chunks: AsyncIterator[bytes]
+    :param fmt: The file format, "csv" or "jsonl".
+    :type fmt: str
+    :param owner_id: The ID of the owner of the contacts.
+    :type owner_id: int
+    :return: Report lines.
+    :rtype: AsyncIterator[bytes]
+    """
+    async with AsyncSessionLocal() as db:
+        async for entry in import_contacts(db, chunks, fmt, owner_id):
+            yield json.dumps(entry, default=str).encode() + b"\n"
+
+
+class ImportReportResponse(StreamingResponse):
+    """
+    Streaming response whose body is produced while the request body is read.
+
+    StreamingResponse listens for the disconnect message on ASGI servers older
+    than spec 2.4 and would consume the body chunks the import is waiting for;
+    a disconnect is noticed by Request.stream() here instead.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -1,42 +1,75 @@
-from pathlib import Path
+import logging
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
+from redis.exceptions import RedisError
 
 from src.services.auth import auth_service
-from src.conf.config import settings
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=EmailStr(settings.mail_from),
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME="Rest API Application",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=False,
-    TEMPLATE_FOLDER=Path(__file__).parent / "templates",
-)
+from src.services.email_queue import enqueue_email
 
+logger = logging.getLogger(__name__)
 
-async def send_email(email: EmailStr, username: str, host: str):
+CONFIRMATION_TEMPLATE = "email_template.html"
+PASSWORD_RESET_TEMPLATE = "password_reset.html"
+BIRTHDAY_DIGEST_TEMPLATE = "birthday_digest.html"
+
+
+async def _queue(to: str, subject: str, template: str, context: dict) -> None:
     try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email",
-            recipients=[email],
-            template_body={
-                "host": host,
-                "username": username,
-                "token": token_verification,
-            },
-            subtype=MessageType.html,
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as err:
-        print(err)
+        await enqueue_email(to=to, subject=subject, template=template, context=context)
+    except RedisError:
+        logger.exception("Could not queue the %s email to %s", template, to)
+
+
+async def send_email(email: EmailStr, username: str, host: str):
+    """
+    Queues the email confirmation message; the sender worker delivers it
+    (see src.services.email_worker).
+
+    :param email: The recipient.
+    :type email: EmailStr
+    :param username: The user's name.
+    :type username: str
+    :param host: The base URL of the API, for the confirmation link.
+    :type host: str
+    """
+    token_verification = auth_service.create_email_token({"sub": email})
+    await _queue(email, "Confirm your email", CONFIRMATION_TEMPLATE,
+                 {"host": str(host), "username": username, "token": token_verification})
+
+
+async def send_password_reset_email(email: EmailStr, username: str, url: str):
+    """
+    Queues a password reset message.
+
+    :param email: The recipient.
+    :type email: EmailStr
+    :param username: The user's name.
+    :type username: str
+    :param url: The link that lets the user choose a new password.
+    :type url: str
+    """
+    await _queue(email, "Reset your password", PASSWORD_RESET_TEMPLATE, {"username": username, "url": url})
+
+
+async def send_birthday_digest(email: EmailStr, username: str, contacts: list, days: int = 7):
+    """
+    Queues the digest of the user's contacts with upcoming birthdays.
+
+    :param email: The recipient.
+    :type email: EmailStr
+    :param username: The user's name.
+    :type username: str
+    :param contacts: Contacts with first_name, last_name and birthday attributes.
+    :type contacts: list
+    :param days: The size of the window in days.
+    :type days: int
+    """
+    context = {
+        "username": username,
+        "days": days,
+        "contacts": [
+            {"first_name": c.first_name, "last_name": c.last_name, "birthday": c.birthday.isoformat()}
+            for c in contacts
+        ],
+    }
+    await _queue(email, "Upcoming birthdays", BIRTHDAY_DIGEST_TEMPLATE, context)
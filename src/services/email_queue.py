@@ -0,0 +1,293 @@
+import asyncio
+import json
+import os
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+from redis.exceptions import ResponseError, WatchError
+
+from src.conf.config import settings
+from src.database.redis import get_redis
+
+OUTBOX_STREAM = "email:outbox"
+DELAYED_SET = "email:delayed"
+DEAD_STREAM = "email:dead"
+SENDERS_GROUP = "email-senders"
+
+
+class EmailQueue(ABC):
+    """
+    Outbound mail queue between the API, which only enqueues jobs, and the sender worker.
+
+    A job is a JSON-serializable dict: recipient ("to"), "subject", "template",
+    template "context" and the number of failed "attempts". A job taken with get()
+    stays in the queue until it is acknowledged, retried or moved to the dead letters.
+    """
+
+    @abstractmethod
+    async def put(self, job: dict) -> None:
+        """
+        Adds a job to the queue.
+        """
+
+    @abstractmethod
+    async def get(self, count: int, timeout: float) -> list[tuple[str, dict]]:
+        """
+        Takes up to count jobs, waiting up to timeout seconds for the first one.
+
+        :return: Pairs of job id and job.
+        :rtype: list[tuple[str, dict]]
+        """
+
+    @abstractmethod
+    async def ack(self, job_id: str) -> None:
+        """
+        Removes a job that has been sent from the queue.
+        """
+
+    @abstractmethod
+    async def retry(self, job_id: str, job: dict, delay: float) -> None:
+        """
+        Puts a failed job back into the queue after a delay.
+        """
+
+    @abstractmethod
+    async def dead(self, job_id: str, job: dict, error: str) -> None:
+        """
+        Moves a job that cannot be delivered to the dead letters.
+        """
+
+    @abstractmethod
+    async def depth(self) -> dict:
+        """
+        Returns the number of jobs waiting, being sent, delayed for a retry and dead.
+
+        :rtype: dict
+        """
+
+
+class LocalEmailQueue(EmailQueue):
+    """
+    In-process queue with the same semantics as the Redis one, for tests and
+    single-process setups. Jobs are lost when the process exits.
+    """
+
+    # Черга може використовуватись з різних циклів подій (у тестах), тому без asyncio.Queue
+    poll_interval = 0.01
+
+    def __init__(self):
+        self._ready: deque[tuple[str, dict]] = deque()
+        self._pending: dict[str, dict] = {}
+        self._delayed: list[tuple[float, str, dict]] = []
+        self.dead_letters: list[dict] = []
+        self._ids = 0
+
+    async def put(self, job: dict) -> None:
+        self._ids += 1
+        self._ready.append((str(self._ids), job))
+
+    async def get(self, count: int, timeout: float) -> list[tuple[str, dict]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            for item in [item for item in self._delayed if item[0] <= now]:
+                self._delayed.remove(item)
+                self._ready.append(item[1:])
+            if self._ready or now >= deadline:
+                break
+            await asyncio.sleep(self.poll_interval)
+        jobs = []
+        while self._ready and len(jobs) < count:
+            job_id, job = self._ready.popleft()
+            self._pending[job_id] = job
+            jobs.append((job_id, job))
+        return jobs
+
+    async def ack(self, job_id: str) -> None:
+        self._pending.pop(job_id, None)
+
+    async def retry(self, job_id: str, job: dict, delay: float) -> None:
+        self._pending.pop(job_id, None)
+        self._delayed.append((time.monotonic() + delay, job_id, job))
+
+    async def dead(self, job_id: str, job: dict, error: str) -> None:
+        self._pending.pop(job_id, None)
+        self.dead_letters.append({**job, "error": error})
+
+    async def depth(self) -> dict:
+        return {
+            "ready": len(self._ready),
+            "pending": len(self._pending),
+            "delayed": len(self._delayed),
+            "dead": len(self.dead_letters),
+        }
+
+
+class RedisEmailQueue(EmailQueue):
+    """
+    Durable queue on a Redis stream read through a consumer group.
+
+    Delivered jobs stay pending in the group until they are acknowledged, so a
+    worker that restarts after a crash first re-reads its own pending jobs.
+    Consumer names include the process ID, so jobs of a worker that never comes
+    back are claimed by the others once they have been pending for longer than
+    settings.email_claim_idle seconds. Acknowledged jobs are deleted from the
+    stream, hence its length is the queue depth. Retries wait in a sorted set
+    scored by the time they are due.
+    """
+
+    def __init__(self, consumer: str | None = None):
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+        self._recovering = True
+        self._next_claim = 0.0
+        self._claim_cursor = "0-0"
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await get_redis().xgroup_create(OUTBOX_STREAM, SENDERS_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def put(self, job: dict) -> None:
+        await get_redis().xadd(OUTBOX_STREAM, {"job": json.dumps(job)})
+
+    async def _release_due(self) -> None:
+        # Переносимо задачі в одній транзакції: падіння між ZREM і XADD не втратить задачу.
+        # WATCH не дає двом воркерам повернути ту саму задачу двічі: транзакція того, хто
+        # запізнився, скасовується, і він спробує знову під час наступного get()
+        async with get_redis().pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(DELAYED_SET)
+                due = await pipe.zrangebyscore(DELAYED_SET, 0, time.time(), start=0, num=100)
+                if not due:
+                    return
+                pipe.multi()
+                pipe.zrem(DELAYED_SET, *due)
+                for raw in due:
+                    pipe.xadd(OUTBOX_STREAM, {"job": raw.split(b":", 1)[1]})
+                await pipe.execute()
+            except WatchError:
+                pass
+
+    async def _claim_stale(self, count: int) -> list[tuple[str, dict]]:
+        # Задачі споживачів, які впали й не повернулися (інше ім'я після перезапуску)
+        r = get_redis()
+        response = await r.xautoclaim(
+            OUTBOX_STREAM, SENDERS_GROUP, self.consumer,
+            min_idle_time=int(settings.email_claim_idle * 1000), start_id=self._claim_cursor, count=count,
+        )
+        self._claim_cursor, entries = response[0], response[1]
+        if isinstance(self._claim_cursor, bytes):
+            self._claim_cursor = self._claim_cursor.decode()
+        # Записи, видалені зі стріму, лишаються в групі без даних (Redis 6.2)
+        missing = [job_id for job_id, fields in entries if not fields]
+        if missing:
+            await r.xack(OUTBOX_STREAM, SENDERS_GROUP, *missing)
+        return self._decode([entry for entry in entries if entry[1]])
+
+    async def get(self, count: int, timeout: float) -> list[tuple[str, dict]]:
+        await self._ensure_group()
+        await self._release_due()
+        r = get_redis()
+        if self._recovering:
+            # Спершу задачі, які цей споживач узяв до перезапуску, але не підтвердив
+            response = await r.xreadgroup(SENDERS_GROUP, self.consumer, {OUTBOX_STREAM: "0"}, count=count)
+            entries = response[0][1] if response else []
+            if entries:
+                return self._decode(entries)
+            self._recovering = False
+        if time.monotonic() >= self._next_claim:
+            claimed = await self._claim_stale(count)
+            if self._claim_cursor == "0-0":
+                # Обійшли всі непідтверджені задачі; наступний обхід через інтервал
+                self._next_claim = time.monotonic() + settings.email_claim_interval
+            if claimed:
+                return claimed
+        response = await r.xreadgroup(
+            SENDERS_GROUP, self.consumer, {OUTBOX_STREAM: ">"}, count=count, block=max(int(timeout * 1000), 1)
+        )
+        return self._decode(response[0][1]) if response else []
+
+    @staticmethod
+    def _decode(entries) -> list[tuple[str, dict]]:
+        jobs = []
+        for job_id, fields in entries:
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+            raw = fields.get(b"job", fields.get("job")) if fields else None
+            jobs.append((job_id, json.loads(raw) if raw else {}))
+        return jobs
+
+    @staticmethod
+    def _remove(pipe, job_id: str) -> None:
+        pipe.xack(OUTBOX_STREAM, SENDERS_GROUP, job_id)
+        pipe.xdel(OUTBOX_STREAM, job_id)
+
+    async def ack(self, job_id: str) -> None:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            self._remove(pipe, job_id)
+            await pipe.execute()
+
+    async def retry(self, job_id: str, job: dict, delay: float) -> None:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            # id у члені множини, щоб однакові задачі не злилися в одну
+            pipe.zadd(DELAYED_SET, {f"{job_id}:{json.dumps(job)}": time.time() + delay})
+            self._remove(pipe, job_id)
+            await pipe.execute()
+
+    async def dead(self, job_id: str, job: dict, error: str) -> None:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.xadd(DEAD_STREAM, {"job": json.dumps(job), "error": error})
+            self._remove(pipe, job_id)
+            await pipe.execute()
+
+    async def depth(self) -> dict:
+        await self._ensure_group()
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.xlen(OUTBOX_STREAM)
+            pipe.xpending(OUTBOX_STREAM, SENDERS_GROUP)
+            pipe.zcard(DELAYED_SET)
+            pipe.xlen(DEAD_STREAM)
+            queued, pending, delayed, dead = await pipe.execute()
+        pending = pending["pending"]
+        return {"ready": queued - pending, "pending": pending, "delayed": delayed, "dead": dead}
+
+
+_queue: EmailQueue | None = None
+
+
+def get_email_queue() -> EmailQueue:
+    """
+    Returns the mail queue of the backend selected by settings.email_queue_backend.
+
+    :return: The queue, "redis" or "local".
+    :rtype: EmailQueue
+    """
+    global _queue
+    if _queue is None:
+        _queue = LocalEmailQueue() if settings.email_queue_backend == "local" else RedisEmailQueue()
+    return _queue
+
+
+async def enqueue_email(to: str, subject: str, template: str, context: dict) -> None:
+    """
+    Queues an email for the sender worker.
+
+    :param to: The recipient.
+    :type to: str
+    :param subject: The subject.
+    :type subject: str
+    :param template: The template file name in src/services/templates.
+    :type template: str
+    :param context: The template variables, JSON-serializable.
+    :type context: dict
+    """
+    await get_email_queue().put(
+        {"to": to, "subject": subject, "template": template, "context": context, "attempts": 0}
+    )
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+
+from src.conf.config import settings
+from src.services.email_queue import EmailQueue, get_email_queue
+from src.services.template_registry import TemplateRegistry, template_registry
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """
+    Keeps up to size authenticated SMTP connections open and reuses them for
+    consecutive messages, instead of a TCP/TLS handshake and login per message.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: list[aiosmtplib.SMTP] = []
+        self._slots: asyncio.Semaphore | None = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.mail_server,
+            port=settings.mail_port,
+            username=settings.mail_username,
+            password=settings.mail_password,
+            use_tls=settings.mail_ssl_tls,
+            start_tls=settings.mail_starttls,
+            validate_certs=settings.mail_validate_certs,
+        )
+        await smtp.connect()
+        return smtp
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Sends a message over a pooled connection.
+
+        A reused connection the server has closed in the meantime is replaced
+        once; other errors close the connection and are raised.
+
+        :param message: The message.
+        :type message: EmailMessage
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            smtp = self._idle.pop() if self._idle else None
+            if smtp is not None and not smtp.is_connected:
+                smtp = None
+            reused = smtp is not None
+            if smtp is None:
+                smtp = await self._connect()
+            try:
+                await smtp.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                smtp.close()
+                if not reused:
+                    raise
+                smtp = await self._connect()
+                try:
+                    await smtp.send_message(message)
+                except Exception:
+                    smtp.close()
+                    raise
+            except Exception:
+                smtp.close()
+                raise
+            self._idle.append(smtp)
+
+    async def close(self) -> None:
+        """
+        Closes all idle connections.
+        """
+        while self._idle:
+            smtp = self._idle.pop()
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+
+class EmailWorker:
+    """
+    Takes jobs from the mail queue, renders them and sends them over pooled
+    SMTP connections. Failed jobs are retried with exponential backoff and moved
+    to the dead letters after settings.email_max_attempts attempts.
+    """
+
+    def __init__(
+        self, queue: EmailQueue, transport, templates: TemplateRegistry = template_registry,
+        concurrency: int | None = None, batch_size: int | None = None
+    ):
+        self.queue = queue
+        self.transport = transport
+        self.templates = templates
+        self.concurrency = concurrency or settings.email_worker_concurrency
+        self.batch_size = batch_size or settings.email_batch_size
+        self.stats = {"sent": 0, "retried": 0, "failed": 0}
+
+    def render(self, job: dict) -> EmailMessage:
+        """
+        Builds the message of a job.
+
+        :param job: The job.
+        :type job: dict
+        :return: The message.
+        :rtype: EmailMessage
+        """
+        message = EmailMessage()
+        message["From"] = formataddr((settings.mail_from_name, settings.mail_from))
+        message["To"] = job["to"]
+        message["Subject"] = job["subject"]
+        message.set_content(self.templates.render(job["template"], job["context"]), subtype="html")
+        return message
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(settings.email_retry_base_delay * 2 ** (attempts - 1), settings.email_retry_max_delay)
+
+    async def deliver(self, job_id: str, job: dict) -> None:
+        """
+        Sends one job and acknowledges, retries or buries it.
+        """
+        try:
+            await self.transport.send(self.render(job))
+        except Exception as e:
+            attempts = job.get("attempts", 0) + 1
+            job = {**job, "attempts": attempts}
+            if attempts >= settings.email_max_attempts:
+                logger.error("Email to %s failed after %d attempts: %s", job.get("to"), attempts, e)
+                self.stats["failed"] += 1
+                await self.queue.dead(job_id, job, repr(e))
+            else:
+                logger.warning("Email to %s failed (attempt %d): %s", job.get("to"), attempts, e)
+                self.stats["retried"] += 1
+                await self.queue.retry(job_id, job, self.retry_delay(attempts))
+        else:
+            self.stats["sent"] += 1
+            await self.queue.ack(job_id)
+
+    async def run_once(self, timeout: float = 1) -> int:
+        """
+        Takes one batch of jobs and sends them concurrently.
+
+        :param timeout: Seconds to wait for jobs.
+        :type timeout: float
+        :return: The number of jobs taken.
+        :rtype: int
+        """
+        jobs = await self.queue.get(self.batch_size, timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(job_id: str, job: dict):
+            async with semaphore:
+                await self.deliver(job_id, job)
+
+        await asyncio.gather(*(limited(job_id, job) for job_id, job in jobs))
+        return len(jobs)
+
+    async def run(self) -> None:
+        """
+        Sends jobs until cancelled. Queue errors (e.g. Redis unavailable) are logged and retried.
+        """
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email worker error")
+                await asyncio.sleep(1)
+
+
+def create_worker() -> EmailWorker:
+    """
+    Creates the worker for the configured queue with a pool of SMTP connections.
+
+    :return: The worker.
+    :rtype: EmailWorker
+    """
+    return EmailWorker(get_email_queue(), SMTPPool(settings.email_worker_concurrency))
+
+
+async def main() -> None:
+    template_registry.load()
+    worker = create_worker()
+    try:
+        await worker.run()
+    finally:
+        await worker.transport.close()
+
+
+if __name__ == "__main__":
+    # Окремий процес-відправник: python -m src.services.email_worker
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
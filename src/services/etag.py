@@ -0,0 +1,69 @@
+import hashlib
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from src.schemas import Principal
+from src.services.auth import auth_service
+from src.services.cache import get_contacts_version
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """
+    Checks an If-None-Match header against an entity tag with the weak comparison.
+
+    :param etag: The current entity tag.
+    :type etag: str
+    :param if_none_match: The header value: "*" or a comma separated list of entity tags.
+    :type if_none_match: str | None
+    :return: Whether the client already has the current representation.
+    :rtype: bool
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class ContactsETag:
+    """
+    Dependency that makes contact reads conditional.
+
+    The entity tag is derived from the version of the owner's contacts, which
+    every write bumps, and from the request URL. The version includes the epoch
+    of its Redis key, so a lost key cannot bring back tags of older content. If the client sends a matching
+    If-None-Match, 304 Not Modified is returned before the route runs, so the
+    database is not queried. Otherwise the tag is set on the response.
+
+    The version is read before the route queries the database: a write in
+    between makes the tag older than the body, and the next request just gets
+    a full response again.
+    """
+
+    def __init__(self, daily: bool = False):
+        # Відповідь залежить від поточної дати (наприклад, найближчі дні народження)
+        self.daily = daily
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        current_user: Principal = Depends(auth_service.get_current_user),
+    ) -> str | None:
+        version = await get_contacts_version(current_user.id)
+        if version is None:
+            # Без Redis (або після невдалого збільшення версії) версія невідома, тож і перевіряти нічого
+            return None
+        key = f"{current_user.id}:{version}:{request.url.path}?{request.url.query}"
+        if self.daily:
+            key += f":{date.today().isoformat()}"
+        etag = f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+        if etag_matches(etag, request.headers.get("if-none-match")):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return etag
+
+
+contacts_etag = ContactsETag()
+birthdays_etag = ContactsETag(daily=True)
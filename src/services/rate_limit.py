@@ -0,0 +1,344 @@
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple
+
+from fastapi import Depends, HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.redis import get_redis
+from src.schemas import Principal
+from src.services.auth import auth_service
+
+RATE_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Відро токенів для кожного ключа: ємність ARGV[2i-1] токенів, повністю
+# наповнюється за ARGV[2i] мс. Запит проходить, лише якщо в усіх відрах є токен,
+# і тоді забирає по токену з кожного. Повертає 0 або скільки мс чекати.
+# RedisTokenBuckets викликає його з одним ключем: ключі різних відер лежать у різних слотах Redis Cluster
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[2 * i - 1])
+  local period = tonumber(ARGV[2 * i])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local level = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  level = math.min(capacity, level + math.max(0, now - ts) * capacity / period)
+  levels[i] = level
+  if level < 1 then
+    wait = math.max(wait, math.ceil((1 - level) * period / capacity))
+  end
+end
+if wait > 0 then
+  return wait
+end
+for i, key in ipairs(KEYS) do
+  redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'ts', now)
+  redis.call('PEXPIRE', key, ARGV[2 * i])
+end
+return 0
+"""
+
+# Повертає токен у відро KEYS[1] ємністю ARGV[1], якщо відро ще існує
+REFUND_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+  redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(tonumber(ARGV[1]), tokens + 1)))
+end
+return 0
+"""
+
+
+class RateLimit(NamedTuple):
+    times: int
+    seconds: float
+
+
+@lru_cache(maxsize=None)
+def parse_rate(value: str) -> RateLimit | None:
+    """
+    Parses a rate such as "10/minute".
+
+    :param value: "<times>/<second|minute|hour|day>", or an empty string for no limit.
+    :type value: str
+    :return: The limit, or None if there is none.
+    :rtype: RateLimit | None
+    :raises ValueError: If the value is malformed.
+    """
+    if not value:
+        return None
+    times, _, unit = value.partition("/")
+    if unit not in RATE_UNITS:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    return RateLimit(int(times), RATE_UNITS[unit])
+
+
+def get_limit(name: str, user_id: int | None = None) -> RateLimit | None:
+    """
+    Returns the limit of a route, taking per-user overrides into account.
+
+    Overrides are set in settings.rate_limit_user_overrides as
+    {"<name>:<user id>": "<rate>"}.
+
+    :param name: The name of the limit, e.g. "login" (settings.rate_limit_login).
+    :type name: str
+    :param user_id: The ID of the authenticated user, if any.
+    :type user_id: int | None
+    :return: The limit, or None if the route is not limited.
+    :rtype: RateLimit | None
+    """
+    value = None
+    if user_id is not None:
+        value = settings.rate_limit_user_overrides.get(f"{name}:{user_id}")
+    if value is None:
+        value = getattr(settings, f"rate_limit_{name}")
+    return parse_rate(value)
+
+
+class TokenBuckets:
+    """
+    In-process token buckets, one per key, bounded to maxsize keys (least
+    recently used are dropped).
+
+    Each worker holds its own buckets. They never let through more than the
+    shared limit, so a request they reject is rejected without asking Redis.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def _level(self, key: str, limit: RateLimit, now: float) -> float:
+        tokens, ts = self._buckets.get(key, (limit.times, now))
+        return min(limit.times, tokens + (now - ts) * limit.times / limit.seconds)
+
+    def acquire(self, items: list[tuple[str, RateLimit]], now: float | None = None) -> float:
+        """
+        Takes a token from every bucket, or from none of them if one is empty.
+
+        :param items: Pairs of bucket key and limit.
+        :type items: list[tuple[str, RateLimit]]
+        :param now: The monotonic time, for tests.
+        :type now: float | None
+        :return: 0 if the request is allowed, otherwise seconds until it would be.
+        :rtype: float
+        """
+        now = time.monotonic() if now is None else now
+        levels = [self._level(key, limit, now) for key, limit in items]
+        wait = max(
+            ((1 - level) * limit.seconds / limit.times for (_, limit), level in zip(items, levels) if level < 1),
+            default=0.0,
+        )
+        if wait:
+            return wait
+        for (key, _), level in zip(items, levels):
+            self._buckets[key] = (level - 1, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return 0.0
+
+    def refund(self, items: list[tuple[str, RateLimit]]) -> None:
+        """
+        Gives back the tokens of a request that was rejected by the shared limit.
+        """
+        for key, limit in items:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                self._buckets[key] = (min(limit.times, bucket[0] + 1), bucket[1])
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class RedisTokenBuckets:
+    """
+    Token buckets shared by all workers. Every bucket is taken by its own
+    atomic script call, so that the buckets of one check may live on different
+    Redis Cluster nodes; the calls of one check are sent in one pipeline.
+    """
+
+    def __init__(self):
+        self._script = None
+        self._refund = None
+
+    async def acquire(self, items: list[tuple[str, RateLimit]]) -> float:
+        """
+        Takes a token from every bucket in Redis, or from none of them if one is empty.
+
+        :param items: Pairs of bucket key and limit.
+        :type items: list[tuple[str, RateLimit]]
+        :return: 0 if the request is allowed, otherwise seconds until it would be.
+        :rtype: float
+        :raises RedisError: If Redis is unavailable.
+        """
+        client = get_redis()
+        if self._script is None:
+            # SHA скрипта рахується один раз; EVALSHA з переходом на EVAL при NOSCRIPT
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            self._refund = client.register_script(REFUND_SCRIPT)
+        async with client.pipeline(transaction=False) as pipe:
+            for key, limit in items:
+                await self._script(keys=[key], args=[limit.times, int(limit.seconds * 1000)], client=pipe)
+            waits = [int(wait_ms) for wait_ms in await pipe.execute()]
+        if not any(waits):
+            return 0.0
+        # Відхилений запит не має забирати токени з відер, де вони були
+        taken = [(key, limit) for (key, limit), wait_ms in zip(items, waits) if not wait_ms]
+        if taken:
+            async with client.pipeline(transaction=False) as pipe:
+                for key, limit in taken:
+                    await self._refund(keys=[key], args=[limit.times], client=pipe)
+                await pipe.execute()
+        return max(waits) / 1000
+
+
+class RateLimiter:
+    """
+    Checks requests against the in-process buckets first and then, with the
+    "redis" backend, against the shared buckets in Redis.
+
+    If Redis is unavailable, the request is allowed by the in-process buckets
+    alone (settings.rate_limit_fail_open) or rejected with 503.
+    """
+
+    def __init__(self):
+        self.local = TokenBuckets(settings.rate_limit_local_size)
+        self.remote = RedisTokenBuckets()
+        self.stats = {"allowed": 0, "denied_local": 0, "denied_remote": 0, "errors": 0}
+
+    async def acquire(self, items: list[tuple[str, RateLimit]]) -> float:
+        """
+        Takes a token for a request from all of the given buckets.
+
+        :param items: Pairs of bucket key and limit.
+        :type items: list[tuple[str, RateLimit]]
+        :return: 0 if the request is allowed, otherwise seconds until it would be.
+        :rtype: float
+        :raises HTTPException: 503 if Redis is unavailable and the limiter fails closed.
+        """
+        wait = self.local.acquire(items)
+        if wait:
+            self.stats["denied_local"] += 1
+            return wait
+        if settings.rate_limit_backend == "redis":
+            try:
+                wait = await self.remote.acquire(items)
+            except RedisError:
+                self.stats["errors"] += 1
+                if not settings.rate_limit_fail_open:
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Rate limiter unavailable"
+                    )
+            if wait:
+                self.local.refund(items)
+                self.stats["denied_remote"] += 1
+                return wait
+        self.stats["allowed"] += 1
+        return 0.0
+
+
+rate_limiter = RateLimiter()
+
+
+def client_address(request: Request) -> str:
+    """
+    Returns the address of the client a request came from.
+
+    Behind settings.rate_limit_trusted_proxies reverse proxies the peer is the
+    nearest proxy, so the address is taken from X-Forwarded-For, where every
+    proxy appends the address it received the request from. Only the entries
+    added by the trusted proxies are used; anything to the left of them may be
+    forged by the client.
+
+    :param request: The request.
+    :type request: Request
+    :return: The client's IP address, or "unknown".
+    :rtype: str
+    """
+    hops = settings.rate_limit_trusted_proxies
+    if hops > 0:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if forwarded:
+            # Коротший список означає, що запит пройшов не всі проксі: найлівіша адреса теж від довіреного
+            return forwarded[max(len(forwarded) - hops, 0)]
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimited:
+    """
+    Dependency that limits anonymous requests to a route by client address
+    and, optionally, by a form field (e.g. the login name, so that guessing a
+    password from many addresses is limited too).
+
+    The form field has a limit of its own, form_field_limit, which should be
+    well above the per-address one: anyone can send requests naming someone
+    else's account, and with the same limit they would lock its owner out.
+    """
+
+    def __init__(self, name: str, form_field: str | None = None, form_field_limit: str | None = None):
+        self.name = name
+        self.form_field = form_field
+        self.form_field_limit = form_field_limit or name
+
+    async def check(self, keys: list[tuple[str, str]], user_id: int | None = None) -> None:
+        """
+        Takes a token from the bucket of every key, or rejects the request.
+
+        :param keys: Pairs of limit name (see get_limit) and bucket key.
+        :type keys: list[tuple[str, str]]
+        :param user_id: The ID of the authenticated user, for per-user overrides.
+        :type user_id: int | None
+        :raises HTTPException: 429 with Retry-After if a bucket is empty.
+        """
+        if not settings.rate_limit_enabled:
+            return
+        items = []
+        for name, key in keys:
+            limit = get_limit(name, user_id)
+            if limit is not None:
+                # Хеш-тег за ключем розкладає відра різних клієнтів по слотах Redis Cluster
+                items.append((f"rl:{{{key}}}:{name}", limit))
+        if not items:
+            return
+        wait = await rate_limiter.acquire(items)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    async def __call__(self, request: Request) -> None:
+        keys = [(self.name, f"ip:{client_address(request)}")]
+        if self.form_field:
+            value = (await request.form()).get(self.form_field)
+            if isinstance(value, str) and value:
+                keys.append((self.form_field_limit, f"{self.form_field}:{value.lower()}"))
+        await self.check(keys)
+
+
+class UserRateLimited(RateLimited):
+    """
+    Dependency that limits requests of the authenticated user to a route.
+    """
+
+    async def __call__(self, current_user: Principal = Depends(auth_service.get_current_user)) -> None:
+        await self.check([(self.name, f"user:{current_user.id}")], current_user.id)
+
+
+login_rate_limit = RateLimited("login", form_field="username", form_field_limit="login_account")
+signup_rate_limit = RateLimited("signup")
+request_email_rate_limit = RateLimited("request_email")
+contacts_write_rate_limit = UserRateLimited("contacts_write")
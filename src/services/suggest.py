@@ -0,0 +1,202 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Iterable, NamedTuple
+
+from src.conf.config import settings
+from src.services.cache import ContactsVersion, TTLCache
+
+
+class Suggestion(NamedTuple):
+    id: int
+    first_name: str
+    last_name: str
+    email: str | None
+
+    @classmethod
+    def from_contact(cls, contact) -> "Suggestion":
+        return cls(contact.id, contact.first_name, contact.last_name, contact.email)
+
+
+def suggestion_order(suggestion: Suggestion) -> tuple:
+    """
+    Returns the sort key of suggestions; the database query orders them the same way.
+    """
+    return suggestion.first_name.lower(), suggestion.last_name.lower(), suggestion.id
+
+
+class SuggestIndex:
+    """
+    Sorted array of the lowercased first names, last names and emails of one
+    owner's contacts. A prefix lookup is a binary search plus a scan over the
+    matching keys.
+
+    The index is stamped with the version of the owner's contacts it was built
+    from (see src.services.cache.get_contacts_version).
+    """
+
+    def __init__(self, version: ContactsVersion, contacts: Iterable[Suggestion]):
+        self.version = version
+        self._contacts = {contact.id: contact for contact in contacts}
+        self._keys = sorted(key for contact in self._contacts.values() for key in self._keys_of(contact))
+
+    @staticmethod
+    def _keys_of(contact: Suggestion) -> list[tuple[str, int]]:
+        return [(value.lower(), contact.id) for value in (contact.first_name, contact.last_name, contact.email) if value]
+
+    def __len__(self) -> int:
+        return len(self._contacts)
+
+    def upsert(self, contact: Suggestion) -> None:
+        """
+        Adds a contact or replaces its previous values.
+
+        :param contact: The contact.
+        :type contact: Suggestion
+        """
+        self.remove(contact.id)
+        self._contacts[contact.id] = contact
+        for key in self._keys_of(contact):
+            insort(self._keys, key)
+
+    def remove(self, contact_id: int) -> None:
+        """
+        Removes a contact if it is in the index.
+
+        :param contact_id: The ID of the contact.
+        :type contact_id: int
+        """
+        contact = self._contacts.pop(contact_id, None)
+        if contact is None:
+            return
+        for key in self._keys_of(contact):
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def lookup(self, prefix: str, limit: int) -> list[Suggestion]:
+        """
+        Returns contacts whose first name, last name or email starts with the prefix.
+
+        :param prefix: The prefix, case-insensitive.
+        :type prefix: str
+        :param limit: The maximum number of contacts to return.
+        :type limit: int
+        :return: Matching contacts ordered by first name, last name and id.
+        :rtype: list[Suggestion]
+        """
+        prefix = prefix.lower()
+        ids = set()
+        i = bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+            ids.add(self._keys[i][1])
+            i += 1
+        return heapq.nsmallest(limit, (self._contacts[contact_id] for contact_id in ids), key=suggestion_order)
+
+
+class SuggestCache:
+    """
+    Suggest indexes of the owners recently served by this worker.
+
+    An index is only used while its version equals the current version of the
+    owner's contacts, so writes made by other workers are never missed; writes
+    made by this worker are applied to the index in place.
+
+    Besides the number of owners, the cache is bounded by the total number of
+    indexed contacts: adding an index evicts the least recently used ones
+    until the total fits. Owners with too many contacts to index are
+    remembered per version, so their requests go straight to the database.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_contacts: int = settings.suggest_cache_max_total_contacts):
+        self.max_contacts = max_contacts
+        self._indexes = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Власник -> версія, на якій його контактів виявилося забагато для індексу
+        self._too_large = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, owner_id: int, version: ContactsVersion) -> SuggestIndex | None:
+        """
+        Returns the index of an owner if it is up to date.
+
+        :param owner_id: The ID of the owner of the contacts.
+        :type owner_id: int
+        :param version: The current version of the owner's contacts.
+        :type version: ContactsVersion
+        :return: The index, or None.
+        :rtype: SuggestIndex | None
+        """
+        index = self._indexes.get(owner_id)
+        return index if index is not None and index.version == version else None
+
+    def put(self, owner_id: int, index: SuggestIndex) -> None:
+        """
+        Stores the index of an owner, evicting the least recently used indexes
+        while the total number of indexed contacts exceeds max_contacts.
+
+        :param owner_id: The ID of the owner of the contacts.
+        :type owner_id: int
+        :param index: The index.
+        :type index: SuggestIndex
+        """
+        self._indexes.pop(owner_id)
+        if len(index) > self.max_contacts:
+            return
+        indexes = self._indexes.items()
+        total = len(index) + sum(len(other) for _, other in indexes)
+        for other_id, other in indexes:
+            if total <= self.max_contacts:
+                break
+            self._indexes.pop(other_id)
+            total -= len(other)
+        self._indexes.set(owner_id, index)
+
+    def is_too_large(self, owner_id: int, version: ContactsVersion) -> bool:
+        """
+        Tells whether the owner had too many contacts to index at this version.
+        """
+        return self._too_large.get(owner_id) == version
+
+    def mark_too_large(self, owner_id: int, version: ContactsVersion) -> None:
+        self._too_large.set(owner_id, version)
+
+    def apply(
+        self, owner_id: int, version: ContactsVersion | None,
+        changed: Iterable[Suggestion] = (), removed: Iterable[int] = (), reset: bool = False
+    ) -> None:
+        """
+        Applies a write to the index of an owner (write-through).
+
+        The write must have moved the version exactly one step past the index;
+        otherwise some other write was missed and the index is dropped.
+
+        :param owner_id: The ID of the owner of the contacts.
+        :type owner_id: int
+        :param version: The version after the write, or None if it is unknown.
+        :type version: ContactsVersion | None
+        :param changed: Created or updated contacts.
+        :type changed: Iterable[Suggestion]
+        :param removed: IDs of deleted contacts.
+        :type removed: Iterable[int]
+        :param reset: Drop the index, when the write cannot be applied in place.
+        :type reset: bool
+        """
+        index = self._indexes.peek(owner_id)
+        if index is None:
+            return
+        if reset or version is None or not version.follows(index.version):
+            self._indexes.pop(owner_id)
+            return
+        for contact_id in removed:
+            index.remove(contact_id)
+        for contact in changed:
+            index.upsert(contact)
+        index.version = version
+
+    def clear(self) -> None:
+        self._indexes.clear()
+        self._too_large.clear()
+
+    def stats(self) -> dict:
+        return {**self._indexes.stats(), "contacts": sum(len(index) for _, index in self._indexes.items())}
+
+
+suggest_cache = SuggestCache(maxsize=settings.suggest_cache_size, ttl=settings.suggest_cache_ttl)
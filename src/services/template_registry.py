@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+TEMPLATE_FOLDER = Path(__file__).parent / "templates"
+
+
+class TemplateRegistry:
+    """
+    Compiled email templates, loaded once from a folder.
+
+    Templates are compiled by load() at startup and kept as Template objects, so
+    rendering does not touch the loader or the file system: no lookups, no
+    modification time checks and no recompilation.
+    """
+
+    def __init__(self, folder: Path):
+        self.environment = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,
+        )
+        self._templates: dict[str, Template] | None = None
+
+    def load(self) -> None:
+        """
+        Compiles every template of the folder.
+
+        :raises jinja2.TemplateSyntaxError: If a template is invalid.
+        """
+        self._templates = {name: self.environment.get_template(name) for name in self.environment.list_templates()}
+
+    @property
+    def names(self) -> list[str]:
+        if self._templates is None:
+            self.load()
+        return sorted(self._templates)
+
+    def get(self, name: str) -> Template:
+        """
+        Returns a compiled template.
+
+        :param name: The file name of the template.
+        :type name: str
+        :raises KeyError: If there is no such template.
+        :return: The template.
+        :rtype: Template
+        """
+        if self._templates is None:
+            self.load()
+        return self._templates[name]
+
+    def render(self, name: str, context: dict) -> str:
+        """
+        Renders a template.
+
+        :param name: The file name of the template.
+        :type name: str
+        :param context: The template variables.
+        :type context: dict
+        :raises KeyError: If there is no such template.
+        :return: The rendered text.
+        :rtype: str
+        """
+        return self.get(name).render(context)
+
+
+template_registry = TemplateRegistry(TEMPLATE_FOLDER)
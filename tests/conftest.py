@@ -1,3 +1,10 @@
+import inspect
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
@@ -6,6 +13,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import select
 
 from main import app
+from src.conf.config import settings
 from src.database.models import Base
 from src.database.db import get_db
 from src.database.models import User
@@ -14,6 +22,9 @@ from src.services.auth import auth_service
 
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
+# Тести входять у систему перед кожним тестом; ліміти вмикають лише тести обмежувача
+settings.rate_limit_enabled = False
+
 engine = create_async_engine(SQLALCHEMY_DATABASE_URL, future=True)
 
 TestingSessionLocal = sessionmaker(
@@ -105,3 +116,91 @@ async def logged_in_client(client, user, session):
 
     return ClientWithAuth(client, token)
 
+
+
+# Мікробенчмарки (позначка benchmark) запускаються лише з RUN_BENCHMARKS=1
+BENCHMARK_RESULTS: list[dict] = []
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("RUN_BENCHMARKS"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks run with RUN_BENCHMARKS=1")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not BENCHMARK_RESULTS or not os.environ.get("RUN_BENCHMARKS"):
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'name':<48} {'ops/s':>10} {'median, us':>11} {'min, us':>9} {'peak, KiB':>10} {'retained, B':>12}"
+    )
+    for result in BENCHMARK_RESULTS:
+        terminalreporter.write_line(
+            f"{result['name']:<48} {result['ops_per_sec']:>10.1f} {result['median_us']:>11.1f} "
+            f"{result['min_us']:>9.1f} {result['peak_kib']:>10.1f} {result['retained_bytes']:>12}"
+        )
+    if os.environ.get("BENCHMARK_JSON"):
+        with open(os.environ["BENCHMARK_JSON"], "w") as f:
+            json.dump(BENCHMARK_RESULTS, f, indent=2)
+
+
+class Benchmark:
+    """
+    Times a function over several rounds, in the manner of pytest-benchmark.
+
+    Rounds are timed without tracing; memory is measured afterwards over one
+    more call with tracemalloc: the peak allocated above the starting point
+    and what is still allocated after the call returns.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def __call__(self, func, *args, rounds: int | None = None, warmup: int = 3, **kwargs):
+        rounds = rounds or int(os.environ.get("BENCHMARK_ROUNDS", 200))
+
+        async def call():
+            result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        for _ in range(warmup):
+            await call()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            await call()
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            result = await call()
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        stats = {
+            "name": self.name,
+            "rounds": rounds,
+            "ops_per_sec": rounds / sum(timings),
+            "mean_us": statistics.fmean(timings) * 1e6,
+            "median_us": statistics.median(timings) * 1e6,
+            "min_us": min(timings) * 1e6,
+            "peak_kib": (peak - before) / 1024,
+            "retained_bytes": after - before,
+        }
+        BENCHMARK_RESULTS.append(stats)
+        self.stats = stats
+        return result
+
+
+@pytest.fixture
+def benchmark(request):
+    return Benchmark(request.node.name)
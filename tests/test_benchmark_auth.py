@@ -0,0 +1,75 @@
+import pytest
+
+from src.schemas import Principal
+from src.services.auth import auth_service, dump_principal, load_principal
+from src.services.cache import TTLCache
+
+PRINCIPAL = Principal(id=1, email="tony@stark.com", username="tony", confirmed=True, avatar=None)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_fixture_reports_speed_and_memory(benchmark):
+    result = await benchmark(lambda: [0] * 10000, rounds=5, warmup=0)
+    assert len(result) == 10000
+    assert benchmark.stats["rounds"] == 5
+    assert benchmark.stats["ops_per_sec"] > 0
+    # Список з 10000 посилань займає щонайменше 80 КБ
+    assert benchmark.stats["peak_kib"] >= 78
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_create_access_token(benchmark):
+    token = await benchmark(auth_service.create_access_token, {"sub": PRINCIPAL.email})
+    assert token
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_decode_access_token_cached(benchmark):
+    token = await auth_service.create_access_token({"sub": PRINCIPAL.email})
+    payload = await benchmark(auth_service.decode_access_token, token)
+    assert payload["sub"] == PRINCIPAL.email
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_decode_access_token_uncached(benchmark):
+    token = await auth_service.create_access_token({"sub": PRINCIPAL.email})
+
+    def decode():
+        auth_service.token_cache.clear()
+        return auth_service.decode_access_token(token)
+
+    assert (await benchmark(decode))["sub"] == PRINCIPAL.email
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_hash_password(benchmark):
+    hashed = await benchmark(auth_service.hash_password, "secret-password", rounds=5, warmup=1)
+    assert hashed.startswith("$2")
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_verify_password(benchmark):
+    hashed = await auth_service.hash_password("secret-password")
+    valid, _ = await benchmark(auth_service.verify_and_update_password, "secret-password", hashed, rounds=5, warmup=1)
+    assert valid
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_principal_cache_roundtrip(benchmark):
+    principal = await benchmark(lambda: load_principal(dump_principal(PRINCIPAL)))
+    assert principal == PRINCIPAL
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_ttl_cache_hit(benchmark):
+    cache = TTLCache(maxsize=1000, ttl=60)
+    for i in range(1000):
+        cache.set(f"user{i}", PRINCIPAL)
+    assert await benchmark(cache.get, "user500") is PRINCIPAL
@@ -0,0 +1,111 @@
+import itertools
+from datetime import date, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+
+from src.database.models import Contact, User, birthday_day_of_year
+from src.repository import contacts as repository_contacts
+from src.repository import users as repository_users
+from src.schemas import ContactCreate, ContactUpdate
+
+pytestmark = pytest.mark.benchmark
+
+CONTACTS = 1000
+_ids = itertools.count()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def owner(session):
+    user = User(email="bench@example.com", username="bench", password="x", confirmed=True)
+    session.add(user)
+    await session.commit()
+    today = date.today()
+    rows = []
+    for i in range(CONTACTS):
+        birthday = date(1980 + i % 30, 1, 1) + timedelta(days=(today.timetuple().tm_yday + i) % 365)
+        rows.append({
+            "first_name": f"Name{i % 100:03d}", "last_name": f"Surname{i % 250:03d}",
+            "email": f"c{i}@bench.example.com", "phone": f"+380{i:09d}",
+            "birthday": birthday, "birthday_doy": birthday_day_of_year(birthday), "owner_id": user.id,
+        })
+    await session.execute(insert(Contact), rows)
+    await session.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_get_contact(benchmark, session, owner):
+    contact = await benchmark(repository_contacts.get_contact, session, 10, owner.id)
+    assert contact is not None
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_page(benchmark, session, owner):
+    contacts, cursor = await benchmark(repository_contacts.get_contacts_page, session, owner_id=owner.id, limit=100)
+    assert len(contacts) == 100 and cursor
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_page_fields(benchmark, session, owner):
+    contacts, _ = await benchmark(
+        repository_contacts.get_contacts_page, session, owner_id=owner.id, limit=100, fields=["id", "email"]
+    )
+    assert len(contacts) == 100
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_offset(benchmark, session, owner):
+    contacts = await benchmark(repository_contacts.get_contacts, session, owner_id=owner.id, skip=500, limit=100)
+    assert len(contacts) == 100
+
+
+@pytest.mark.asyncio
+async def test_search_contacts(benchmark, session, owner):
+    contacts, _ = await benchmark(repository_contacts.search_contacts, session, "Surname012", owner_id=owner.id)
+    assert contacts
+
+
+@pytest.mark.asyncio
+async def test_get_upcoming_birthdays(benchmark, session, owner):
+    contacts = await benchmark(repository_contacts.get_upcoming_birthdays, session, owner_id=owner.id)
+    assert contacts
+
+
+@pytest.mark.asyncio
+async def test_find_contacts_by_prefix(benchmark, session, owner):
+    suggestions = await benchmark(repository_contacts.find_contacts_by_prefix, session, owner_id=owner.id, prefix="nam")
+    assert suggestions
+
+
+@pytest.mark.asyncio
+async def test_create_contact(benchmark, session, owner):
+    async def create():
+        contact = ContactCreate(
+            first_name="New", last_name="Contact", email=f"new{next(_ids)}@example.com", phone="+380000000000"
+        )
+        return await repository_contacts.create_contact(session, contact, owner_id=owner.id)
+
+    assert (await benchmark(create)).id
+
+
+@pytest.mark.asyncio
+async def test_update_contact(benchmark, session, owner):
+    async def update():
+        body = ContactUpdate(additional_data=f"note {next(_ids)}")
+        return await repository_contacts.update_contact(session, 20, body, owner_id=owner.id)
+
+    assert (await benchmark(update)) is not None
+
+
+@pytest.mark.asyncio
+async def test_get_user_by_email(benchmark, session, owner):
+    user = await benchmark(repository_users.get_user_by_email, owner.email, session)
+    assert user.id == owner.id
+
+
+@pytest.mark.asyncio
+async def test_update_token(benchmark, session, owner):
+    await benchmark(repository_users.update_token, owner, "token", session)
+    assert owner.refresh_token == "token"
@@ -0,0 +1,104 @@
+import logging
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from src.conf.config import settings
+from src.database.profiling import (
+    ProfilingMiddleware, TRACE_HEADER, attribute_trace, enable_profiling, find_trace, parameters_shape,
+)
+from src.routes.debug import read_query_trace, read_recent_query_traces
+from src.schemas import Principal
+from tests.conftest import engine
+
+
+def test_parameters_shape_hides_values():
+    assert parameters_shape({"email": "a@b.com", "id": 1}) == {"email": "str", "id": "int"}
+    assert parameters_shape(("a@b.com", None)) == ["str", "NoneType"]
+    assert parameters_shape([(1, "a"), (2, "b")], executemany=True) == {"rows": 2, "row": ["int", "str"]}
+
+
+@pytest.fixture
+def profiled_app():
+    enable_profiling(engine)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        # Так трасування позначає auth_service.get_current_user
+        attribute_trace(1)
+        async with engine.connect() as conn:
+            for _ in range(3):
+                await conn.execute(text("SELECT :id"), {"id": item_id})
+        return {"id": item_id}
+
+    @app.get("/stream")
+    async def stream_items():
+        async def body():
+            async with engine.connect() as conn:
+                for i in range(3):
+                    await conn.execute(text("SELECT :id"), {"id": i})
+                    yield f"{i}\n"
+
+        return StreamingResponse(body())
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_request_trace(profiled_app, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "db_max_statements_per_request", 2)
+    async with AsyncClient(transport=ASGITransport(app=profiled_app), base_url="http://test") as client:
+        with caplog.at_level(logging.WARNING, logger="src.database.profiling"):
+            response = await client.get("/items/7")
+
+    assert response.status_code == 200
+    assert response.headers["x-query-count"] == "3"
+    trace = find_trace(int(response.headers[TRACE_HEADER]))
+    assert trace.route == "/items/{item_id}"
+    assert trace.statements[0]["parameters"] == ["int"]
+    assert trace.repeated() == [("SELECT ?", 3)]
+    assert "GET /items/{item_id} issued 3 SQL statements; repeated 3 times: SELECT ?" in caplog.text
+
+    owner = Principal(id=1, email="tony@stark.com")
+    stranger = Principal(id=2, email="steve@rogers.com")
+    assert trace.user_id == 1
+    assert (await read_query_trace(trace.id, current_user=owner))["count"] == 3
+    assert trace.id in [entry["id"] for entry in await read_recent_query_traces(current_user=owner)]
+    assert trace.id not in [entry["id"] for entry in await read_recent_query_traces(current_user=stranger)]
+    for trace_id, user in ((-1, owner), (trace.id, stranger)):
+        with pytest.raises(HTTPException) as e:
+            await read_query_trace(trace_id, current_user=user)
+        assert e.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_streamed_statements_are_counted_after_the_response(profiled_app, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "db_max_statements_per_request", 2)
+    async with AsyncClient(transport=ASGITransport(app=profiled_app), base_url="http://test") as client:
+        with caplog.at_level(logging.WARNING, logger="src.database.profiling"):
+            response = await client.get("/stream")
+
+    assert response.text == "0\n1\n2\n"
+    # Заголовки надіслано до тіла: у них лише робота до початку відповіді
+    assert response.headers["x-query-count"] == "0"
+    trace = find_trace(int(response.headers[TRACE_HEADER]))
+    assert trace.to_dict()["count"] == 3
+    assert trace.to_dict()["before_response"] == 0
+    assert "GET /stream issued 3 SQL statements" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_logged(monkeypatch, caplog):
+    enable_profiling(engine)
+    monkeypatch.setattr(settings, "db_slow_query_ms", 0)
+    with caplog.at_level(logging.WARNING, logger="src.database.profiling"):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT :value"), {"value": "secret"})
+
+    assert "in background task: SELECT ? parameters=['str']" in caplog.text
+    assert "secret" not in caplog.text
@@ -1,7 +1,10 @@
+import json
 import pytest
+from datetime import date, timedelta
 from httpx import AsyncClient
 from sqlalchemy import select
 from src.database.models import User, Contact
+from src.repository.pagination import encode_cursor
 from src.schemas import ContactCreate, ContactUpdate
 
 @pytest.mark.asyncio
@@ -22,6 +25,36 @@ async def test_read_all_contacts(logged_in_client):
     data = response.json()
     assert any(c["id"] == pytest.contact_id for c in data)
 
+@pytest.mark.asyncio
+async def test_read_all_contacts_by_cursor(logged_in_client):
+    client = await logged_in_client
+    contact_data = {"first_name": "Happy", "last_name": "Hogan", "email": "happy@stark.com", "phone": "123456789"}
+    response = await client.post("/api/contacts/", json=contact_data)
+    happy_id = response.json()["id"]
+
+    seen = []
+    params = {"limit": 1}
+    while True:
+        response = await client.get("/api/contacts/", params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(c["id"] for c in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params["cursor"] = next_cursor
+    assert seen == sorted(seen)
+    assert {pytest.contact_id, happy_id} <= set(seen)
+
+    response = await client.get("/api/contacts/", params={"skip": 1, "limit": 1})
+    assert response.status_code == 200, response.text
+    assert [c["id"] for c in response.json()] == seen[1:2]
+
+    for params in ({"limit": 0}, {"limit": -1}, {"limit": 1001}, {"skip": -1}):
+        response = await client.get("/api/contacts/", params=params)
+        assert response.status_code == 422, params
+
+    await client.delete(f"/api/contacts/{happy_id}")
+
 @pytest.mark.asyncio
 async def test_read_single_contact(logged_in_client):
     client = await logged_in_client
@@ -47,6 +80,59 @@ async def test_search_contacts(logged_in_client):
     data = response.json()
     assert any(c["id"] == pytest.contact_id for c in data)
 
+@pytest.mark.asyncio
+async def test_search_contacts_pages(logged_in_client):
+    client = await logged_in_client
+    ids = []
+    for name in ("Howard", "Maria", "Morgan"):
+        contact_data = {"first_name": name, "last_name": "Stark", "email": f"{name.lower()}@stark.com",
+                        "phone": "123456789"}
+        response = await client.post("/api/contacts/", json=contact_data)
+        ids.append(response.json()["id"])
+
+    seen = []
+    params = {"query": "stark", "limit": 2}
+    while True:
+        response = await client.get("/api/contacts/search/", params=params)
+        assert response.status_code == 200, response.text
+        assert len(response.json()) <= 2
+        seen.extend(c["id"] for c in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params["cursor"] = next_cursor
+    assert len(seen) == len(set(seen))
+    assert set(ids) <= set(seen)
+
+    response = await client.get("/api/contacts/search/", params={"query": "stark", "cursor": "bad"})
+    assert response.status_code == 400
+    # У SQLite (FTS5, bm25) сторінки йдуть за зсувом, а не за оцінкою
+    response = await client.get("/api/contacts/search/", params={"query": "stark", "cursor": encode_cursor(-1)})
+    assert response.status_code == 400
+
+    for contact_id in ids:
+        await client.delete(f"/api/contacts/{contact_id}")
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays(logged_in_client):
+    client = await logged_in_client
+    birthday = (date.today() + timedelta(days=3)).replace(year=2000)
+    contact_data = {"first_name": "Pepper", "last_name": "Potts", "email": "pepper@stark.com",
+                    "phone": "987654321", "birthday": birthday.isoformat()}
+    response = await client.post("/api/contacts/", json=contact_data)
+    assert response.status_code == 201, response.text
+    pepper_id = response.json()["id"]
+
+    response = await client.get("/api/contacts/birthdays/")
+    assert response.status_code == 200, response.text
+    assert any(c["id"] == pepper_id for c in response.json())
+
+    response = await client.get("/api/contacts/birthdays/", params={"days": 1})
+    assert response.status_code == 200, response.text
+    assert all(c["id"] != pepper_id for c in response.json())
+
+    await client.delete(f"/api/contacts/{pepper_id}")
+
 @pytest.mark.asyncio
 async def test_delete_contact(logged_in_client):
     client = await logged_in_client
@@ -55,6 +141,204 @@ async def test_delete_contact(logged_in_client):
     data = response.json()
     assert data["id"] == pytest.contact_id
 
+@pytest.mark.asyncio
+async def test_import_contacts(logged_in_client, monkeypatch):
+    from src.services import contacts_import
+    from tests.conftest import TestingSessionLocal
+
+    monkeypatch.setattr(contacts_import, "AsyncSessionLocal", TestingSessionLocal)
+    client = await logged_in_client
+    body = (
+        "first_name,last_name,email,phone,birthday\n"
+        "Natasha,Romanoff,natasha@shield.com,111,1984-11-22\n"
+        "Clint,Barton,not-an-email,222,\n"
+        "Natalie,Rushman,natasha@shield.com,333,\n"
+    )
+    response = await client.post("/api/contacts/import", params={"format": "csv"}, content=body.encode())
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    entries = [json.loads(line) for line in response.text.splitlines()]
+    assert entries[-1] == {"summary": {"created": 1, "duplicate": 1, "invalid": 1, "failed": 0}}
+
+    response = await client.get("/api/contacts/search/", params={"query": "Romanoff"})
+    natasha = response.json()[0]
+    assert natasha["birthday"] == "1984-11-22"
+
+    body = '{"first_name": "Nick", "last_name": "Fury", "email": "nick@shield.com", "phone": "444"}\n'
+    response = await client.post("/api/contacts/import", params={"format": "jsonl"}, content=body.encode())
+    assert response.status_code == 200, response.text
+    assert json.loads(response.text.splitlines()[-1])["summary"]["created"] == 1
+
+    response = await client.post("/api/contacts/import", params={"format": "xml"}, content=b"")
+    assert response.status_code == 422
+
+    response = await client.get("/api/contacts/search/", params={"query": "shield"})
+    for contact in response.json():
+        await client.delete(f"/api/contacts/{contact['id']}")
+
+@pytest.mark.asyncio
+async def test_batch_update_and_delete(logged_in_client):
+    client = await logged_in_client
+    ids = []
+    for i in range(3):
+        response = await client.post("/api/contacts/", json={
+            "first_name": f"Agent{i}", "last_name": "Coulson", "email": f"agent{i}@shield.com", "phone": "000"
+        })
+        ids.append(response.json()["id"])
+
+    response = await client.patch("/api/contacts/batch", json={"ids": ids[:2] + [999999], "values": {"phone": "555"}})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"ids": ids[:2], "count": 2}
+    response = await client.get(f"/api/contacts/{ids[0]}")
+    assert response.json()["phone"] == "555"
+
+    response = await client.patch("/api/contacts/batch", json={"ids": ids, "values": {"email": "same@shield.com"}})
+    assert response.status_code == 422
+    response = await client.post("/api/contacts/batch/delete", json={"ids": ids, "filter": {"last_name": "Coulson"}})
+    assert response.status_code == 422
+
+    response = await client.post("/api/contacts/batch/delete", json={"filter": {"last_name": "Coulson"}})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"ids": ids, "count": 3}
+    response = await client.get(f"/api/contacts/{ids[2]}")
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_contacts_etag(logged_in_client):
+    client = await logged_in_client
+    response = await client.get("/api/contacts/")
+    assert response.status_code == 200, response.text
+    etag = response.headers["etag"]
+
+    response = await client.get("/api/contacts/", headers={**client.headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    response = await client.get("/api/contacts/birthdays/", headers={**client.headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    response = await client.post("/api/contacts/", json={
+        "first_name": "Maria", "last_name": "Hill", "email": "maria@shield.com", "phone": "000"
+    })
+    contact_id = response.json()["id"]
+    response = await client.get("/api/contacts/", headers={**client.headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert any(c["id"] == contact_id for c in response.json())
+
+    await client.delete(f"/api/contacts/{contact_id}")
+
+@pytest.mark.asyncio
+async def test_fast_json_responses(logged_in_client, monkeypatch):
+    from src.conf.config import settings
+
+    client = await logged_in_client
+    response = await client.get("/api/contacts/", params={"limit": 1})
+    expected, expected_cursor = response.json(), response.headers.get("x-next-cursor")
+
+    monkeypatch.setattr(settings, "fast_json_responses", True)
+    response = await client.get("/api/contacts/", params={"limit": 1})
+    assert response.status_code == 200, response.text
+    assert response.json() == expected
+    assert response.headers.get("x-next-cursor") == expected_cursor
+    assert "etag" in response.headers
+
+@pytest.mark.asyncio
+async def test_contacts_sparse_fields(logged_in_client):
+    client = await logged_in_client
+    response = await client.post("/api/contacts/", json={
+        "first_name": "Phil", "last_name": "Coulson", "email": "phil@shield.com", "phone": "000",
+        "additional_data": "x" * 1000
+    })
+    contact_id = response.json()["id"]
+
+    response = await client.get("/api/contacts/", params={"fields": "last_name,first_name"})
+    assert response.status_code == 200, response.text
+    assert {"id": contact_id, "first_name": "Phil", "last_name": "Coulson"} in response.json()
+    assert all(set(c) == {"id", "first_name", "last_name"} for c in response.json())
+
+    response = await client.get("/api/contacts/search/", params={"query": "Coulson", "fields": "email"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"id": contact_id, "email": "phil@shield.com"}]
+
+    response = await client.get("/api/contacts/", params={"fields": "first_name,password"})
+    assert response.status_code == 400
+
+    await client.delete(f"/api/contacts/{contact_id}")
+
+@pytest.mark.asyncio
+async def test_suggest_contacts(logged_in_client, monkeypatch):
+    from src.conf.config import settings
+    from src.services.suggest import suggest_cache
+
+    client = await logged_in_client
+    response = await client.post("/api/contacts/", json={
+        "first_name": "Melinda", "last_name": "May", "email": "may@shield.com", "phone": "000"
+    })
+    melinda_id = response.json()["id"]
+
+    response = await client.get("/api/contacts/suggest", params={"prefix": "mel"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"id": melinda_id, "first_name": "Melinda", "last_name": "May",
+                                "email": "may@shield.com"}]
+
+    # Запис цього воркера потрапляє в індекс без перебудови
+    response = await client.post("/api/contacts/", json={
+        "first_name": "Mack", "last_name": "Alphonso", "email": "mack@shield.com", "phone": "000"
+    })
+    mack_id = response.json()["id"]
+    response = await client.get("/api/contacts/suggest", params={"prefix": "MA"})
+    assert [c["id"] for c in response.json()] == [mack_id, melinda_id]
+
+    # Забагато контактів для індексу: рішення запам'ятовується до наступного запису
+    monkeypatch.setattr(settings, "suggest_cache_max_contacts", 1)
+    suggest_cache.clear()
+    for _ in range(2):
+        response = await client.get("/api/contacts/suggest", params={"prefix": "ma"})
+        assert [c["id"] for c in response.json()] == [mack_id, melinda_id]
+    assert suggest_cache.stats()["size"] == 0
+    assert suggest_cache._too_large.stats()["size"] == 1
+
+    monkeypatch.setattr(settings, "suggest_cache_size", 0)
+    suggest_cache.clear()
+    response = await client.get("/api/contacts/suggest", params={"prefix": "ma"})
+    assert [c["id"] for c in response.json()] == [mack_id, melinda_id]
+
+    response = await client.get("/api/contacts/suggest", params={"prefix": ""})
+    assert response.status_code == 422
+
+    await client.delete(f"/api/contacts/{melinda_id}")
+    await client.delete(f"/api/contacts/{mack_id}")
+
+@pytest.mark.asyncio
+async def test_export_contacts(logged_in_client, monkeypatch):
+    from src.services import contacts_export
+    from tests.conftest import TestingSessionLocal
+
+    monkeypatch.setattr(contacts_export, "AsyncSessionLocal", TestingSessionLocal)
+    client = await logged_in_client
+    response = await client.get("/api/contacts/export", params={"format": "csv"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="contacts.csv"' in response.headers["content-disposition"]
+    lines = response.text.splitlines()
+    assert lines[0] == "id,first_name,last_name,email,phone,birthday,additional_data"
+
+    response = await client.get("/api/contacts/export", params={"format": "vcard"},
+                                headers={**client.headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.count("BEGIN:VCARD") == len(lines) - 1
+
+    response = await client.get("/api/contacts/export", params={"format": "csv"},
+                                headers={**client.headers, "Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in response.headers
+    assert response.text.splitlines() == lines
+
+    response = await client.get("/api/contacts/export", params={"format": "xml"})
+    assert response.status_code == 422
+
 @pytest.mark.asyncio
 async def test_contact_not_found(logged_in_client):
     client = await logged_in_client
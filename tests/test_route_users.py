@@ -1,5 +1,6 @@
 import io
 import pytest
+from PIL import Image
 from unittest.mock import patch
 from src.database.models import User
 
@@ -21,83 +22,93 @@ async def test_read_users_me(logged_in_client, user):
         data = response.json()
         assert data["email"] == user["email"]
         assert data["username"] == user["username"]
+        assert data["created_at"] is not None
+
+
+@pytest.fixture
+def local_avatars(tmp_path, monkeypatch):
+    from src.conf.config import settings
+    from src.services import avatar
+    from tests.conftest import TestingSessionLocal
+
+    monkeypatch.setattr(settings, "avatar_storage", "local")
+    monkeypatch.setattr(avatar, "_storages", {"local": avatar.LocalStorage(tmp_path, "/media/avatars")})
+    monkeypatch.setattr(avatar, "AsyncSessionLocal", TestingSessionLocal)
+    return tmp_path
 
 
 @pytest.mark.asyncio
-async def test_update_avatar_user(logged_in_client, user):
+async def test_update_avatar_user(logged_in_client, user, local_avatars):
     client = await logged_in_client
 
-    dummy_file = io.BytesIO(b"fake image data")
-    dummy_file.name = "avatar.png"
+    dummy_file = io.BytesIO()
+    Image.new("RGB", (800, 400), "red").save(dummy_file, "PNG")
+    dummy_file.seek(0)
 
-    with patch("src.services.auth.auth_service.get_current_user") as mock_get_user, \
-         patch("cloudinary.uploader.upload") as mock_upload, \
-         patch("cloudinary.CloudinaryImage.build_url", return_value="http://fake.url/avatar.png"):
+    response = await client.patch(
+        "/api/users/avatar",
+        files={"file": ("avatar.png", dummy_file, "image/png")},
+    )
 
-        mock_get_user.return_value = User(
-            id=1,
-            username=user["username"],
-            email=user["email"],
-            avatar=None,
-            confirmed=True,
-        )
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
 
-        response = await client.patch(
-            "/api/users/avatar",
-            files={"file": ("avatar.png", dummy_file, "image/png")},
-        )
+    # Фонове завдання виконується до завершення запиту в ASGITransport
+    response = await client.get("/api/users/avatar/status")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "done"
+    assert data["avatar"].startswith("/media/avatars/")
 
-        assert response.status_code == 200
-        data = response.json()
-        assert data["email"] == user["email"]
-        assert "http://fake.url/avatar.png" in data["avatar"]
+    stored = list(local_avatars.iterdir())
+    assert len(stored) == 1
+    with Image.open(stored[0]) as image:
+        assert image.size == (250, 250)
+
+    response = await client.get("/api/users/me/")
+    assert response.json()["avatar"] == data["avatar"]
 
-        mock_upload.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_update_avatar_user_returns_user(logged_in_client, user, session):
-    """
-    Test that update_avatar_user returns the user object (covers line 61)
-    """
+async def test_update_avatar_user_too_large(logged_in_client, local_avatars, monkeypatch):
+    from src.conf.config import settings
+
     client = await logged_in_client
+    monkeypatch.setattr(settings, "avatar_max_bytes", 10)
 
-    dummy_file = io.BytesIO(b"fake image data")
-    dummy_file.name = "avatar.png"
+    response = await client.patch(
+        "/api/users/avatar",
+        files={"file": ("avatar.png", io.BytesIO(b"x" * 11), "image/png")},
+    )
 
-    with patch("src.services.auth.auth_service.get_current_user") as mock_get_user, \
-         patch("cloudinary.uploader.upload") as mock_upload, \
-         patch("cloudinary.CloudinaryImage.build_url", return_value="http://fake.url/avatar.png"), \
-         patch("src.repository.users.update_avatar") as mock_update_avatar:
+    assert response.status_code == 413
+    assert list(local_avatars.iterdir()) == []
 
 
-        mock_user_with_avatar = User(
-            id=1,
-            username=user["username"],
-            email=user["email"],
-            avatar="http://fake.url/avatar.png",
-            confirmed=True,
-        )
-        
-        mock_get_user.return_value = User(
-            id=1,
-            username=user["username"],
-            email=user["email"],
-            avatar=None,
-            confirmed=True,
-        )
-        
-        mock_update_avatar.return_value = mock_user_with_avatar
+@pytest.mark.asyncio
+async def test_update_avatar_user_body_too_large(logged_in_client, local_avatars, monkeypatch):
+    from src.conf.config import settings
 
-        response = await client.patch(
-            "/api/users/avatar",
-            files={"file": ("avatar.png", dummy_file, "image/png")},
-        )
+    client = await logged_in_client
+    monkeypatch.setattr(settings, "avatar_max_bytes", 10)
 
+    # Тіло набагато більше за ліміт відхиляється за Content-Length, ще до розбору форми
+    response = await client.patch(
+        "/api/users/avatar",
+        files={"file": ("avatar.png", io.BytesIO(b"x" * 200 * 1024), "image/png")},
+    )
 
-        assert response.status_code == 200
-        data = response.json()
-        assert data["avatar"] == "http://fake.url/avatar.png"
-        assert data["email"] == user["email"]
-        
-        mock_update_avatar.assert_called_once()
-        mock_upload.assert_called_once()
\ No newline at end of file
+    assert response.status_code == 413
+    assert list(local_avatars.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_update_avatar_user_not_an_image(logged_in_client, local_avatars):
+    client = await logged_in_client
+
+    response = await client.patch(
+        "/api/users/avatar",
+        files={"file": ("avatar.txt", io.BytesIO(b"text"), "text/plain")},
+    )
+
+    assert response.status_code == 415
@@ -1,10 +1,16 @@
+from datetime import datetime
+
 import pytest
-from unittest.mock import MagicMock, patch
-from jose import jwt
+from unittest.mock import AsyncMock, MagicMock, patch
+from jose import JWTError, jwt
 from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from redis.exceptions import ConnectionError as RedisConnectionError
 
-from src.services.auth import auth_service, Auth
+from src.services.auth import auth_service, Auth, dump_principal, load_principal, PRINCIPAL_CACHE_VERSION
 from src.database.models import User
+from src.schemas import Principal
+from src.services.cache import principal_cache
 
 SECRET_KEY = auth_service.SECRET_KEY
 ALGORITHM = auth_service.ALGORITHM
@@ -81,8 +87,126 @@ async def test_get_current_user_from_db():
     async def fake_get_user_by_email(email, db):
         return fake_user
 
+    principal_cache.clear()
     with patch("src.services.auth.repository_users.get_user_by_email", new=fake_get_user_by_email):
         token = await auth_service.create_access_token({"sub": "test@example.com"})
         user = await auth_service.get_current_user(token=token, db=None)
+        assert isinstance(user, Principal)
+        assert user.email == "test@example.com"
+        assert user.username == "testuser"
+
+@pytest.mark.asyncio
+async def test_get_current_user_from_cache():
+    cached_user = Principal(id=1, username="cached", email="cached@example.com", confirmed=True)
+    mock_redis = MagicMock()
+    mock_redis.get = AsyncMock(return_value=dump_principal(cached_user))
+    principal_cache.clear()
+
+    with patch("src.services.auth.get_redis", return_value=mock_redis), \
+         patch("src.services.auth.repository_users.get_user_by_email", new=AsyncMock()) as mock_get_user:
+        token = await auth_service.create_access_token({"sub": "cached@example.com"})
+        user = await auth_service.get_current_user(token=token, db=None)
+        assert user.username == "cached"
+        mock_get_user.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_redis_unavailable():
+    fake_user = User(id=1, username="testuser", email="test@example.com", confirmed=True)
+    mock_redis = MagicMock()
+    mock_redis.get = AsyncMock(side_effect=RedisConnectionError("down"))
+    mock_redis.set = AsyncMock(side_effect=RedisConnectionError("down"))
+    principal_cache.clear()
+
+    with patch("src.services.auth.get_redis", return_value=mock_redis), \
+         patch("src.services.auth.repository_users.get_user_by_email", new=AsyncMock(return_value=fake_user)):
+        token = await auth_service.create_access_token({"sub": "test@example.com"})
+        user = await auth_service.get_current_user(token=token, db=None)
         assert user.email == "test@example.com"
-        assert user.username == "testuser"
\ No newline at end of file
+        mock_redis.set.assert_awaited_once()
+        assert mock_redis.set.await_args.kwargs["ex"] == auth_service.USER_CACHE_TTL
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_from_local_cache():
+    principal = Principal(id=1, username="local", email="local@example.com", confirmed=True)
+    principal_cache.set("local@example.com", principal)
+    mock_redis = MagicMock()
+    mock_redis.get = AsyncMock()
+
+    with patch("src.services.auth.get_redis", return_value=mock_redis):
+        token = await auth_service.create_access_token({"sub": "local@example.com"})
+        user = await auth_service.get_current_user(token=token, db=None)
+        assert user is principal
+        mock_redis.get.assert_not_awaited()
+
+
+def test_principal_cache_round_trip():
+    principal = Principal(
+        id=7, email="a@example.com", username="alice", confirmed=True, avatar=None,
+        created_at=datetime(2024, 5, 1, 12, 30),
+    )
+    raw = dump_principal(principal)
+    assert b"password" not in raw
+    assert load_principal(raw) == principal
+    assert load_principal(dump_principal(principal.copy(update={"created_at": None}))).created_at is None
+
+
+def test_load_principal_rejects_other_versions():
+    raw = dump_principal(Principal(id=7, email="a@example.com", username="alice", confirmed=True))
+    assert load_principal(raw.replace(str(PRINCIPAL_CACHE_VERSION).encode(), b"999", 1)) is None
+    assert load_principal(b"\x80\x04garbage") is None
+
+
+@pytest.mark.asyncio
+async def test_decode_access_token_is_cached():
+    token = await auth_service.create_access_token({"sub": "cache@example.com"}, expires_delta=60)
+    auth_service.token_cache.clear()
+    hits = auth_service.token_cache.hits
+
+    with patch("src.services.auth.jwt.decode", wraps=jwt.decode) as mock_decode:
+        first = auth_service.decode_access_token(token)
+        second = auth_service.decode_access_token(token)
+
+    assert first == second
+    assert first["sub"] == "cache@example.com"
+    mock_decode.assert_called_once()
+    assert auth_service.token_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_decode_access_token_expired_not_cached():
+    token = await auth_service.create_access_token({"sub": "cache@example.com"}, expires_delta=-1)
+    auth_service.token_cache.clear()
+
+    with pytest.raises(JWTError):
+        auth_service.decode_access_token(token)
+    assert len(auth_service.token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_hash_password_in_executor():
+    hashed = await auth_service.hash_password("mypassword")
+    valid, new_hash = await auth_service.verify_and_update_password("mypassword", hashed)
+    assert valid
+    assert new_hash is None
+    valid, _ = await auth_service.verify_and_update_password("wrong", hashed)
+    assert not valid
+
+
+@pytest.mark.asyncio
+async def test_verify_and_update_password_rehashes_old_cost():
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("mypassword")
+    valid, new_hash = await auth_service.verify_and_update_password("mypassword", old_hash)
+    assert valid
+    assert new_hash is not None
+    assert auth_service.verify_password("mypassword", new_hash)
+    assert not auth_service.pwd_context.needs_update(new_hash)
+
+
+@pytest.mark.asyncio
+async def test_password_queue_full():
+    with patch("src.services.auth.settings.password_hash_queue_size", 0):
+        with pytest.raises(HTTPException) as excinfo:
+            await auth_service.hash_password("mypassword")
+    assert excinfo.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
@@ -0,0 +1,142 @@
+import io
+import os
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from httpx import ASGITransport, AsyncClient
+from PIL import Image, UnidentifiedImageError
+from unittest.mock import AsyncMock, patch
+
+from src.conf.config import settings
+from src.services import avatar
+from src.services.avatar import (
+    AvatarImage, AvatarUploadLimitMiddleware, CloudinaryStorage, LocalStorage, resize_avatar, save_upload,
+)
+
+
+def _upload(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="avatar.png")
+
+
+@pytest.mark.asyncio
+async def test_save_upload_streams_to_temp_file():
+    data = os.urandom(avatar.UPLOAD_CHUNK_SIZE * 2 + 10)
+    path = await save_upload(_upload(data), max_bytes=len(data))
+    try:
+        with open(path, "rb") as f:
+            assert f.read() == data
+    finally:
+        os.unlink(path)
+
+
+@pytest.mark.asyncio
+async def test_save_upload_rejects_large_file_and_cleans_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(avatar.tempfile, "tempdir", str(tmp_path))
+    with pytest.raises(HTTPException) as e:
+        await save_upload(_upload(b"x" * (avatar.UPLOAD_CHUNK_SIZE + 1)), max_bytes=avatar.UPLOAD_CHUNK_SIZE)
+    assert e.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_save_upload_rejects_empty_file():
+    with pytest.raises(HTTPException) as e:
+        await save_upload(_upload(b""), max_bytes=10)
+    assert e.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_upload_limit_stops_streamed_body(monkeypatch):
+    monkeypatch.setattr(settings, "avatar_max_bytes", 10)
+    app = FastAPI()
+    app.add_middleware(AvatarUploadLimitMiddleware, path="/avatar")
+    received = []
+
+    @app.patch("/avatar")
+    async def upload(file: UploadFile = File()):
+        return {"size": len(await file.read())}
+
+    async def body():
+        # Без Content-Length: тіло надходить частинами
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n\r\n"
+        for _ in range(10):
+            received.append(1)
+            yield b"x" * avatar.MULTIPART_OVERHEAD
+        yield b"\r\n--b--\r\n"
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.patch(
+            "/avatar", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+        )
+
+    assert response.status_code == 413
+    assert len(received) < 10
+
+
+def test_resize_crops_to_square(tmp_path):
+    path = tmp_path / "upload.png"
+    Image.new("RGB", (800, 400), "red").save(path)
+    image = resize_avatar(str(path), 250)
+    assert image.content_type in ("image/webp", "image/jpeg")
+    with Image.open(io.BytesIO(image.data)) as result:
+        assert result.size == (250, 250)
+
+
+def test_resize_rejects_non_images(tmp_path):
+    path = tmp_path / "upload"
+    path.write_bytes(b"not an image")
+    with pytest.raises(UnidentifiedImageError):
+        resize_avatar(str(path), 250)
+
+
+@pytest.mark.asyncio
+async def test_local_storage_overwrites_by_name(tmp_path):
+    storage = LocalStorage(tmp_path, "/media/avatars/")
+    first = await storage.save("../tony", AvatarImage(b"one", "image/png"))
+    second = await storage.save("../tony", AvatarImage(b"two", "image/png"))
+
+    assert first != second
+    [stored] = list(tmp_path.iterdir())
+    assert stored.suffix == ".png"
+    assert stored.read_bytes() == b"two"
+    assert second.startswith(f"/media/avatars/{stored.name}?v=")
+
+
+@pytest.mark.asyncio
+async def test_cloudinary_storage_uploads_versioned_image():
+    with patch("cloudinary.uploader.upload", return_value={"version": 42}) as upload:
+        url = await CloudinaryStorage().save("tony", AvatarImage(b"data", "image/webp"))
+
+    args, kwargs = upload.call_args
+    assert args[0].read() == b"data"
+    assert kwargs["public_id"] == "NotesApp/tony"
+    assert "/v42/NotesApp/tony" in url
+
+
+@pytest.mark.asyncio
+async def test_process_avatar_failure_sets_status_and_removes_file(tmp_path):
+    path = tmp_path / "upload"
+    Image.new("RGB", (10, 10)).save(path, "PNG")
+    storage = AsyncMock()
+    storage.save.side_effect = RuntimeError("storage down")
+
+    with patch.object(avatar, "get_avatar_storage", return_value=storage), \
+         patch.object(avatar, "set_avatar_status", new_callable=AsyncMock) as set_status, \
+         patch.object(avatar.repository_users, "update_avatar", new_callable=AsyncMock) as update_avatar:
+        await avatar.process_avatar(1, "tony@stark.com", "tony", str(path))
+
+    set_status.assert_awaited_once_with(1, "failed", detail="Avatar processing failed")
+    update_avatar.assert_not_awaited()
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_process_avatar_unsupported_image(tmp_path):
+    path = tmp_path / "upload"
+    path.write_bytes(b"not an image")
+
+    with patch.object(avatar, "set_avatar_status", new_callable=AsyncMock) as set_status:
+        await avatar.process_avatar(1, "tony@stark.com", "tony", str(path))
+
+    set_status.assert_awaited_once_with(1, "failed", detail="Unsupported image")
+    assert not path.exists()
@@ -0,0 +1,120 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.services.cache import (
+    TTLCache, principal_cache, invalidate_user, user_cache_key, USER_CACHE_CHANNEL,
+    get_contacts_version, bump_contacts_version, contacts_version_key,
+)
+
+
+def test_ttl_cache_get_set():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b", "missing") == "missing"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=60)
+    with patch("src.services.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+    with patch("src.services.cache.time.monotonic", return_value=1010.0):
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user():
+    principal_cache.set("test@example.com", object())
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis = MagicMock()
+    mock_redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    mock_redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("src.services.cache.get_redis", return_value=mock_redis):
+        await invalidate_user("test@example.com")
+
+    assert principal_cache.get("test@example.com") is None
+    pipe.delete.assert_called_once_with(user_cache_key("test@example.com"))
+    pipe.publish.assert_called_once_with(USER_CACHE_CHANNEL, "test@example.com")
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_redis_unavailable():
+    principal_cache.set("test@example.com", object())
+    mock_redis = MagicMock()
+    mock_redis.pipeline.return_value.__aenter__ = AsyncMock(side_effect=RedisConnectionError("down"))
+    mock_redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("src.services.cache.get_redis", return_value=mock_redis):
+        await invalidate_user("test@example.com")
+
+    assert principal_cache.get("test@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_contacts_version():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    client = fakeredis.FakeAsyncRedis()
+    with patch("src.services.cache.get_redis", return_value=client):
+        initial = await get_contacts_version(7)
+        assert initial.number == 0
+        bumped = await bump_contacts_version(7)
+        assert bumped.follows(initial)
+        assert await get_contacts_version(7) == bumped
+
+        # Ключ втрачено (перезапуск Redis, витіснення): лічильник з нуля, але з новою епохою
+        await client.delete(contacts_version_key(7))
+        restarted = await get_contacts_version(7)
+        assert restarted.number == 0 and restarted.epoch != initial.epoch
+        assert str(restarted) != str(initial)
+
+
+@pytest.mark.asyncio
+async def test_failed_contacts_version_bump_is_retried():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    client = fakeredis.FakeAsyncRedis()
+    broken = MagicMock()
+    broken.pipeline.return_value.__aenter__ = AsyncMock(side_effect=RedisConnectionError("down"))
+    broken.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("src.services.cache.get_redis", return_value=client):
+        before = await bump_contacts_version(7)
+    with patch("src.services.cache.get_redis", return_value=broken):
+        assert await bump_contacts_version(7) is None
+        broken.hmget = AsyncMock(return_value=[before.epoch.encode(), b"1"])
+        # Стара версія не повертається, поки збільшення не вдасться
+        assert await get_contacts_version(7) is None
+    with patch("src.services.cache.get_redis", return_value=client):
+        after = await get_contacts_version(7)
+        assert after.follows(before)
+        assert await get_contacts_version(7) == after
+
+
+@pytest.mark.asyncio
+async def test_contacts_version_redis_unavailable():
+    mock_redis = MagicMock()
+    mock_redis.hmget = AsyncMock(side_effect=RedisConnectionError("down"))
+
+    with patch("src.services.cache.get_redis", return_value=mock_redis):
+        assert await get_contacts_version(7) is None
@@ -0,0 +1,84 @@
+import gzip
+import json
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.contacts_export import _vcard_escape, _vcard_fold, _vcard_lines, accepts_gzip, export_contacts
+
+ROWS = [
+    (1, "Tony", "Stark", "tony@stark.com", "123", date(1970, 5, 29), "Iron, Man; CEO"),
+    (2, "Pepper", "Potts", "pepper@stark.com", None, None, None),
+]
+
+
+def make_db(partitions):
+    async def iter_partitions():
+        for rows in partitions:
+            yield rows
+
+    result = MagicMock()
+    result.partitions = iter_partitions
+    db = MagicMock()
+    db.stream = AsyncMock(return_value=result)
+    db.__aenter__.return_value = db
+    return db
+
+
+async def collect(iterator):
+    return b"".join([chunk async for chunk in iterator])
+
+
+def test_vcard_escape():
+    assert _vcard_escape("a,b;c\\d\ne") == "a\\,b\;c\\\\d\\ne"
+
+
+def test_vcard_fold():
+    line = "NOTE:" + "я" * 60
+    folded = _vcard_fold(line)
+    parts = folded.rstrip("\r\n").split("\r\n ")
+    assert "".join(parts) == line
+    assert all(len(part.encode()) <= 75 for part in parts)
+
+
+def test_vcard_lines():
+    card = next(_vcard_lines(ROWS[:1]))
+    assert card.startswith("BEGIN:VCARD\r\nVERSION:4.0\r\n")
+    assert "N:Stark;Tony;;;\r\n" in card
+    assert "BDAY:19700529\r\n" in card
+    assert "NOTE:Iron\\, Man\; CEO\r\n" in card
+    assert card.endswith("END:VCARD\r\n")
+
+
+@pytest.mark.asyncio
+async def test_export_csv_header_once():
+    db = make_db([ROWS[:1], ROWS[1:]])
+    with patch("src.services.contacts_export.AsyncSessionLocal", return_value=db):
+        data = (await collect(export_contacts(1, "csv"))).decode()
+    lines = data.splitlines()
+    assert lines[0] == "id,first_name,last_name,email,phone,birthday,additional_data"
+    assert lines[1] == '1,Tony,Stark,tony@stark.com,123,1970-05-29,"Iron, Man; CEO"'
+    assert lines[2] == "2,Pepper,Potts,pepper@stark.com,,,"
+    db.__aexit__.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_export_jsonl_gzip():
+    db = make_db([ROWS])
+    with patch("src.services.contacts_export.AsyncSessionLocal", return_value=db):
+        data = gzip.decompress(await collect(export_contacts(1, "jsonl", compress=True)))
+    records = [json.loads(line) for line in data.splitlines()]
+    assert records[0]["birthday"] == "1970-05-29"
+    assert records[1]["email"] == "pepper@stark.com"
+    db.__aexit__.assert_awaited_once()
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, GZIP;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip;q=0.0, *;q=1")
+    assert not accepts_gzip("*;q=0")
@@ -0,0 +1,112 @@
+import json
+import pytest
+from sqlalchemy.exc import OperationalError
+from unittest.mock import AsyncMock, patch
+
+from src.services.contacts_import import iter_lines, iter_csv_records, iter_jsonl_records, import_contacts
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_chunks():
+    data = "﻿first\r\nсекунда\nthird".encode()
+    assert await collect(iter_lines(chunked(data, 3))) == ["first", "секунда", "third"]
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_records():
+    data = (
+        b'first_name,last_name,email,phone,birthday\n'
+        b'Tony,Stark,tony@stark.com,123,\n'
+        b'"Multi\nline",Name,multi@stark.com,456,1970-05-29\n'
+        b'Too,Few\n'
+    )
+    records = await collect(iter_csv_records(iter_lines(chunked(data, 7))))
+    assert records[0] == (1, {"first_name": "Tony", "last_name": "Stark", "email": "tony@stark.com",
+                              "phone": "123", "birthday": None}, None)
+    assert records[1][1]["first_name"] == "Multi\nline"
+    assert records[2][0] == 3
+    assert records[2][1] is None
+    assert records[2][2] is not None
+
+
+@pytest.mark.asyncio
+async def test_iter_jsonl_records():
+    data = b'{"first_name": "Tony"}\n\nnot json\n[1]\n'
+    records = await collect(iter_jsonl_records(iter_lines(chunked(data, 5))))
+    assert records[0] == (1, {"first_name": "Tony"}, None)
+    assert records[1][0] == 2 and records[1][2].startswith("Invalid JSON")
+    assert records[2] == (3, None, "Expected a JSON object")
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_batches_and_reports():
+    lines = [
+        {"first_name": "A", "last_name": "A", "email": "a@example.com", "phone": "1"},
+        {"first_name": "B", "last_name": "B", "email": "not-an-email", "phone": "2"},
+        {"first_name": "C", "last_name": "C", "email": "c@example.com", "phone": "3"},
+        {"first_name": "D", "last_name": "D", "email": "d@example.com", "phone": "4"},
+    ]
+    data = "\n".join(json.dumps(line) for line in lines).encode()
+    mock_bulk_create = AsyncMock(side_effect=[{"a@example.com"}, {"d@example.com"}])
+
+    with patch("src.services.contacts_import.bulk_create_contacts", mock_bulk_create), \
+         patch("src.services.contacts_import.settings.import_batch_size", 2):
+        entries = await collect(import_contacts(None, chunked(data, 10), "jsonl", owner_id=1))
+
+    summary = {"created": 2, "duplicate": 1, "invalid": 1, "failed": 0}
+    assert mock_bulk_create.await_count == 2
+    assert entries[0]["row"] == 2 and entries[0]["status"] == "invalid"
+    assert entries[1] == {"row": 3, "status": "duplicate", "email": "c@example.com"}
+    assert entries[2] == {"progress": {"row": 3, "created": 1, "duplicate": 1, "invalid": 1, "failed": 0}}
+    assert entries[-1] == {"summary": summary}
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_reports_before_the_body_ends():
+    received = []
+
+    async def body():
+        for i in range(4):
+            received.append(i)
+            yield json.dumps({"first_name": "A", "last_name": "A", "email": f"{i}@example.com", "phone": "1"}).encode()
+            yield b"\n"
+
+    mock_bulk_create = AsyncMock(side_effect=lambda db, contacts, owner_id: {c.email for c in contacts})
+    with patch("src.services.contacts_import.bulk_create_contacts", mock_bulk_create), \
+         patch("src.services.contacts_import.settings.import_batch_size", 2):
+        entries = import_contacts(None, body(), "jsonl", owner_id=1)
+        first = await anext(entries)
+        assert first == {"progress": {"row": 2, "created": 2, "duplicate": 0, "invalid": 0, "failed": 0}}
+        assert received == [0, 1]
+        assert (await collect(entries))[-1] == {"summary": {"created": 4, "duplicate": 0, "invalid": 0, "failed": 0}}
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_reports_failed_batch_and_continues():
+    lines = [
+        {"first_name": "A", "last_name": "A", "email": "a@example.com", "phone": "1"},
+        {"first_name": "B", "last_name": "B", "email": "b@example.com", "phone": "2" * 21},
+        {"first_name": "C", "last_name": "C", "email": "c@example.com", "phone": "3"},
+    ]
+    data = "\n".join(json.dumps(line) for line in lines).encode()
+    db = AsyncMock()
+    mock_bulk_create = AsyncMock(side_effect=[OperationalError("INSERT", {}, Exception("deadlock")), {"c@example.com"}])
+
+    with patch("src.services.contacts_import.bulk_create_contacts", mock_bulk_create), \
+         patch("src.services.contacts_import.settings.import_batch_size", 1):
+        entries = await collect(import_contacts(db, chunked(data, 10), "jsonl", owner_id=1))
+
+    db.rollback.assert_awaited_once()
+    # Задовгий телефон відсіюється валідацією, а не падає в базі
+    assert entries[0] == {"row": 1, "status": "failed", "email": "a@example.com"}
+    assert entries[2]["row"] == 2 and entries[2]["status"] == "invalid"
+    assert entries[-1] == {"summary": {"created": 1, "duplicate": 0, "invalid": 1, "failed": 1}}
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch, AsyncMock
-from fastapi_mail.errors import ConnectionErrors
+from redis.exceptions import ConnectionError as RedisConnectionError
 from src.services import email
+from src.services.email_queue import LocalEmailQueue
 from pydantic import EmailStr
 
 
@@ -9,12 +10,18 @@ from pydantic import EmailStr
 async def test_send_email_success():
     test_email = EmailStr("test@example.com")
     test_username = "testuser"
-    test_host = "http://testhost"
-
+    test_host = "http://testhost/"
+    queue = LocalEmailQueue()
 
-    with patch("src.services.email.FastMail.send_message", new_callable=AsyncMock) as mock_send:
+    with patch("src.services.email_queue.get_email_queue", return_value=queue):
         await email.send_email(test_email, test_username, test_host)
-        mock_send.assert_awaited_once()
+
+    [(job_id, job)] = await queue.get(10, 0)
+    assert job["to"] == test_email
+    assert job["template"] == "email_template.html"
+    assert job["context"]["username"] == test_username
+    assert job["context"]["host"] == test_host
+    assert job["context"]["token"]
 
 
 @pytest.mark.asyncio
@@ -24,8 +31,8 @@ async def test_send_email_exception():
     test_host = "http://testhost"
 
 
-    with patch("src.services.email.FastMail.send_message", new_callable=AsyncMock) as mock_send:
-        mock_send.side_effect = ConnectionErrors("SMTP connection error")
+    with patch("src.services.email.enqueue_email", new_callable=AsyncMock) as mock_enqueue:
+        mock_enqueue.side_effect = RedisConnectionError("Redis connection error")
 
         await email.send_email(test_email, test_username, test_host)
-        mock_send.assert_awaited_once()
+        mock_enqueue.assert_awaited_once()
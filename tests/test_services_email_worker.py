@@ -0,0 +1,159 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.conf.config import settings
+from src.services.email_queue import EmailQueue, LocalEmailQueue, RedisEmailQueue, OUTBOX_STREAM, DELAYED_SET, DEAD_STREAM
+from src.services.email_worker import EmailWorker
+from src.database.redis import get_redis
+
+JOB = {
+    "to": "test@example.com",
+    "subject": "Confirm your email",
+    "template": "email_template.html",
+    "context": {"host": "http://testhost/", "username": "<b>testuser</b>", "token": "abc"},
+    "attempts": 0,
+}
+
+
+class FakeTransport:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.sent = []
+
+    async def send(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("SMTP unavailable")
+        self.sent.append(message)
+
+
+@pytest.mark.asyncio
+async def test_worker_sends_rendered_message():
+    queue = LocalEmailQueue()
+    transport = FakeTransport()
+    worker = EmailWorker(queue, transport)
+    await queue.put(JOB)
+
+    assert await worker.run_once(timeout=0) == 1
+
+    [message] = transport.sent
+    assert message["To"] == "test@example.com"
+    body = message.get_content()
+    assert "http://testhost/api/auth/confirmed_email/abc" in body
+    assert "&lt;b&gt;testuser&lt;/b&gt;" in body
+    assert await queue.depth() == {"ready": 0, "pending": 0, "delayed": 0, "dead": 0}
+    assert worker.stats["sent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_with_backoff_then_gives_up(monkeypatch):
+    monkeypatch.setattr(settings, "email_max_attempts", 2)
+    monkeypatch.setattr(settings, "email_retry_base_delay", 0)
+    queue = LocalEmailQueue()
+    worker = EmailWorker(queue, FakeTransport(failures=5))
+    await queue.put(JOB)
+
+    await worker.run_once(timeout=0)
+    assert (await queue.depth())["delayed"] == 1
+    await worker.run_once(timeout=0)
+
+    assert await queue.depth() == {"ready": 0, "pending": 0, "delayed": 0, "dead": 1}
+    assert queue.dead_letters[0]["attempts"] == 2
+    assert worker.stats == {"sent": 0, "retried": 1, "failed": 1}
+
+
+def test_retry_delay(monkeypatch):
+    monkeypatch.setattr(settings, "email_retry_base_delay", 5)
+    monkeypatch.setattr(settings, "email_retry_max_delay", 30)
+    worker = EmailWorker(LocalEmailQueue(), FakeTransport())
+    assert [worker.retry_delay(n) for n in (1, 2, 3, 4, 5)] == [5, 10, 20, 30, 30]
+
+
+@pytest.mark.asyncio
+async def test_redis_queue_roundtrip():
+    r = get_redis()
+    await r.delete(OUTBOX_STREAM, DELAYED_SET, DEAD_STREAM)
+    queue = RedisEmailQueue(consumer="test")
+    await queue.put(JOB)
+    await queue.put({**JOB, "to": "other@example.com"})
+
+    jobs = await queue.get(10, 0.1)
+    assert [job["to"] for _, job in jobs] == ["test@example.com", "other@example.com"]
+    assert (await queue.depth())["pending"] == 2
+
+    await queue.ack(jobs[0][0])
+    await queue.retry(jobs[1][0], {**jobs[1][1], "attempts": 1}, delay=0)
+    assert await queue.depth() == {"ready": 0, "pending": 0, "delayed": 1, "dead": 0}
+
+    [(job_id, job)] = await queue.get(10, 0.1)
+    assert job["attempts"] == 1
+    await queue.dead(job_id, job, "boom")
+    assert await queue.depth() == {"ready": 0, "pending": 0, "delayed": 0, "dead": 1}
+    await r.delete(OUTBOX_STREAM, DELAYED_SET, DEAD_STREAM)
+
+
+@pytest.mark.asyncio
+async def test_redis_queue_recovers_pending_jobs():
+    r = get_redis()
+    await r.delete(OUTBOX_STREAM)
+    queue = RedisEmailQueue(consumer="crashed")
+    await queue.put(JOB)
+    [(job_id, _)] = await queue.get(10, 0.1)
+
+    # Той самий споживач після перезапуску знову отримує непідтверджену задачу
+    queue._recovering = True
+    [(recovered_id, job)] = await queue.get(10, 0.1)
+    assert recovered_id == job_id
+    assert job["to"] == "test@example.com"
+    await r.delete(OUTBOX_STREAM)
+
+
+@pytest.mark.asyncio
+async def test_redis_queue_claims_jobs_of_dead_consumers(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr("src.services.email_queue.get_redis", lambda: client)
+    crashed = RedisEmailQueue(consumer="gone-for-good")
+    await crashed.put(JOB)
+    [(job_id, _)] = await crashed.get(10, 0.1)
+
+    monkeypatch.setattr(settings, "email_claim_idle", 60)
+    other = RedisEmailQueue(consumer="survivor")
+    assert await other.get(10, 0.1) == []
+
+    # Задача висить довше за email_claim_idle: її забирає інший споживач
+    monkeypatch.setattr(settings, "email_claim_idle", 0)
+    other._next_claim = 0.0
+    [(claimed_id, job)] = await other.get(10, 0.1)
+    assert claimed_id == job_id
+    assert job["to"] == "test@example.com"
+    await other.ack(claimed_id)
+    assert (await other.depth())["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_reuses_connections():
+    from unittest.mock import MagicMock
+    from src.services.email_worker import SMTPPool, aiosmtplib
+
+    smtp = MagicMock(is_connected=True)
+    smtp.connect = AsyncMock()
+    smtp.send_message = AsyncMock(side_effect=[None, aiosmtplib.SMTPServerDisconnected("bye"), None])
+    with patch("src.services.email_worker.aiosmtplib.SMTP", return_value=smtp) as smtp_class:
+        pool = SMTPPool(size=2)
+        await pool.send(MagicMock())
+        await pool.send(MagicMock())
+
+    # Друге повідомлення: розірване сервером з'єднання замінено новим, повтор успішний
+    assert smtp_class.call_count == 2
+    assert smtp.send_message.await_count == 3
+
+
+def test_queue_backend_must_implement_every_method():
+    class Incomplete(EmailQueue):
+        async def put(self, job: dict) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
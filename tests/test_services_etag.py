@@ -0,0 +1,10 @@
+from src.services.etag import etag_matches
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('"abc"', '"xyz", "abc"')
+    assert etag_matches('"abc"', "*")
+    assert not etag_matches('"abc"', '"xyz"')
+    assert not etag_matches('"abc"', None)
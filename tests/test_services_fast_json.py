@@ -0,0 +1,39 @@
+import json
+from datetime import date
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from src.database.models import Contact
+from src.schemas import Contact as ContactSchema
+from src.services.fast_json import contacts_response, dumps, project_contacts
+
+CONTACTS = [
+    Contact(id=1, first_name="Tony", last_name="Stark", email="tony@stark.com", phone="123",
+            birthday=date(1970, 5, 29), additional_data="Ірон мен", owner_id=1),
+    Contact(id=2, first_name="Pepper", last_name="Potts", email="pepper@stark.com", phone="456", owner_id=1),
+]
+
+
+def test_project_contacts_matches_schema():
+    expected = jsonable_encoder([ContactSchema.from_orm(contact) for contact in CONTACTS])
+    assert json.loads(dumps(project_contacts(CONTACTS))) == expected
+
+
+def test_dumps():
+    data = dumps({"birthday": date(1970, 5, 29), "name": "Ірон"})
+    assert data == '{"birthday":"1970-05-29","name":"Ірон"}'.encode()
+
+
+def test_contacts_response_keeps_headers():
+    injected = Response()
+    injected.headers["ETag"] = '"abc"'
+    response = contacts_response(CONTACTS, injected)
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["content-type"] == "application/json"
+    assert int(response.headers["content-length"]) == len(response.body)
+
+
+def test_project_contacts_fields():
+    assert project_contacts(CONTACTS[:1], ["id", "email"]) == [{"id": 1, "email": "tony@stark.com"}]
+    assert project_contacts(CONTACTS[:1], ["id"]) == [{"id": 1}]
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import text
+
+from src.conf.config import settings
+from src.services import metrics
+from src.services.metrics import Registry, RequestStats, instrument_engine, observe_redis, request_stats
+from tests.conftest import engine
+
+
+@pytest.mark.asyncio
+async def test_render_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", ("status",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    requests.inc("200")
+    requests.inc("200")
+    requests.inc('5"00')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    @registry.collector
+    async def collect():
+        return [("queue_jobs", "gauge", "Jobs.", [("queue_jobs", {"state": "ready"}, 3)])]
+
+    lines = (await registry.render()).splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{status="200"} 2' in lines
+    assert 'requests_total{status="5\\"00"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+    assert 'queue_jobs{state="ready"} 3' in lines
+
+
+def test_observe_redis_records_outcome():
+    before = metrics.redis_command_duration.count("get", "error")
+    with pytest.raises(ConnectionError):
+        with observe_redis("get"):
+            raise ConnectionError
+    assert metrics.redis_command_duration.count("get", "error") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_statements_are_counted_per_request():
+    instrument_engine(engine)
+    instrument_engine(engine)
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+    finally:
+        request_stats.reset(token)
+    # Повторна реєстрація не подвоює підрахунок
+    assert stats.statements == 2
+    assert stats.statement_time > 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    response = await client.get("/api/contacts/123")
+    assert response.status_code == 401
+
+    response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/api/contacts/{contact_id}",status="401"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/contacts/{contact_id}"}' in body
+    assert "http_requests_in_flight 1" in body
+    assert 'cache_hits_total{cache="principal"}' in body
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/metrics", "/api/metrics/db"])
+async def test_metrics_require_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "metrics_token", "")
+    response = await client.get(path, headers={"Authorization": "Bearer anything"})
+    assert response.status_code == 404
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    response = await client.get(path)
+    assert response.status_code == 401
+    response = await client.get(path, headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 401
+    response = await client.get(path, headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
@@ -0,0 +1,168 @@
+import pytest
+from fastapi import HTTPException, Request
+from redis.exceptions import ConnectionError as RedisConnectionError
+from unittest.mock import AsyncMock, patch
+
+from src.conf.config import settings
+from src.services import rate_limit
+from src.services.rate_limit import RateLimit, RateLimiter, TokenBuckets, client_address, get_limit, parse_rate
+
+try:
+    import lupa  # noqa: F401 — fakeredis виконує Lua лише з lupa
+except ImportError:
+    lupa = None
+
+PER_SECOND = RateLimit(2, 1)
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == RateLimit(10, 60)
+    assert parse_rate("") is None
+    with pytest.raises(ValueError):
+        parse_rate("10/fortnight")
+
+
+def test_user_override(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_contacts_write", "5/minute")
+    monkeypatch.setattr(settings, "rate_limit_user_overrides", {"contacts_write:7": "50/minute"})
+    assert get_limit("contacts_write", 7) == RateLimit(50, 60)
+    assert get_limit("contacts_write", 8) == RateLimit(5, 60)
+    assert get_limit("contacts_write") == RateLimit(5, 60)
+
+
+def test_token_bucket_refills():
+    buckets = TokenBuckets(10)
+    items = [("a", PER_SECOND)]
+    assert buckets.acquire(items, now=0) == 0
+    assert buckets.acquire(items, now=0) == 0
+    assert buckets.acquire(items, now=0) == pytest.approx(0.5)
+    assert buckets.acquire(items, now=0.5) == 0
+
+
+def test_token_bucket_multi_key_is_all_or_nothing():
+    buckets = TokenBuckets(10)
+    buckets.acquire([("a", RateLimit(1, 60))], now=0)
+
+    assert buckets.acquire([("a", RateLimit(1, 60)), ("b", RateLimit(1, 60))], now=0) > 0
+    # "b" не витратився, бо "a" відмовив
+    assert buckets.acquire([("b", RateLimit(1, 60))], now=0) == 0
+
+
+def test_token_bucket_is_bounded():
+    buckets = TokenBuckets(2)
+    for key in "abc":
+        buckets.acquire([(key, PER_SECOND)], now=0)
+    assert len(buckets._buckets) == 2
+
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_locally_without_redis(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_backend", "redis")
+    limiter = RateLimiter()
+    limiter.remote.acquire = AsyncMock(return_value=0)
+    items = [("k", RateLimit(1, 60))]
+
+    assert await limiter.acquire(items) == 0
+    assert await limiter.acquire(items) > 0
+    assert limiter.remote.acquire.await_count == 1
+    assert limiter.stats["denied_local"] == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_refunds_local_token_on_remote_rejection(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_backend", "redis")
+    limiter = RateLimiter()
+    limiter.remote.acquire = AsyncMock(side_effect=[3.0, 0])
+    items = [("k", RateLimit(1, 60))]
+
+    assert await limiter.acquire(items) == 3.0
+    assert await limiter.acquire(items) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fail_open", [True, False])
+async def test_limiter_redis_outage(monkeypatch, fail_open):
+    monkeypatch.setattr(settings, "rate_limit_backend", "redis")
+    monkeypatch.setattr(settings, "rate_limit_fail_open", fail_open)
+    limiter = RateLimiter()
+    limiter.remote.acquire = AsyncMock(side_effect=RedisConnectionError)
+
+    if fail_open:
+        assert await limiter.acquire([("k", PER_SECOND)]) == 0
+    else:
+        with pytest.raises(HTTPException) as e:
+            await limiter.acquire([("k", PER_SECOND)])
+        assert e.value.status_code == 503
+    assert limiter.stats["errors"] == 1
+
+
+@pytest.mark.skipif(lupa is None, reason="fakeredis needs lupa for Lua scripts")
+@pytest.mark.asyncio
+async def test_redis_script():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    client = fakeredis.FakeAsyncRedis()
+    with patch.object(rate_limit, "get_redis", return_value=client):
+        buckets = rate_limit.RedisTokenBuckets()
+        items = [("a", RateLimit(1, 60)), ("b", RateLimit(5, 60))]
+        assert await buckets.acquire(items) == 0
+        assert await buckets.acquire(items) > 0
+        assert float(await client.hget("b", "tokens")) == pytest.approx(4, abs=0.01)
+        # Відхилений запит повертає токен відру, яке його пропустило
+        assert float(await client.hget("a", "tokens")) == pytest.approx(0, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_login_is_limited(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_backend", "memory")
+    monkeypatch.setattr(settings, "rate_limit_login", "2/minute")
+    rate_limit.rate_limiter.local.clear()
+
+    form = {"username": "nobody@example.com", "password": "wrong"}
+    for _ in range(2):
+        response = await client.post("/api/auth/login", data=form)
+        assert response.status_code == 401
+    response = await client.post("/api/auth/login", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    rate_limit.rate_limiter.local.clear()
+
+
+@pytest.mark.asyncio
+async def test_login_account_has_its_own_limit(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_backend", "memory")
+    monkeypatch.setattr(settings, "rate_limit_login", "2/minute")
+    monkeypatch.setattr(settings, "rate_limit_login_account", "3/minute")
+    monkeypatch.setattr(settings, "rate_limit_trusted_proxies", 1)
+    rate_limit.rate_limiter.local.clear()
+
+    form = {"username": "nobody@example.com", "password": "wrong"}
+    # Ліміт адреси не зупиняє перебір з різних адрес, але ліміт облікового запису вищий за нього
+    for address in ("1.1.1.1", "1.1.1.1", "2.2.2.2"):
+        response = await client.post("/api/auth/login", data=form, headers={"X-Forwarded-For": address})
+        assert response.status_code == 401
+    response = await client.post("/api/auth/login", data=form, headers={"X-Forwarded-For": "3.3.3.3"})
+    assert response.status_code == 429
+    rate_limit.rate_limiter.local.clear()
+
+
+def _request(peer: str, *forwarded: str) -> Request:
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+def test_client_address(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_trusted_proxies", 0)
+    assert client_address(_request("10.0.0.1", "1.1.1.1")) == "10.0.0.1"
+
+    monkeypatch.setattr(settings, "rate_limit_trusted_proxies", 1)
+    assert client_address(_request("10.0.0.1", "1.1.1.1")) == "1.1.1.1"
+    # Підроблені клієнтом адреси стоять лівіше за ту, що додав проксі
+    assert client_address(_request("10.0.0.1", "6.6.6.6, 1.1.1.1")) == "1.1.1.1"
+    assert client_address(_request("10.0.0.1")) == "10.0.0.1"
+
+    monkeypatch.setattr(settings, "rate_limit_trusted_proxies", 2)
+    assert client_address(_request("10.0.0.2", "6.6.6.6, 1.1.1.1", "10.0.0.1")) == "1.1.1.1"
+    assert client_address(_request("10.0.0.2", "1.1.1.1")) == "1.1.1.1"
@@ -0,0 +1,82 @@
+from src.services.cache import ContactsVersion
+from src.services.suggest import Suggestion, SuggestIndex, SuggestCache
+
+TONY = Suggestion(1, "Tony", "Stark", "tony@stark.com")
+PEPPER = Suggestion(2, "Pepper", "Potts", "pepper@stark.com")
+PETER = Suggestion(3, "Peter", "Parker", "spidey@queens.com")
+
+
+def v(number: int, epoch: str = "e1") -> ContactsVersion:
+    return ContactsVersion(epoch, number)
+
+
+def test_suggest_index_lookup():
+    index = SuggestIndex(v(1), [TONY, PEPPER, PETER])
+    assert index.lookup("PE", 10) == [PEPPER, PETER]
+    assert index.lookup("p", 10) == [PEPPER, PETER]
+    assert index.lookup("st", 10) == [TONY]
+    assert index.lookup("tony@", 10) == [TONY]
+    assert index.lookup("pe", 1) == [PEPPER]
+    assert index.lookup("x", 10) == []
+
+
+def test_suggest_index_upsert_and_remove():
+    index = SuggestIndex(v(1), [TONY, PEPPER])
+    index.upsert(Suggestion(2, "Virginia", "Potts", "pepper@stark.com"))
+    assert index.lookup("pep", 10) == [Suggestion(2, "Virginia", "Potts", "pepper@stark.com")]
+    assert index.lookup("vir", 10)[0].id == 2
+    index.remove(1)
+    assert index.lookup("to", 10) == []
+    assert len(index) == 1
+
+
+def test_suggest_cache_write_through():
+    cache = SuggestCache(maxsize=10, ttl=60)
+    cache.put(7, SuggestIndex(v(4), [TONY]))
+
+    cache.apply(7, v(5), changed=[PEPPER])
+    index = cache.get(7, v(5))
+    assert index is not None
+    assert index.lookup("pep", 10) == [PEPPER]
+
+    cache.apply(7, v(6), removed=[1])
+    assert cache.get(7, v(6)).lookup("to", 10) == []
+
+
+def test_suggest_cache_drops_index_on_missed_write():
+    cache = SuggestCache(maxsize=10, ttl=60)
+    cache.put(7, SuggestIndex(v(4), [TONY]))
+    cache.apply(7, v(6), changed=[PEPPER])
+    assert cache.get(7, v(4)) is None
+
+    cache.put(7, SuggestIndex(v(4), [TONY]))
+    cache.apply(7, v(5), reset=True)
+    assert cache.get(7, v(5)) is None
+
+    cache.put(7, SuggestIndex(v(4), [TONY]))
+    cache.apply(7, v(5, epoch="e2"), changed=[PEPPER])
+    assert cache.get(7, v(5, epoch="e2")) is None
+
+
+def test_suggest_cache_bounded_by_total_contacts():
+    cache = SuggestCache(maxsize=10, ttl=60, max_contacts=3)
+    cache.put(1, SuggestIndex(v(1), [TONY]))
+    cache.put(2, SuggestIndex(v(1), [PEPPER]))
+    cache.get(1, v(1))
+    cache.put(3, SuggestIndex(v(1), [TONY, PETER]))
+    # Найдавніше використаний індекс (власник 2) витіснено, щоб уміститися в 3 контакти
+    assert cache.get(2, v(1)) is None
+    assert cache.get(1, v(1)) is not None and cache.get(3, v(1)) is not None
+    assert cache.stats()["contacts"] == 3
+
+    cache.put(4, SuggestIndex(v(1), [TONY, PEPPER, PETER, Suggestion(4, "Maria", "Hill", None)]))
+    assert cache.get(4, v(1)) is None
+    assert cache.stats()["contacts"] == 3
+
+
+def test_suggest_cache_remembers_too_large_owners():
+    cache = SuggestCache(maxsize=10, ttl=60)
+    cache.mark_too_large(7, v(4))
+    assert cache.is_too_large(7, v(4))
+    assert not cache.is_too_large(7, v(5))
+    assert not cache.is_too_large(8, v(4))
@@ -0,0 +1,39 @@
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+from src.services import email
+from src.services.email_queue import LocalEmailQueue
+from src.services.template_registry import TemplateRegistry, TEMPLATE_FOLDER, template_registry
+
+
+def test_registry_compiles_all_templates_once():
+    registry = TemplateRegistry(TEMPLATE_FOLDER)
+    registry.load()
+    assert {"email_template.html", "password_reset.html", "birthday_digest.html"} <= set(registry.names)
+
+    # Після завантаження рендер не звертається до завантажувача шаблонів
+    with patch.object(registry.environment.loader, "get_source", side_effect=AssertionError):
+        html = registry.render("password_reset.html", {"username": "<tony>", "url": "http://x/reset"})
+    assert "&lt;tony&gt;" in html
+    assert 'href="http://x/reset"' in html
+
+
+def test_registry_unknown_template():
+    with pytest.raises(KeyError):
+        template_registry.render("missing.html", {})
+
+
+@pytest.mark.asyncio
+async def test_birthday_digest_is_rendered():
+    class Contact:
+        first_name, last_name, birthday = "Tony", "Stark", date(1970, 5, 29)
+
+    queue = LocalEmailQueue()
+    with patch("src.services.email_queue.get_email_queue", return_value=queue):
+        await email.send_birthday_digest("tony@stark.com", "tony", [Contact()], days=7)
+
+    [(_, job)] = await queue.get(10, 0)
+    html = template_registry.render(job["template"], job["context"])
+    assert "Tony Stark &mdash; 1970-05-29" in html
+    assert "next 7 days" in html
@@ -5,9 +5,10 @@ from datetime import date, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.engine import Result
 
-from src.database.models import User, Contact
-from src.schemas import ContactCreate, ContactUpdate
+from src.database.models import User, Contact, birthday_day_of_year
+from src.schemas import ContactCreate, ContactUpdate, ContactFilter
 from src.repository.contacts import *
+from src.repository.pagination import encode_cursor, decode_cursor
 
 
 class TestContacts(unittest.IsolatedAsyncioTestCase):
@@ -41,6 +42,21 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
         result = await get_contacts(db=self.session, owner_id=self.user.id)
         self.assertEqual(result, [self.mock_contact])
 
+    async def test_get_contacts_page(self):
+        other_contact = Contact(id=2, first_name="Jane", owner_id=self.user.id)
+        mock_result = MagicMock(spec=Result)
+        mock_result.scalars.return_value.all.return_value = [self.mock_contact, other_contact]
+        self.session.execute.return_value = mock_result
+
+        result, next_cursor = await get_contacts_page(db=self.session, owner_id=self.user.id, limit=1)
+        self.assertEqual(result, [self.mock_contact])
+        self.assertEqual(decode_cursor(next_cursor, 1), [self.mock_contact.id])
+
+        result, next_cursor = await get_contacts_page(
+            db=self.session, owner_id=self.user.id, limit=2, cursor=encode_cursor(0))
+        self.assertEqual(result, [self.mock_contact, other_contact])
+        self.assertIsNone(next_cursor)
+
     async def test_get_contact_found(self):
         mock_result = MagicMock(spec=Result)
         mock_result.scalar_one_or_none.return_value = self.mock_contact
@@ -68,11 +84,31 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
         self.session.add.assert_called_once()
         self.session.commit.assert_awaited_once()
-        self.session.refresh.assert_awaited_once()
+        self.session.refresh.assert_not_awaited()
 
         self.assertEqual(result.first_name, self.contact_data.first_name)
         self.assertEqual(result.owner_id, self.user.id)
 
+    async def test_bulk_create_contacts(self):
+        mock_result = MagicMock(spec=Result)
+        mock_result.scalars.return_value.all.return_value = [self.contact_data.email]
+        self.session.execute.return_value = mock_result
+
+        result = await bulk_create_contacts(
+            db=self.session,
+            contacts=[self.contact_data],
+            owner_id=self.user.id)
+
+        self.assertEqual(result, {self.contact_data.email})
+        self.session.execute.assert_awaited_once()
+        self.session.commit.assert_awaited_once()
+
+    async def test_bulk_create_contacts_empty(self):
+        result = await bulk_create_contacts(db=self.session, contacts=[], owner_id=self.user.id)
+
+        self.assertEqual(result, set())
+        self.session.execute.assert_not_awaited()
+
     async def test_update_contact_found(self):
         mock_result = MagicMock(spec=Result)
         mock_result.scalar_one_or_none.return_value = self.mock_contact
@@ -86,8 +122,9 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
             contact=self.contact_data,
             owner_id=self.user.id)
 
+        self.session.execute.assert_awaited_once()
         self.session.commit.assert_awaited_once()
-        self.session.refresh.assert_awaited_once()
+        self.session.refresh.assert_not_awaited()
         self.assertEqual(result.first_name, self.contact_data.first_name)
 
     async def test_update_contact_not_found(self):
@@ -129,17 +166,133 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
         self.assertIsNone(result)
 
+    async def test_update_contacts_by_ids(self):
+        mock_result = MagicMock(spec=Result)
+        mock_result.scalars.return_value.all.return_value = [3, 1]
+        self.session.execute.return_value = mock_result
+
+        result = await update_contacts(
+            db=self.session,
+            owner_id=self.user.id,
+            contact=ContactUpdate(birthday=date(2000, 3, 1)),
+            ids=[1, 2, 3])
+
+        self.assertEqual(result, [1, 3])
+        req = self.session.execute.await_args.args[0]
+        params = req.compile().params
+        self.assertEqual(params["birthday_doy"], 61)
+        self.assertEqual(params["id_1"], [1, 2, 3])
+        self.session.commit.assert_awaited_once()
+
+    async def test_update_contacts_nothing_selected(self):
+        result = await update_contacts(
+            db=self.session,
+            owner_id=self.user.id,
+            contact=ContactUpdate(phone="1"),
+            ids=[])
+
+        self.assertEqual(result, [])
+        self.session.execute.assert_not_awaited()
+
+    async def test_delete_contacts_by_filter(self):
+        mock_result = MagicMock(spec=Result)
+        mock_result.scalars.return_value.all.return_value = [2]
+        self.session.execute.return_value = mock_result
+
+        result = await delete_contacts(
+            db=self.session,
+            owner_id=self.user.id,
+            filter=ContactFilter(last_name="Doe", birthday_to=date(1990, 1, 1)))
+
+        self.assertEqual(result, [2])
+        sql = str(self.session.execute.await_args.args[0])
+        self.assertIn("contacts.owner_id = ", sql)
+        self.assertIn("contacts.last_name = ", sql)
+        self.assertIn("contacts.birthday <= ", sql)
+        self.session.commit.assert_awaited_once()
+
+    async def test_delete_contacts_none_affected(self):
+        mock_result = MagicMock(spec=Result)
+        mock_result.scalars.return_value.all.return_value = []
+        self.session.execute.return_value = mock_result
+
+        result = await delete_contacts(db=self.session, owner_id=self.user.id, ids=[42])
+
+        self.assertEqual(result, [])
+        self.session.commit.assert_not_awaited()
+
     async def test_search_contacts(self):
         mock_result = MagicMock(spec=Result)
-        mock_result.scalars.return_value.all.return_value = [self.mock_contact]
+        mock_result.all.return_value = [(self.mock_contact, 0.0)]
         self.session.execute.return_value = mock_result
 
-        result = await search_contacts(
+        result, next_cursor = await search_contacts(
             db=self.session,
             query="John",
             owner_id=self.user.id)
 
         self.assertEqual(result, [self.mock_contact])
+        self.assertIsNone(next_cursor)
+
+    async def test_search_contacts_next_cursor(self):
+        other_contact = Contact(id=2, first_name="Johnny", owner_id=self.user.id)
+        mock_result = MagicMock(spec=Result)
+        mock_result.all.return_value = [(self.mock_contact, 0.5), (other_contact, 0.25)]
+        self.session.execute.return_value = mock_result
+
+        result, next_cursor = await search_contacts(
+            db=self.session,
+            query="John",
+            owner_id=self.user.id,
+            limit=1)
+
+        self.assertEqual(result, [self.mock_contact])
+        self.assertEqual(decode_cursor(next_cursor, 2), [0.5, self.mock_contact.id])
+
+    async def test_get_contacts_fields(self):
+        mock_result = MagicMock(spec=Result)
+        mock_result.all.return_value = [(1, "John")]
+        self.session.execute.return_value = mock_result
+
+        result = await get_contacts(db=self.session, owner_id=self.user.id, fields=["id", "first_name"])
+
+        self.assertEqual(result, [(1, "John")])
+        req = self.session.execute.await_args.args[0]
+        self.assertEqual([c.name for c in req.selected_columns], ["id", "first_name"])
+
+    async def test_search_contacts_fields(self):
+        row = MagicMock(id=2)
+        row.__getitem__.side_effect = lambda i: 0.5 if i == -1 else None
+        mock_result = MagicMock(spec=Result)
+        mock_result.all.return_value = [row, MagicMock()]
+        self.session.execute.return_value = mock_result
+
+        result, next_cursor = await search_contacts(
+            db=self.session, query="John", owner_id=self.user.id, limit=1, fields=["id", "email"])
+
+        self.assertEqual(result, [row])
+        self.assertEqual(decode_cursor(next_cursor, 2), [0.5, 2])
+        req = self.session.execute.await_args.args[0]
+        self.assertNotIn("additional_data", [c.name for c in req.selected_columns])
+
+    async def test_find_contacts_by_prefix(self):
+        mock_result = MagicMock(spec=Result)
+        mock_result.all.return_value = [(1, "John", "Doe", "john.doe@example.com")]
+        self.session.execute.return_value = mock_result
+
+        result = await find_contacts_by_prefix(db=self.session, owner_id=self.user.id, prefix="Jo_%")
+
+        self.assertEqual(result[0].first_name, "John")
+        params = self.session.execute.await_args.args[0].compile().params
+        self.assertIn("jo\\_\\%%", params.values())
+
+    async def test_search_contacts_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            await search_contacts(
+                db=self.session,
+                query="John",
+                owner_id=self.user.id,
+                cursor="not-a-cursor")
 
     async def test_get_upcoming_birthdays(self):
         mock_result = MagicMock(spec=Result)
@@ -182,5 +335,18 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
         self.assertIsInstance(result, list)
 
+    def test_birthday_day_of_year(self):
+        self.assertEqual(birthday_day_of_year(date(1990, 1, 1)), 1)
+        self.assertEqual(birthday_day_of_year(date(1992, 2, 29)), 60)
+        self.assertEqual(birthday_day_of_year(date(1991, 3, 1)), 61)
+        self.assertEqual(birthday_day_of_year(date(1991, 12, 31)), 366)
+        self.assertIsNone(birthday_day_of_year(None))
+
+    def test_contact_birthday_doy_follows_birthday(self):
+        self.assertEqual(self.mock_contact.birthday_doy, birthday_day_of_year(self.contact_data.birthday))
+        self.mock_contact.birthday = None
+        self.assertIsNone(self.mock_contact.birthday_doy)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import unittest
+
+from src.repository.pagination import encode_cursor, decode_cursor
+from src.repository.search import Fts5Search, TrigramSearch, SearchBackend, get_search_backend
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(0.125, 42)
+        self.assertEqual(decode_cursor(cursor, 2), [0.125, 42])
+
+    def test_cursor_wrong_size(self):
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor(1), 2)
+
+    def test_cursor_garbage(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("%%%", 1)
+
+
+class TestSearchBackends(unittest.TestCase):
+
+    def test_fts5_match_expression(self):
+        self.assertEqual(Fts5Search.match_expression("Tony"), '"tony"*')
+        self.assertEqual(Fts5Search.match_expression("tony@stark.com"), '"tony"* "stark"* "com"*')
+        self.assertEqual(Fts5Search.match_expression('"*'), "")
+
+    def test_bm25_is_not_a_keyset(self):
+        # bm25 залежить від статистики всієї таблиці, тож FTS5 гортає сторінки за зсувом
+        self.assertFalse(Fts5Search.stable_score)
+        self.assertTrue(TrigramSearch.stable_score)
+        self.assertTrue(SearchBackend.stable_score)
+
+    def test_backend_by_dialect(self):
+        class FakeDialect:
+            def __init__(self, name):
+                self.name = name
+
+        class FakeSession:
+            def __init__(self, dialect):
+                self.bind = type("Bind", (), {"dialect": FakeDialect(dialect)})()
+
+        self.assertIsInstance(get_search_backend(FakeSession("postgresql")), TrigramSearch)
+        self.assertIsInstance(get_search_backend(FakeSession("sqlite")), Fts5Search)
+        self.assertEqual(type(get_search_backend(FakeSession("mysql"))), SearchBackend)
+
+
+if __name__ == '__main__':
+    unittest.main()
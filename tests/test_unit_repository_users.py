@@ -11,6 +11,7 @@ from src.repository.users import (
     get_user_by_email,
     create_user,
     update_token,
+    update_password,
     confirmed_email,
     update_avatar
 )
@@ -62,7 +63,7 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
         
         self.session.add.assert_called_once()
         self.session.commit.assert_awaited_once()
-        self.session.refresh.assert_awaited_once()
+        self.session.refresh.assert_not_awaited()
         self.assertEqual(result.email, self.user_model.email)
         self.assertEqual(result.avatar, "http://example.com/avatar.jpg")
 
@@ -74,32 +75,45 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
         
         self.assertEqual(result.avatar, None)
 
-    async def test_update_token(self):
+    @patch("src.repository.users.invalidate_user", new_callable=AsyncMock)
+    async def test_update_token(self, mock_invalidate_user):
         token = "new_refresh_token"
         
         await update_token(user=self.user, token=token, db=self.session)
         
         self.assertEqual(self.user.refresh_token, token)
         self.session.commit.assert_awaited_once()
+        mock_invalidate_user.assert_awaited_once_with("test@example.com")
 
-    async def test_confirmed_email(self):
+    async def test_update_password(self):
+        await update_password(user=self.user, password="new_hash", db=self.session)
+
+        self.assertEqual(self.user.password, "new_hash")
+        self.session.commit.assert_awaited_once()
+
+    @patch("src.repository.users.invalidate_user", new_callable=AsyncMock)
+    async def test_confirmed_email(self, mock_invalidate_user):
         mock_result = MagicMock()
         self.session.execute.return_value = mock_result
         
         await confirmed_email(email="test@example.com", db=self.session)
         
         self.session.commit.assert_awaited_once()
+        mock_invalidate_user.assert_awaited_once_with("test@example.com")
 
-    async def test_update_avatar(self):
+    @patch("src.repository.users.invalidate_user", new_callable=AsyncMock)
+    async def test_update_avatar(self, mock_invalidate_user):
+        new_avatar_url = "http://newavatar.com/image.jpg"
+        self.user.avatar = new_avatar_url
         mock_result = MagicMock(spec=Result)
         mock_result.scalar_one.return_value = self.user
         self.session.execute.return_value = mock_result
         
-        new_avatar_url = "http://newavatar.com/image.jpg"
         result = await update_avatar(email="test@example.com", url=new_avatar_url, db=self.session)
         
         self.assertEqual(result.avatar, new_avatar_url)
         self.session.commit.assert_awaited_once()
+        mock_invalidate_user.assert_awaited_once_with("test@example.com")
 
     async def test_update_avatar_not_found(self):
         mock_result = MagicMock(spec=Result)